@@ -1,8 +1,31 @@
-from importlib.metadata import PackageNotFoundError, version
+from typing import TYPE_CHECKING, Any
 
-try:
-    __version__ = version("sync_var")
-except PackageNotFoundError:
-    __version__ = "0.0.0.dev0"
+if TYPE_CHECKING:
+    from sync_var.engine import Engine
 
-__all__ = ["__version__"]
+    __version__: str
+
+__all__ = ["Engine", "__version__"]
+
+
+def __getattr__(name: str) -> Any:
+    # Resolved lazily: importlib.metadata is slow to import and only needed
+    # for `--version` and the state files.
+    if name == "__version__":
+        from importlib.metadata import PackageNotFoundError, version
+
+        try:
+            __version__ = version("sync_var")
+        except PackageNotFoundError:
+            __version__ = "0.0.0.dev0"
+
+        globals()["__version__"] = __version__
+        return __version__
+
+    if name == "Engine":
+        # Also lazy, so the CLI does not import the rendering stages up front
+        from sync_var.engine import Engine
+
+        return Engine
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,237 @@
+import json
+import platform
+import random
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+
+from sync_var.config import load_config
+from sync_var.parse_master_var import parse_master_vars
+from sync_var.parse_target_var import parse_target_files
+from sync_var.replace import replace
+from sync_var.save import save_target_files
+
+BENCH_VERSION = 1
+
+STAGES = [
+    "load_config",
+    "parse_master_vars",
+    "parse_target_files",
+    "replace",
+    "save_target_files",
+]
+
+
+@dataclass
+class Workload:
+    targets: int = 1000
+    # lines per target file, directives included
+    lines: int = 100
+    directives: int = 5
+    keys: int = 100
+    envs: int = 1
+    seed: int = 0
+
+
+@dataclass
+class StageResult:
+    seconds: float
+    items: int
+    peak_bytes: int = 0
+
+    @property
+    def per_second(self) -> float:
+        return self.items / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class BenchResult:
+    workload: Workload
+    stages: Dict[str, StageResult] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        from sync_var import __version__
+
+        return {
+            "version": BENCH_VERSION,
+            "tool_version": __version__,
+            "python": platform.python_version(),
+            "workload": asdict(self.workload),
+            "stages": {
+                name: {
+                    "seconds": stage.seconds,
+                    "items": stage.items,
+                    "per_second": stage.per_second,
+                    "peak_bytes": stage.peak_bytes,
+                }
+                for name, stage in self.stages.items()
+            },
+        }
+
+
+def generate_workload(root: Path, workload: Workload) -> Path:
+    """Write a synthetic repository below root and return its config file."""
+    rng = random.Random(workload.seed)
+    keys = [f"KEY_{i}" for i in range(workload.keys)]
+    envs = ["default"] + [f"env{i}" for i in range(1, workload.envs)]
+
+    master_files: Dict[str, str] = {}
+    for env in envs:
+        if env == "default":
+            name = "masters/default.env"
+            content = "".join(f"{key}=value_{key.lower()}\n" for key in keys)
+        else:
+            # Exercise both master formats
+            name = f"masters/{env}.yaml"
+            content = "".join(f"{key}: {env}_{key.lower()}\n" for key in keys)
+        _write(root / name, content)
+        master_files[env] = name
+
+    directives = min(workload.directives, workload.lines // 2)
+    target_files = []
+    for i in range(workload.targets):
+        lines: List[str] = []
+        directive_at = set(rng.sample(range(workload.lines // 2), directives))
+        for j in range(workload.lines // 2):
+            if j in directive_at:
+                env, key = rng.choice(envs), rng.choice(keys)
+                lines.append(f'# [sync-var] "VAR_{j}={{{{ {env}.{key} }}}}"')
+                lines.append(f"VAR_{j}=stale")
+            else:
+                lines.append(f"# filler comment {j}")
+                lines.append(f"FILLER_{j}={rng.random()}")
+
+        name = f"targets/group{i % 100}/target{i}.env"
+        _write(root / name, "\n".join(lines) + "\n")
+        target_files.append(name)
+
+    config_file = root / "sync-var.yaml"
+    _write(
+        config_file,
+        "master_files:\n"
+        + "".join(f"  {env}: {path}\n" for env, path in master_files.items())
+        + "target_files:\n"
+        + "".join(f"  - {path}\n" for path in target_files),
+    )
+    return config_file
+
+
+def run_benchmark(workload: Workload, repeat: int = 3) -> BenchResult:
+    """Time each stage on a fresh synthetic repository.
+
+    Timings are the best of `repeat` runs; peak memory is measured in one
+    extra run under tracemalloc, which would otherwise distort the timings.
+    """
+    timings: Dict[str, List[float]] = {name: [] for name in STAGES}
+    items: Dict[str, int] = {}
+    peaks: Dict[str, int] = {}
+
+    for _ in range(repeat):
+        for name, seconds, count in _run_stages(workload, _timed):
+            timings[name].append(seconds)
+            items[name] = count
+
+    for name, peak, _ in _run_stages(workload, _traced):
+        peaks[name] = int(peak)
+
+    result = BenchResult(workload=workload)
+    for name in STAGES:
+        result.stages[name] = StageResult(
+            seconds=min(timings[name]), items=items[name], peak_bytes=peaks[name]
+        )
+    return result
+
+
+def compare_results(
+    current: Dict[str, Any], baseline: Dict[str, Any], threshold: float
+) -> List[str]:
+    """Return the stages slower than the baseline by more than threshold."""
+    if current.get("workload") != baseline.get("workload"):
+        raise ValueError("Benchmark results were produced with different workloads.")
+
+    regressions = []
+    for name, stage in current["stages"].items():
+        before = baseline.get("stages", {}).get(name)
+        if not before or not before["seconds"]:
+            continue
+
+        ratio = stage["seconds"] / before["seconds"]
+        if ratio > 1 + threshold:
+            regressions.append(
+                f"{name}: {before['seconds']:.4f}s -> {stage['seconds']:.4f}s "
+                f"(+{(ratio - 1) * 100:.1f}%)"
+            )
+    return regressions
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"Invalid benchmark results: {e}") from e
+
+    if not isinstance(data, dict) or data.get("version") != BENCH_VERSION:
+        raise ValueError(f"Unsupported benchmark results: {path}")
+    return data
+
+
+def format_results(result: BenchResult) -> List[str]:
+    """Return one human-readable line per stage."""
+    lines = []
+    for name, stage in result.stages.items():
+        lines.append(
+            f"  {name:<20} {stage.seconds * 1000:>10.2f} ms "
+            f"{stage.per_second:>12.0f} items/s "
+            f"{stage.peak_bytes / 1024 / 1024:>8.2f} MiB peak"
+        )
+    return lines
+
+
+def _run_stages(workload: Workload, measure: Callable) -> Iterator:
+    # Yields (stage, measurement, items) in pipeline order
+    with tempfile.TemporaryDirectory(prefix="sync-var-bench-") as tmp:
+        config_file = generate_workload(Path(tmp), workload)
+
+        config, value = measure(lambda: load_config(config_file, no_backup=True))
+        # Loading checks that every target file exists
+        yield "load_config", value, len(config.target_files)
+
+        master_vars, value = measure(lambda: parse_master_vars(config.master_files))
+        yield "parse_master_vars", value, len(master_vars)
+
+        target_files, value = measure(
+            lambda: parse_target_files(config.target_files, config.marker, master_vars)
+        )
+        yield "parse_target_files", value, len(target_files)
+
+        _, value = measure(lambda: replace(target_files, master_vars))
+        yield "replace", value, len(target_files)
+
+        _, value = measure(lambda: save_target_files(target_files, config.save_options))
+        yield "save_target_files", value, len(target_files)
+
+
+def _timed(func: Callable[[], Any]) -> Any:
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def _traced(func: Callable[[], Any]) -> Any:
+    # Peak of the memory allocated while the stage runs
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def _write(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
@@ -0,0 +1,38 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+CACHE_DIR = ".sync-var"
+
+
+def cache_path(config_file: str | Path, name: str) -> Path:
+    """Return the path of a state file kept alongside the config file."""
+    config_path = Path(config_file).resolve()
+    return config_path.parent / CACHE_DIR / f"{config_path.stem}.{name}.json"
+
+
+def load_json(path: Path) -> Optional[Dict[str, Any]]:
+    """Load a JSON state file, returning None if it is missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    return data if isinstance(data, dict) else None
+
+
+def save_json(path: Path, data: Dict[str, Any]) -> None:
+    """Atomically write a JSON state file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
@@ -0,0 +1,83 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from sync_var.comments import DEFAULT_PROFILES, CommentProfiles
+from sync_var.markers import MarkerGroup, marker_tables, markers_by_path
+from sync_var.parse_master_var import MasterVar
+from sync_var.parse_target_var import _parse_target_file, _validate_by_marker
+from sync_var.replace import master_lookup, render_target_line
+
+
+@dataclass
+class CheckResult:
+    checked_files: int = 0
+    checked_directives: int = 0
+    # out-of-sync directives as {"file", "line"} of the target line
+    drift: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def in_sync(self) -> bool:
+        return not self.drift
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": "ok" if self.in_sync else "drift",
+            "checked_files": self.checked_files,
+            "checked_directives": self.checked_directives,
+            "drift": self.drift,
+        }
+
+
+def check_target_files(
+    target_files: Iterable[Path],
+    marker: str,
+    master_vars: List[MasterVar],
+    stop_on_first: bool = True,
+    comment_profiles: Optional[CommentProfiles] = None,
+) -> CheckResult:
+    """Render directives in memory and compare them with the current lines."""
+    return check_marker_groups(
+        [(marker, set(target_files), master_vars)], stop_on_first, comment_profiles
+    )
+
+
+def check_marker_groups(
+    groups: List[MarkerGroup],
+    stop_on_first: bool = True,
+    comment_profiles: Optional[CommentProfiles] = None,
+) -> CheckResult:
+    """Check the target files of several markers, scanning each file once."""
+    tables = marker_tables(groups)
+    lookups = {
+        marker: master_lookup(master_vars) for marker, master_vars in tables.items()
+    }
+    profiles = comment_profiles or DEFAULT_PROFILES
+    result = CheckResult()
+
+    for path, markers in sorted(markers_by_path(groups).items()):
+        try:
+            target_lines = _parse_target_file(
+                path, markers, profiles.prefixes_for(path)
+            )
+            _validate_by_marker(target_lines, markers, lookups)
+        except ValueError as e:
+            raise ValueError(f"{path}: {e}") from e
+
+        result.checked_files += 1
+        for target_line in target_lines:
+            result.checked_directives += 1
+
+            rendered = render_target_line(target_line, lookups[target_line._marker])
+            if rendered is None:
+                continue
+            if target_line.with_indent(rendered) == target_line.raw_target_line:
+                continue
+
+            result.drift.append(
+                {"file": str(path), "line": target_line.target_line_number}
+            )
+            if stop_on_first:
+                return result
+
+    return result
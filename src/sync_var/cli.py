@@ -1,23 +1,47 @@
+import io
+import os
+import sys
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Set, Tuple
 
 import click
-from rich.console import Console
 
-from sync_var import __version__
-from sync_var.config import load_config
+from sync_var.client import request_server
+from sync_var.config import Config, load_config
+from sync_var.console import get_console
 from sync_var.error import error_handle
 from sync_var.logging import setup_logging
-from sync_var.parse_master_var import parse_master_vars
-from sync_var.parse_target_var import parse_target_files
-from sync_var.replace import replace
-from sync_var.save import save_target_files
 from sync_var.spinner import get_spinner
 
-console = Console(highlight=False)
+if TYPE_CHECKING:
+    from sync_var.index import DependencyIndex
+    from sync_var.parse_master_var import MasterVar
+    from sync_var.profiling import NullProfiler, Profiler
+
+# Stage and command modules are imported inside the commands using them, so
+# that `--help`, `--version` and server round-trips stay cheap to start.
+
+
+def _print_version(ctx: click.Context, _param: click.Parameter, value: bool) -> None:
+    if not value or ctx.resilient_parsing:
+        return
+
+    from sync_var import __version__
+
+    click.echo(f"sync-var, version {__version__}")
+    ctx.exit()
 
 
 @click.group(invoke_without_command=True)
-@click.version_option(__version__, "--version", "-v", prog_name="sync-var")
+@click.option(
+    "--version",
+    "-v",
+    is_flag=True,
+    expose_value=False,
+    is_eager=True,
+    callback=_print_version,
+    help="Show the version and exit.",
+)
 @click.help_option("--help", "-h")
 @click.pass_context
 @error_handle
@@ -64,6 +88,57 @@ def init(config_path: str | None, verbose: bool) -> None:
     default=None,
     help="Path to configuration file.",
 )
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="Number of worker processes for target files (0 = one per CPU).",
+)
+@click.option(
+    "--shard",
+    default=None,
+    callback=lambda ctx, param, value: _parse_shard_option(value),
+    help="Only process shard INDEX of COUNT target file shards (e.g. 2/4).",
+)
+@click.option(
+    "--since",
+    metavar="REF",
+    default=None,
+    help="Only process targets changed since a git revision, or using changed keys.",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Print wall and CPU time per stage and the slowest target files.",
+)
+@click.option(
+    "--profile-top",
+    type=click.IntRange(min=0),
+    default=10,
+    show_default=True,
+    help="Number of slowest target files to print with --profile.",
+)
+@click.option(
+    "--profile-output",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Also write cProfile and tracemalloc captures here (implies --profile).",
+)
+@click.option(
+    "--trace-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write debug events as JSON lines to this file.",
+)
+@click.option(
+    "--metrics-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write counters in Prometheus text format to this file.",
+)
 @click.option(
     "--verbose",
     is_flag=True,
@@ -71,27 +146,67 @@ def init(config_path: str | None, verbose: bool) -> None:
     help="Enable verbose logging output.",
 )
 @error_handle
-def validate(config_path: str | None, verbose: bool) -> None:
+def validate(
+    config_path: str | None,
+    jobs: int,
+    shard: Tuple[int, int] | None,
+    since: str | None,
+    profile: bool,
+    profile_top: int,
+    profile_output: str | None,
+    trace_file: str | None,
+    metrics_file: str | None,
+    verbose: bool,
+) -> None:
     """Validate config file and master/target files."""
     setup_logging(verbose)
+    profiler = _start_profiling(profile, profile_top, profile_output)
+    _trace_to_file(trace_file)
+    _write_metrics_on_close(metrics_file)
+    local = shard or since or profiler.enabled or trace_file or metrics_file
+    if jobs == 1 and not (local or verbose):
+        _run_on_server("validate", config_path)
+
+    from sync_var.index import load_index
+    from sync_var.markers import load_marker_groups, restrict_groups
+    from sync_var.parse_target_var import parse_marker_groups
+    from sync_var.providers import load_master_vars
+
     Spinner = get_spinner(verbose)
 
     with Spinner(text="Loading configuration...") as spinner:
-        config = load_config(
-            Path(config_path) if config_path else None,
-            verbose=verbose,
-        )
+        with profiler.stage("load_config"):
+            config = load_config(
+                Path(config_path) if config_path else None,
+                verbose=verbose,
+            )
         spinner.succeed("Configuration loaded.")
 
     with Spinner(text="Parsing master variable files...") as spinner:
-        master_vars = parse_master_vars(config.master_files)
+        with profiler.stage("parse_master_vars"):
+            master_vars = load_master_vars(config)
+            groups = load_marker_groups(config, master_vars)
         spinner.succeed("Master variable files parsed.")
 
+    with profiler.stage("select_targets"):
+        selected_targets = _select_targets(
+            config, master_vars, load_index(config), shard, since
+        )
+        groups = restrict_groups(groups, selected_targets)
     with Spinner(text="Parsing target files...") as spinner:
-        parse_target_files(config.target_files, config.marker, master_vars)
+        with profiler.stage("parse_target_files"):
+            # Parsing validates; the parsed files are not needed afterwards
+            if jobs == 1:
+                parse_marker_groups(groups, comment_profiles=config.comment_profiles)
+            else:
+                from sync_var.parallel import render_marker_groups
+
+                render_marker_groups(
+                    groups, jobs, comment_profiles=config.comment_profiles
+                )
         spinner.succeed("Target files parsed.")
 
-    console.print("[green]Validation completed successfully.[/green]")
+    get_console().print("[green]Validation completed successfully.[/green]")
 
 
 @root.command()
@@ -123,6 +238,92 @@ def validate(config_path: str | None, verbose: bool) -> None:
     is_flag=True,
     help="Overwrite target files without creating backup files.",
 )
+@click.option(
+    "--matrix",
+    metavar="ENVS",
+    default=None,
+    callback=lambda ctx, param, value: _parse_matrix_option(value),
+    help="Render one variant per environment (e.g. dev,prod) into --output-dir.",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="Number of worker processes for target files (0 = one per CPU).",
+)
+@click.option(
+    "--keys",
+    "-k",
+    default=None,
+    help="Only sync targets referencing these keys (e.g. API_KEY,prod.DB_HOST).",
+)
+@click.option(
+    "--changed-masters",
+    is_flag=True,
+    default=False,
+    help="Only sync targets referencing master values changed since the last sync.",
+)
+@click.option(
+    "--force",
+    "-f",
+    is_flag=True,
+    default=False,
+    help="Sync even if no input changed since the last sync.",
+)
+@click.option(
+    "--discover",
+    "discover_root",
+    type=click.Path(exists=True, file_okay=False),
+    is_flag=False,
+    flag_value=".",
+    default=None,
+    help="Sync every config file found below a directory (default: current).",
+)
+@click.option(
+    "--shard",
+    default=None,
+    callback=lambda ctx, param, value: _parse_shard_option(value),
+    help="Only process shard INDEX of COUNT target file shards (e.g. 2/4).",
+)
+@click.option(
+    "--since",
+    metavar="REF",
+    default=None,
+    help="Only process targets changed since a git revision, or using changed keys.",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Print wall and CPU time per stage and the slowest target files.",
+)
+@click.option(
+    "--profile-top",
+    type=click.IntRange(min=0),
+    default=10,
+    show_default=True,
+    help="Number of slowest target files to print with --profile.",
+)
+@click.option(
+    "--profile-output",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Also write cProfile and tracemalloc captures here (implies --profile).",
+)
+@click.option(
+    "--trace-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write debug events as JSON lines to this file.",
+)
+@click.option(
+    "--metrics-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write counters in Prometheus text format to this file.",
+)
 @click.option(
     "--verbose",
     is_flag=True,
@@ -135,48 +336,975 @@ def sync(
     dry_run: bool,
     output_dir: str | None,
     no_backup: bool,
+    matrix: List[str] | None,
+    jobs: int,
+    keys: str | None,
+    changed_masters: bool,
+    force: bool,
+    discover_root: str | None,
+    shard: Tuple[int, int] | None,
+    since: str | None,
+    profile: bool,
+    profile_top: int,
+    profile_output: str | None,
+    trace_file: str | None,
+    metrics_file: str | None,
     verbose: bool,
 ) -> None:
     """Execute synchronization."""
+    setup_logging(verbose)
+    profiler = _start_profiling(profile, profile_top, profile_output)
+    _trace_to_file(trace_file)
+    _write_metrics_on_close(metrics_file)
+    if discover_root is not None:
+        if config_path or keys or changed_masters or shard or since or matrix:
+            raise click.UsageError(
+                "--discover cannot be combined with --config, --keys, "
+                "--changed-masters, --shard, --since or --matrix."
+            )
+        _sync_discovered(
+            Path(discover_root), dry_run, output_dir, no_backup, jobs, force, verbose
+        )
+        return
+    if matrix is not None and (dry_run or not output_dir):
+        raise click.UsageError("--matrix requires --output-dir and no --dry-run.")
+
+    partial = keys or changed_masters or shard or since
+    local = partial or force or matrix or profiler.enabled or trace_file or metrics_file
+    if jobs == 1 and not (local or verbose):
+        _run_on_server(
+            "sync",
+            config_path,
+            {
+                "dry_run": dry_run,
+                "output_dir": os.path.abspath(output_dir) if output_dir else None,
+                "no_backup": no_backup,
+            },
+        )
+
+    from sync_var.fingerprint import is_unchanged, record_fingerprint
+    from sync_var.index import VarId, load_index, parse_keys
+    from sync_var.markers import load_marker_groups, marker_tables, restrict_groups
+    from sync_var.parse_target_var import parse_marker_groups
+    from sync_var.providers import load_master_vars
+    from sync_var.replace import replace
+    from sync_var.save import save_target_files
+
+    Spinner = get_spinner(verbose)
+
+    with Spinner(text="Loading configuration...") as spinner:
+        with profiler.stage("load_config"):
+            config = load_config(
+                Path(config_path) if config_path else None,
+                dry_run=dry_run,
+                output_dir=output_dir,
+                no_backup=no_backup,
+                verbose=verbose,
+            )
+        spinner.succeed("Configuration loaded.")
+
+    if config.marker_configs and (keys or changed_masters):
+        raise ValueError(
+            "--keys and --changed-masters are not supported with several markers."
+        )
+
+    # The fingerprint only covers in-place syncs, whose outputs are the inputs.
+    in_place = not (config.save_options.dry_run or config.save_options.output_dir)
+    full_run = in_place and not partial
+    if full_run and not force and is_unchanged(config):
+        get_console().print("[green]No changes since the last sync.[/green]")
+        return
+
+    with Spinner(text="Parsing master variable files...") as spinner:
+        with profiler.stage("parse_master_vars"):
+            master_vars = load_master_vars(config)
+            groups = load_marker_groups(config, master_vars)
+        spinner.succeed("Master variable files parsed.")
+
+    with profiler.stage("select_targets"):
+        index = load_index(config)
+        index.prune(config.all_target_files)
+        selected_targets = _select_targets(config, master_vars, index, shard, since)
+
+    selected_keys: Set[VarId] = set()
+    if keys or changed_masters:
+        with Spinner(text="Looking up affected target files...") as spinner:
+            with profiler.stage("select_targets"):
+                if keys:
+                    selected_keys = parse_keys(keys, master_vars)
+                if changed_masters:
+                    selected_keys |= index.changed_master_keys(master_vars)
+                affected_targets = index.affected_targets(
+                    selected_keys, selected_targets
+                )
+            spinner.succeed(
+                f"{len(affected_targets)} of {len(selected_targets)} "
+                "target files affected."
+            )
+            selected_targets = affected_targets
+
+    if partial and not selected_targets:
+        get_console().print("[yellow]No target files to sync.[/yellow]")
+        return
+
+    groups = restrict_groups(groups, selected_targets)
+    if matrix is not None:
+        from sync_var.matrix import render_matrix
+
+        # Parsed once; every variant is rendered from the same directives
+        with Spinner(text="Parsing target files...") as spinner:
+            with profiler.stage("parse_target_files"):
+                target_files = parse_marker_groups(
+                    groups, comment_profiles=config.comment_profiles
+                )
+            spinner.succeed("Target files parsed.")
+
+        # --matrix was checked to come with --output-dir
+        matrix_dir = config.save_options.output_dir
+        assert matrix_dir is not None
+        with Spinner(text=f"Rendering {len(matrix)} variants...") as spinner:
+            logs = render_matrix(target_files, groups, matrix, matrix_dir)
+            spinner.succeed("Variants rendered.")
+
+        index.update_targets(target_files)
+        index.save()
+
+        get_console().print("Files saved:")
+        for log in logs:
+            get_console().print(log)
+        return
+
+    if jobs == 1:
+        with Spinner(text="Parsing target files...") as spinner:
+            with profiler.stage("parse_target_files"):
+                target_files = parse_marker_groups(
+                    groups, comment_profiles=config.comment_profiles
+                )
+            spinner.succeed("Target files parsed.")
+
+        with Spinner(text="Replacing variables in target files...") as spinner:
+            with profiler.stage("replace"):
+                replace(target_files, master_vars, marker_tables(groups))
+            spinner.succeed("Variables replaced in target files.")
+    else:
+        from sync_var.parallel import render_marker_groups
+
+        with Spinner(text="Parsing and replacing target files...") as spinner:
+            with profiler.stage("render"):
+                target_files = render_marker_groups(
+                    groups, jobs, comment_profiles=config.comment_profiles
+                )
+            spinner.succeed("Target files parsed and replaced.")
+
+    if config.save_options.dry_run:
+        get_console().print("\n[bold yellow]Dry run mode:[/bold yellow]")
+        with profiler.stage("save_target_files"):
+            save_target_files(target_files, config.save_options)
+        return
+
+    with Spinner(text="Saving target files...") as spinner:
+        with profiler.stage("save_target_files"):
+            logs = save_target_files(target_files, config.save_options)
+        spinner.succeed("Target files saved.")
+
+    index.update_targets(target_files)
+    if full_run:
+        index.update_masters(master_vars)
+    elif in_place and not (shard or since):
+        # Only the selected keys had all of their targets rewritten
+        index.update_masters(master_vars, selected_keys)
+    index.save()
+
+    if full_run:
+        record_fingerprint(config)
+
+    get_console().print("Files edited:")
+    for log in logs:
+        get_console().print(log)
+
+
+def _parse_shard_option(value: str | None) -> Tuple[int, int] | None:
+    if value is None:
+        return None
+
+    from sync_var.shard import parse_shard
+
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="'--shard'") from e
+
+
+def _parse_matrix_option(value: str | None) -> List[str] | None:
+    if value is None:
+        return None
+
+    from sync_var.matrix import parse_matrix
+
+    try:
+        return parse_matrix(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="'--matrix'") from e
+
+
+def _select_shard(config: Config, shard: Tuple[int, int] | None) -> Set[Path]:
+    if shard is None:
+        return config.all_target_files
+
+    from sync_var.shard import select_shard
+
+    return select_shard(config.all_target_files, config.config_dir, shard)
+
+
+def _select_targets(
+    config: Config,
+    master_vars: List["MasterVar"],
+    index: "DependencyIndex",
+    shard: Tuple[int, int] | None,
+    since: str | None,
+) -> Set[Path]:
+    target_files = _select_shard(config, shard)
+    if since is None:
+        return target_files
+    if config.marker_configs:
+        raise ValueError("--since is not supported with several markers.")
+
+    from sync_var.since import select_changed_targets
+
+    return select_changed_targets(config, master_vars, since, index, target_files)
+
+
+def _sync_discovered(
+    root: Path,
+    dry_run: bool,
+    output_dir: str | None,
+    no_backup: bool,
+    jobs: int,
+    force: bool,
+    verbose: bool,
+) -> None:
+    from sync_var.config import SaveOptions
+    from sync_var.discover import discover_config_files, sync_discovered
+
+    console = get_console()
+    config_files = discover_config_files(root)
+    if not config_files:
+        console.print(f"[yellow]No configuration files found in {root}.[/yellow]")
+        return
+
+    Spinner = get_spinner(verbose)
+    with Spinner(text=f"Syncing {len(config_files)} configs...") as spinner:
+        results = sync_discovered(
+            config_files,
+            SaveOptions(
+                dry_run=dry_run,
+                output_dir=Path(output_dir) if output_dir else None,
+                no_backup=no_backup,
+            ),
+            jobs=jobs,
+            force=force,
+        )
+        spinner.succeed(f"{len(config_files)} configs processed.")
+
+    failed = 0
+    for result in results:
+        console.print(f"\n[bold blue]{result.config_file}[/bold blue]")
+        if not result.ok:
+            failed += 1
+            for error in result.errors:
+                console.print(f"  [bold red]Error:[/bold red] {error}")
+        elif result.unchanged:
+            console.print("  [green]No changes since the last sync.[/green]")
+        elif result.logs:
+            for log in result.logs:
+                console.print(log)
+        elif not dry_run:
+            console.print("  [yellow]No files edited.[/yellow]")
+
+    console.print(
+        f"\n{len(results) - failed} of {len(results)} configs synced successfully."
+    )
+    if failed:
+        sys.exit(1)
+
+
+@root.command()
+@click.help_option("--help", "-h")
+@click.option(
+    "--config",
+    "-c",
+    "config_path",
+    type=click.Path(exists=True),
+    default=None,
+    help="Path to configuration file.",
+)
+@click.option(
+    "--all",
+    "-a",
+    "check_all",
+    is_flag=True,
+    default=False,
+    help="Report every out-of-sync directive instead of stopping at the first.",
+)
+@click.option(
+    "--shard",
+    default=None,
+    callback=lambda ctx, param, value: _parse_shard_option(value),
+    help="Only process shard INDEX of COUNT target file shards (e.g. 2/4).",
+)
+@click.option(
+    "--since",
+    metavar="REF",
+    default=None,
+    help="Only process targets changed since a git revision, or using changed keys.",
+)
+@click.option(
+    "--metrics-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write counters in Prometheus text format to this file.",
+)
+@click.option(
+    "--verbose",
+    is_flag=True,
+    default=False,
+    help="Enable verbose logging output.",
+)
+@error_handle
+def check(
+    config_path: str | None,
+    check_all: bool,
+    shard: Tuple[int, int] | None,
+    since: str | None,
+    metrics_file: str | None,
+    verbose: bool,
+) -> None:
+    """Exit with status 1 if any target file is out of sync."""
+    setup_logging(verbose)
+    _write_metrics_on_close(metrics_file)
+    if not (shard or since or metrics_file or verbose):
+        _run_on_server("check", config_path, {"all": check_all})
+
+    import json
+
+    from sync_var.check import check_marker_groups
+    from sync_var.markers import load_marker_groups, restrict_groups
+    from sync_var.providers import load_master_vars
+
+    config = load_config(
+        Path(config_path) if config_path else None,
+        verbose=verbose,
+    )
+    master_vars = load_master_vars(config)
+    if since is not None:
+        from sync_var.index import load_index
+
+        selected_targets = _select_targets(
+            config, master_vars, load_index(config), shard, since
+        )
+    else:
+        selected_targets = _select_shard(config, shard)
+
+    groups = restrict_groups(load_marker_groups(config, master_vars), selected_targets)
+    result = check_marker_groups(
+        groups,
+        stop_on_first=not check_all,
+        comment_profiles=config.comment_profiles,
+    )
+
+    click.echo(json.dumps(result.to_dict(), separators=(",", ":")))
+    if not result.in_sync:
+        sys.exit(1)
+
+
+@root.command()
+@click.help_option("--help", "-h")
+@click.option(
+    "--config",
+    "-c",
+    "config_path",
+    type=click.Path(exists=True),
+    default=None,
+    help="Path to configuration file.",
+)
+@click.option(
+    "--output",
+    "-o",
+    "output_path",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write the plan to a file instead of stdout.",
+)
+@click.option(
+    "--verbose",
+    is_flag=True,
+    default=False,
+    help="Enable verbose logging output.",
+)
+@error_handle
+def plan(config_path: str | None, output_path: str | None, verbose: bool) -> None:
+    """Write the line edits a sync would make as a JSON plan."""
+    from sync_var.markers import load_marker_groups, marker_tables
+    from sync_var.parse_target_var import parse_marker_groups
+    from sync_var.plan import build_plan, save_plan
+    from sync_var.providers import load_master_vars
+    from sync_var.replace import replace
+
+    setup_logging(verbose)
+
+    config = load_config(
+        Path(config_path) if config_path else None,
+        verbose=verbose,
+    )
+    master_vars = load_master_vars(config)
+    groups = load_marker_groups(config, master_vars)
+    target_files = parse_marker_groups(groups, comment_profiles=config.comment_profiles)
+    replace(target_files, master_vars, marker_tables(groups))
+
+    sync_plan = build_plan(target_files, config.config_dir)
+    text = save_plan(sync_plan, Path(output_path) if output_path else None)
+    if output_path:
+        get_console().print(
+            f"Plan with {len(sync_plan.files)} files written to "
+            f"[cyan]{output_path}[/cyan]"
+        )
+    else:
+        click.echo(text, nl=False)
+
+
+@root.command()
+@click.help_option("--help", "-h")
+@click.argument("file", type=click.Path(exists=True, dir_okay=False), required=False)
+@click.option(
+    "--config",
+    "-c",
+    "config_path",
+    type=click.Path(exists=True),
+    default=None,
+    help="Path to configuration file.",
+)
+@click.option(
+    "--stdin",
+    "from_stdin",
+    is_flag=True,
+    default=False,
+    help="Read the target from standard input instead of FILE.",
+)
+@click.option(
+    "--name",
+    default=None,
+    help="File name choosing the comment prefixes (default: FILE, or every prefix).",
+)
+@error_handle
+def render(
+    file: str | None, config_path: str | None, from_stdin: bool, name: str | None
+) -> None:
+    """Render the directives of FILE or stdin to stdout, line by line."""
+    from rich.console import Console
+
+    from sync_var.comments import DEFAULT_PREFIXES
+    from sync_var.console import redirect_console
+    from sync_var.markers import load_marker_groups, marker_tables
+    from sync_var.providers import load_master_vars, provider_fetchers
+    from sync_var.stream import StreamRenderer
+
+    # stdout carries the rendered stream, so messages and errors go to stderr
+    click.get_current_context().with_resource(
+        redirect_console(Console(stderr=True, highlight=False))
+    )
+    if from_stdin == (file is not None):
+        raise click.UsageError("Pass either FILE or --stdin.")
+
+    config = load_config(Path(config_path) if config_path else None)
+    master_vars = load_master_vars(config)
+    groups = load_marker_groups(config, master_vars)
+
+    name = name or file
+    prefixes = (
+        config.comment_profiles.prefixes_for(Path(name)) if name else DEFAULT_PREFIXES
+    )
+    renderer = StreamRenderer(
+        marker_tables(groups),
+        prefixes,
+        name or "<stdin>",
+        fetchers=provider_fetchers(config),
+    )
+
+    # Line endings are passed through as they are
+    for stream in (sys.stdout, sys.stdin) if file is None else (sys.stdout,):
+        if isinstance(stream, io.TextIOWrapper):
+            stream.reconfigure(encoding="utf-8", newline="")
+    if file is None:
+        sys.stdout.writelines(renderer.render(sys.stdin))
+    else:
+        with open(file, "r", encoding="utf-8", newline="") as f:
+            sys.stdout.writelines(renderer.render(f))
+    sys.stdout.flush()
+
+
+@root.command()
+@click.help_option("--help", "-h")
+@click.argument("plan_path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--root",
+    "root_dir",
+    type=click.Path(exists=True, file_okay=False),
+    default=None,
+    help="Directory plan paths are relative to (default: recorded in the plan).",
+)
+@click.option(
+    "--dry-run",
+    "-d",
+    is_flag=True,
+    default=False,
+    help="Verify the plan without making changes.",
+)
+@click.option(
+    "--no-backup",
+    "-n",
+    is_flag=True,
+    help="Overwrite target files without creating backup files.",
+)
+@click.option(
+    "--verbose",
+    is_flag=True,
+    default=False,
+    help="Enable verbose logging output.",
+)
+@error_handle
+def apply(
+    plan_path: str,
+    root_dir: str | None,
+    dry_run: bool,
+    no_backup: bool,
+    verbose: bool,
+) -> None:
+    """Apply a plan created by `plan` without parsing master or target files."""
+    from sync_var.plan import apply_plan, load_plan
+
+    setup_logging(verbose)
+
+    logs = apply_plan(
+        load_plan(Path(plan_path)),
+        root=Path(root_dir).resolve() if root_dir else None,
+        create_backup=not no_backup,
+        dry_run=dry_run,
+    )
+
+    if not logs:
+        get_console().print("[yellow]No changes to apply.[/yellow]")
+        return
+    get_console().print("Files edited:" if not dry_run else "Files to edit:")
+    for log in logs:
+        get_console().print(log)
+
+
+@root.command()
+@click.help_option("--help", "-h")
+@click.option(
+    "--config",
+    "-c",
+    "config_path",
+    type=click.Path(exists=True),
+    default=None,
+    help="Path to configuration file.",
+)
+@click.option(
+    "--output",
+    "-o",
+    "output_path",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write the JSON report to a file instead of stdout.",
+)
+@click.option(
+    "--strict",
+    is_flag=True,
+    default=False,
+    help="Exit with status 1 if any issue is reported.",
+)
+@click.option(
+    "--verbose",
+    is_flag=True,
+    default=False,
+    help="Enable verbose logging output.",
+)
+@error_handle
+def report(
+    config_path: str | None,
+    output_path: str | None,
+    strict: bool,
+    verbose: bool,
+) -> None:
+    """Report unused master keys and unresolved directives as JSON."""
+    import json
+
+    from sync_var.markers import load_marker_groups
+    from sync_var.parse_target_var import parse_marker_groups
+    from sync_var.providers import load_master_vars
+    from sync_var.report import build_report
+
+    setup_logging(verbose)
+
+    config = load_config(
+        Path(config_path) if config_path else None,
+        verbose=verbose,
+    )
+    groups = load_marker_groups(config, load_master_vars(config))
+    target_files = parse_marker_groups(
+        groups, validate=False, comment_profiles=config.comment_profiles
+    )
+
+    usage_report = build_report(config, groups, target_files)
+    output = json.dumps(usage_report.to_dict(), indent=2)
+
+    if output_path:
+        Path(output_path).write_text(output + "\n", encoding="utf-8")
+    else:
+        click.echo(output)
+
+    if strict and usage_report.has_issues:
+        sys.exit(1)
+
+
+@root.command()
+@click.help_option("--help", "-h")
+@click.option("--targets", type=click.IntRange(min=1), default=1000, show_default=True)
+@click.option(
+    "--lines",
+    type=click.IntRange(min=2),
+    default=100,
+    show_default=True,
+    help="Lines per target file.",
+)
+@click.option(
+    "--directives",
+    type=click.IntRange(min=0),
+    default=5,
+    show_default=True,
+    help="Directives per target file.",
+)
+@click.option(
+    "--keys",
+    type=click.IntRange(min=1),
+    default=100,
+    show_default=True,
+    help="Keys per master file.",
+)
+@click.option(
+    "--envs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of environments (master files).",
+)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option(
+    "--repeat",
+    type=click.IntRange(min=1),
+    default=3,
+    show_default=True,
+    help="Runs per stage; the fastest is reported.",
+)
+@click.option(
+    "--output",
+    "-o",
+    "output_path",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write JSON results to a file.",
+)
+@click.option(
+    "--compare",
+    "baseline_path",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Compare with earlier JSON results and exit 1 on regressions.",
+)
+@click.option(
+    "--threshold",
+    type=click.FloatRange(min=0),
+    default=0.1,
+    show_default=True,
+    help="Slowdown ratio tolerated by --compare.",
+)
+@error_handle
+def bench(
+    targets: int,
+    lines: int,
+    directives: int,
+    keys: int,
+    envs: int,
+    seed: int,
+    repeat: int,
+    output_path: str | None,
+    baseline_path: str | None,
+    threshold: float,
+) -> None:
+    """Benchmark each stage on a synthetic repository."""
+    import json
+
+    from sync_var.bench import (
+        Workload,
+        compare_results,
+        format_results,
+        load_results,
+        run_benchmark,
+    )
+
+    workload = Workload(
+        targets=targets,
+        lines=lines,
+        directives=directives,
+        keys=keys,
+        envs=envs,
+        seed=seed,
+    )
+    with get_spinner(False)(text="Running benchmark...") as spinner:
+        result = run_benchmark(workload, repeat=repeat)
+        spinner.succeed("Benchmark completed.")
+
+    console = get_console()
+    for line in format_results(result):
+        console.print(line)
+
+    data = result.to_dict()
+    if output_path:
+        Path(output_path).write_text(json.dumps(data, indent=2) + "\n", "utf-8")
+        console.print(f"Results written to [cyan]{output_path}[/cyan]")
+
+    if baseline_path:
+        regressions = compare_results(
+            data, load_results(Path(baseline_path)), threshold
+        )
+        if regressions:
+            console.print("[bold red]Regressions:[/bold red]")
+            for regression in regressions:
+                console.print(f"  {regression}")
+            sys.exit(1)
+        console.print("[green]No regressions.[/green]")
+
+
+@root.command()
+@click.help_option("--help", "-h")
+@click.option(
+    "--config",
+    "-c",
+    "config_path",
+    type=click.Path(exists=True),
+    default=None,
+    help="Path to configuration file.",
+)
+@click.option(
+    "--no-backup",
+    "-n",
+    is_flag=True,
+    help="Overwrite target files without creating backup files.",
+)
+@click.option(
+    "--debounce",
+    type=click.IntRange(min=0),
+    default=50,
+    show_default=True,
+    help="Milliseconds to wait for further changes before re-syncing.",
+)
+@click.option(
+    "--poll",
+    is_flag=True,
+    default=False,
+    help="Poll file stats instead of using inotify.",
+)
+@click.option(
+    "--metrics-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write counters in Prometheus text format to this file.",
+)
+@click.option(
+    "--verbose",
+    is_flag=True,
+    default=False,
+    help="Enable verbose logging output.",
+)
+@error_handle
+def watch(
+    config_path: str | None,
+    no_backup: bool,
+    debounce: int,
+    poll: bool,
+    metrics_file: str | None,
+    verbose: bool,
+) -> None:
+    """Watch master and target files and re-sync on change."""
+    from sync_var.watch import WatchSession, get_watcher, run_watch
+
     setup_logging(verbose)
     Spinner = get_spinner(verbose)
 
     with Spinner(text="Loading configuration...") as spinner:
         config = load_config(
             Path(config_path) if config_path else None,
-            dry_run=dry_run,
-            output_dir=output_dir,
             no_backup=no_backup,
             verbose=verbose,
         )
         spinner.succeed("Configuration loaded.")
 
-    with Spinner(text="Parsing master variable files...") as spinner:
-        master_vars = parse_master_vars(config.master_files)
-        spinner.succeed("Master variable files parsed.")
+    def write_metrics() -> None:
+        if metrics_file:
+            from sync_var.metrics import metrics
 
-    with Spinner(text="Parsing target files...") as spinner:
-        target_files = parse_target_files(
-            config.target_files, config.marker, master_vars
+            metrics.write(Path(metrics_file))
+
+    def on_logs(logs: List[str]) -> None:
+        _print_logs(logs)
+        write_metrics()
+
+    def on_error(e: Exception) -> None:
+        get_console().print(f"[bold red]Error:[/bold red] {e}")
+        write_metrics()
+
+    session = WatchSession(config)
+    with Spinner(text="Syncing target files...") as spinner:
+        logs = session.load()
+        spinner.succeed("Target files synced.")
+    on_logs(logs)
+
+    watcher = get_watcher(session.paths, polling=poll)
+    get_console().print(
+        f"Watching {len(session.paths)} files. Press [bold]Ctrl+C[/bold] to stop."
+    )
+    try:
+        run_watch(
+            session,
+            watcher,
+            debounce / 1000,
+            on_logs=on_logs,
+            on_error=on_error,
         )
-        spinner.succeed("Target files parsed.")
+    finally:
+        watcher.close()
 
-    with Spinner(text="Replacing variables in target files...") as spinner:
-        replace(target_files, master_vars)
-        spinner.succeed("Variables replaced in target files.")
 
-    if config.save_options.dry_run:
-        console.print("\n[bold yellow]Dry run mode:[/bold yellow]")
-        save_target_files(target_files, config.save_options)
+@root.command()
+@click.help_option("--help", "-h")
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Path of the Unix socket to listen on.",
+)
+@click.option(
+    "--metrics-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write counters in Prometheus text format to this file.",
+)
+@click.option(
+    "--verbose",
+    is_flag=True,
+    default=False,
+    help="Enable verbose logging output.",
+)
+@error_handle
+def serve(socket_path: str | None, metrics_file: str | None, verbose: bool) -> None:
+    """Serve validate/sync requests from a warm process over a Unix socket."""
+    from sync_var.client import default_socket_path
+    from sync_var.server import SyncVarServer
+
+    setup_logging(verbose)
+
+    path = Path(socket_path) if socket_path else default_socket_path()
+    server = SyncVarServer(path, Path(metrics_file) if metrics_file else None)
+    get_console().print(
+        f"Listening on [cyan]{path}[/cyan]. Press [bold]Ctrl+C[/bold] to stop."
+    )
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def _start_profiling(profile: bool, top: int, output_dir: str | None) -> "NullProfiler":
+    """Install a profiler for this command and report it when the command ends."""
+    from sync_var.profiling import get_profiler
+
+    if not (profile or output_dir):
+        return get_profiler()
+
+    from sync_var.profiling import Profiler, profiling
+
+    profiler = Profiler(Path(output_dir) if output_dir else None)
+    ctx = click.get_current_context()
+    ctx.with_resource(profiling(profiler))
+    # Reported even when the command returns early or fails
+    ctx.call_on_close(lambda: _report_profile(profiler, top))
+    profiler.start()
+    return profiler
+
+
+def _report_profile(profiler: "Profiler", top: int) -> None:
+    written = profiler.stop()
+    console = get_console()
+
+    console.print("\n[bold]Profile:[/bold]")
+    console.print(f"  {'stage':<24} {'wall ms':>10} {'cpu ms':>10}")
+    for name, (wall, cpu) in profiler.stages.items():
+        console.print(f"  {name:<24} {wall * 1000:>10.2f} {cpu * 1000:>10.2f}")
+
+    slowest = profiler.slowest_files(top)
+    if slowest:
+        console.print(f"\n[bold]Slowest {len(slowest)} target files:[/bold]")
+        for path, wall, cpu in slowest:
+            console.print(f"  {wall * 1000:>10.2f} {cpu * 1000:>10.2f}  {path}")
+    elif not profiler.files:
+        console.print("\nNo per-file timings (not recorded with --jobs).")
+
+    for path in written:
+        console.print(f"Wrote [cyan]{path}[/cyan]")
+
+
+def _trace_to_file(trace_file: str | None) -> None:
+    """Write trace events to a file until the command ends."""
+    if not trace_file:
         return
 
-    with Spinner(text="Saving target files...") as spinner:
-        logs = save_target_files(target_files, config.save_options)
-        spinner.succeed("Target files saved.")
+    from sync_var.trace import trace_to
 
-    console.print("Files edited:")
+    click.get_current_context().with_resource(trace_to(Path(trace_file)))
+
+
+def _write_metrics_on_close(metrics_file: str | None) -> None:
+    """Write the counters when the command ends, even if it fails."""
+    if not metrics_file:
+        return
+
+    from sync_var.metrics import metrics
+
+    click.get_current_context().call_on_close(lambda: metrics.write(Path(metrics_file)))
+
+
+def _run_on_server(
+    command: str,
+    config_path: str | None,
+    options: Dict[str, Any] | None = None,
+) -> None:
+    """Run the command on a running `serve` process and exit, if there is one."""
+    response = request_server(command, config_path, options)
+    if response is None:
+        return
+
+    sys.stdout.write(response.get("output", ""))
+    sys.stdout.flush()
+    sys.exit(int(response.get("exit_code", 1)))
+
+
+def _print_logs(logs: List[str]) -> None:
+    if not logs:
+        return
+    get_console().print("Files edited:")
     for log in logs:
-        console.print(log)
+        get_console().print(log)
 
 
 def _init_config_file(config_path: Path | None) -> None:
@@ -210,4 +1338,4 @@ target_files:
 """
 
     output_path.write_text(template, encoding="utf-8")
-    console.print(f"Created configuration file: [cyan]{output_path}[/cyan]")
+    get_console().print(f"Created configuration file: [cyan]{output_path}[/cyan]")
@@ -0,0 +1,85 @@
+import os
+import shutil
+import stat
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from sync_var.config import find_config_file
+from sync_var.logging import log
+
+SOCKET_ENV = "SYNC_VAR_SOCKET"
+NO_SERVER_ENV = "SYNC_VAR_NO_SERVER"
+
+Request = Dict[str, Any]
+Response = Dict[str, Any]
+
+
+def default_socket_path() -> Path:
+    """Return the socket path shared by `serve` and the CLI."""
+    if os.environ.get(SOCKET_ENV):
+        return Path(os.environ[SOCKET_ENV])
+
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "sync-var.sock"
+    return Path(tempfile.gettempdir()) / f"sync-var-{os.getuid()}.sock"
+
+
+def request_server(
+    command: str,
+    config_path: Optional[str],
+    options: Optional[Dict[str, Any]] = None,
+    socket_path: Optional[Path] = None,
+) -> Optional[Response]:
+    """Send a command to a running server, or return None if none is running."""
+    if os.environ.get(NO_SERVER_ENV):
+        return None
+
+    path = socket_path or default_socket_path()
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    # Anyone can create a socket in a shared temporary directory; only a
+    # server of our own may see the config path and run commands for us
+    if not (
+        stat.S_ISSOCK(st.st_mode)
+        and st.st_uid == os.getuid()
+        and not st.st_mode & 0o077
+    ):
+        log.warning("Ignoring %s: not a private socket of this user.", path)
+        return None
+
+    # Only needed once a server socket exists.
+    import json
+    import socket
+
+    try:
+        resolved_config = find_config_file(Path(config_path) if config_path else None)
+    except (FileNotFoundError, ValueError):
+        # Let the local command report the error.
+        return None
+
+    request = {
+        "command": command,
+        "config_path": str(resolved_config.resolve()),
+        "options": options or {},
+        "color": sys.stdout.isatty(),
+        "width": shutil.get_terminal_size().columns,
+    }
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(0.5)
+            sock.connect(str(path))
+            sock.settimeout(None)
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as f:
+                response = json.loads(f.readline())
+    except (OSError, ValueError):
+        log.debug("No sync-var server available at %s.", path)
+        return None
+
+    return response
@@ -0,0 +1,133 @@
+import re
+from fnmatch import translate
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Pattern, Tuple
+
+# Used for files matching no profile
+DEFAULT_PREFIXES: Tuple[str, ...] = (
+    "#",
+    "//",
+    "///",
+    "////",
+    "--",
+    ";",
+    "'",
+    "%",
+    "::",
+    "REM",
+    "*",
+    "@",
+    "@@",
+    "!",
+    "<!--",
+)
+
+_SLASHES = ("//", "///", "////")
+
+# File name pattern -> comment prefixes legal in that language, keeping
+# those that files of the type commonly used before profiles existed
+BUILTIN_PROFILES: Dict[str, Tuple[str, ...]] = {
+    "*.env": ("#",),
+    "*.env.*": ("#",),
+    ".env": ("#",),
+    ".env.*": ("#",),
+    "*.yaml": ("#",),
+    "*.yml": ("#",),
+    "*.toml": ("#",),
+    "*.conf": ("#", ";"),
+    "*.cfg": ("#", ";"),
+    "*.ini": ("#", ";"),
+    "*.properties": ("#", "!"),
+    "*.sh": ("#",),
+    "*.py": ("#",),
+    "*.rb": ("#",),
+    "Dockerfile": ("#",),
+    "Makefile": ("#",),
+    "*.tf": ("#", *_SLASHES),
+    "*.js": _SLASHES,
+    "*.ts": _SLASHES,
+    "*.jsx": _SLASHES,
+    "*.tsx": _SLASHES,
+    "*.go": _SLASHES,
+    "*.java": _SLASHES,
+    "*.kt": _SLASHES,
+    "*.cs": _SLASHES,
+    "*.c": _SLASHES,
+    "*.h": _SLASHES,
+    "*.cpp": _SLASHES,
+    "*.rs": _SLASHES,
+    "*.swift": _SLASHES,
+    "*.php": ("#", *_SLASHES),
+    "*.sql": ("--", "#"),
+    "*.lua": ("--",),
+    "*.bat": ("::", "REM"),
+    "*.cmd": ("::", "REM"),
+    "*.vb": ("'", "REM"),
+    "*.tex": ("%",),
+    "*.html": ("<!--",),
+    "*.xml": ("<!--",),
+    "*.md": ("<!--", "#"),
+}
+
+# Line comment prefix -> (opener, closer) of the block comments of the same
+# languages
+BLOCK_COMMENTS: Dict[str, Tuple[str, str]] = {
+    "//": ("/*", "*/"),
+    "/*": ("/*", "*/"),
+    "<!--": ("<!--", "-->"),
+}
+
+
+@lru_cache(maxsize=None)
+def compile_prefixes(prefixes: Tuple[str, ...]) -> Pattern[str]:
+    """Compile prefixes into one regex matching a line's comment opener."""
+    # Longest first, so "///" is not taken for "//" followed by "/"
+    alternatives = sorted(set(prefixes), key=len, reverse=True)
+    return re.compile(r"\s*(?:%s)\s*" % "|".join(map(re.escape, alternatives)))
+
+
+def block_comments(prefixes: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+    """Return the block comment delimiters of the languages using prefixes.
+
+    Files matching no profile have none: in text of unknown syntax, a line
+    starting with "/*" or "<!--" is not taken to open a block.
+    """
+    if prefixes == DEFAULT_PREFIXES:
+        return ()
+    blocks = {BLOCK_COMMENTS[p] for p in prefixes if p in BLOCK_COMMENTS}
+    return tuple(sorted(blocks))
+
+
+class CommentProfiles:
+    """Comment prefixes by file name pattern.
+
+    Configured profiles are tried in order before the built-in ones; files
+    matching none use every known prefix.
+    """
+
+    def __init__(self, overrides: Optional[Dict[str, List[str]]] = None) -> None:
+        profiles = [
+            (glob, tuple(p.strip() for p in prefixes))
+            for glob, prefixes in (overrides or {}).items()
+        ]
+        profiles += list(BUILTIN_PROFILES.items())
+        self._profiles = [
+            (re.compile(translate(glob), re.IGNORECASE), prefixes)
+            for glob, prefixes in profiles
+        ]
+        self._by_name: Dict[str, Tuple[str, ...]] = {}
+
+    def prefixes_for(self, path: Path) -> Tuple[str, ...]:
+        name = path.name
+        prefixes = self._by_name.get(name)
+        if prefixes is None:
+            prefixes = next(
+                (p for pattern, p in self._profiles if pattern.match(name)),
+                DEFAULT_PREFIXES,
+            )
+            self._by_name[name] = prefixes
+        return prefixes
+
+
+DEFAULT_PROFILES = CommentProfiles()
@@ -1,11 +1,15 @@
 import re
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Optional, Set
-
-import yaml
+from typing import Any, Dict, List, Optional, Set
 
+from sync_var.comments import CommentProfiles
+from sync_var.providers import Provider
+from sync_var.sniff import DEFAULT_MAX_FILE_SIZE, sniff_target_file
+from sync_var.trace import trace_event
 from sync_var.utils import file_exists
+from sync_var.walk import expand_target_patterns, is_pattern
 
 DEFAULT_MARKER = "[sync-var]"
 DEFAULT_CONFIG_FILE = "sync-var.yaml"
@@ -30,21 +34,42 @@ class SaveOptions:
 
 @dataclass
 class Config:
-    _master_files: Dict[str, str]
+    # env -> master file path, or the settings of a provider
+    _master_files: Dict[str, Any]
     _target_files: Set[str]
     marker: str = DEFAULT_MARKER
     config_file: str = DEFAULT_CONFIG_FILE
     save_options: SaveOptions = field(default_factory=SaveOptions)
     verbose: bool = False
+    max_file_size: int = DEFAULT_MAX_FILE_SIZE
+    # file name pattern -> comment prefixes, tried before the built-in profiles
+    comment_prefixes: Dict[str, List[str]] = field(default_factory=dict)
+    # additional marker -> its own master_files and target_files
+    markers: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # target files matched by glob patterns, expanded on first use
+    _expansion: Optional["Future[Set[Path]]"] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    _comment_profiles: Optional[CommentProfiles] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    _marker_configs: Dict[str, "Config"] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
 
     def __post_init__(self) -> None:
         self.validate_config()
 
     def validate_config(self) -> None:
         self._validate_marker()
+        self._validate_max_file_size()
+        self._validate_comment_prefixes()
         self._validate_master_files()
         self._validate_target_files()
         self._files_exist()
+        self._validate_markers()
 
     def _validate_marker(self) -> None:
         if not self.marker:
@@ -59,6 +84,29 @@ class Config:
             )
         return None
 
+    def _validate_max_file_size(self) -> None:
+        if (
+            not isinstance(self.max_file_size, int)
+            or isinstance(self.max_file_size, bool)
+            or self.max_file_size <= 0
+        ):
+            raise ValueError("max_file_size must be a positive number of bytes.")
+
+    def _validate_comment_prefixes(self) -> None:
+        if not isinstance(self.comment_prefixes, dict):
+            raise ValueError("comment_prefixes must map file patterns to prefixes.")
+
+        for pattern, prefixes in self.comment_prefixes.items():
+            if (
+                not isinstance(prefixes, list)
+                or not prefixes
+                or not all(isinstance(p, str) and p.strip() for p in prefixes)
+            ):
+                raise ValueError(
+                    f"Comment prefixes for '{pattern}' must be a non-empty list "
+                    "of non-empty strings."
+                )
+
     def _validate_master_files(self) -> None:
         if not self._master_files:
             raise ValueError("At least one master file must be specified.")
@@ -66,7 +114,12 @@ class Config:
         for name, path in self._master_files.items():
             if not name:
                 raise ValueError("Master file names cannot be empty.")
-            if not path:
+            if isinstance(path, dict):
+                try:
+                    Provider.from_dict(path)
+                except (TypeError, ValueError) as e:
+                    raise ValueError(f"Provider for master file '{name}': {e}") from e
+            elif not path:
                 raise ValueError(f"Path for master file '{name}' cannot be empty.")
 
         if "default" not in self._master_files.keys():
@@ -90,7 +143,7 @@ class Config:
             except FileNotFoundError as e:
                 errors.append(f"Master file '{name}': {e}")
 
-        for path in self.target_files:
+        for path in sorted(self._explicit_target_files()):
             try:
                 file_exists(path)
             except FileNotFoundError as e:
@@ -99,6 +152,40 @@ class Config:
         if errors:
             raise ValueError("Configuration file errors:\n" + "\n".join(errors))
 
+    def _validate_markers(self) -> None:
+        if not isinstance(self.markers, dict):
+            raise ValueError("markers must map markers to master and target files.")
+
+        errors = []
+        self._marker_configs = {}
+        for marker, group in self.markers.items():
+            if marker == self.marker:
+                errors.append(f"Marker '{marker}' is already the config's marker.")
+                continue
+            if not isinstance(group, dict):
+                errors.append(
+                    f"Marker '{marker}' must have master_files and target_files."
+                )
+                continue
+
+            # Each marker is checked like a config of its own
+            try:
+                self._marker_configs[marker] = Config(
+                    _master_files=_master_files_from(group.get("master_files", {})),
+                    _target_files=_target_files_from(group.get("target_files", [])),
+                    marker=marker,
+                    config_file=self.config_file,
+                    save_options=self.save_options,
+                    verbose=self.verbose,
+                    max_file_size=self.max_file_size,
+                    comment_prefixes=self.comment_prefixes,
+                )
+            except ValueError as e:
+                errors.append(f"Marker '{marker}': {e}")
+
+        if errors:
+            raise ValueError("Marker errors:\n" + "\n".join(errors))
+
     @property
     def config_dir(self) -> Path:
         return Path(self.config_file).parent.resolve()
@@ -108,11 +195,95 @@ class Config:
         return {
             name.lower(): _resolve_path(path, self.config_dir)
             for name, path in self._master_files.items()
+            if not isinstance(path, dict)
         }
 
+    @property
+    def master_providers(self) -> Dict[str, Provider]:
+        """Environments whose values are fetched from a command or a URL."""
+        return {
+            name.lower(): Provider.from_dict(settings)
+            for name, settings in self._master_files.items()
+            if isinstance(settings, dict)
+        }
+
+    @property
+    def comment_profiles(self) -> CommentProfiles:
+        if self._comment_profiles is None:
+            self._comment_profiles = CommentProfiles(self.comment_prefixes)
+        return self._comment_profiles
+
+    @property
+    def marker_configs(self) -> Dict[str, "Config"]:
+        """Configs of the additional markers, by marker."""
+        return self._marker_configs
+
+    @property
+    def all_target_files(self) -> Set[Path]:
+        """Target files of every marker."""
+        target_files = self.target_files
+        for marker_config in self._marker_configs.values():
+            target_files |= marker_config.target_files
+        return target_files
+
+    @property
+    def target_patterns(self) -> Set[str]:
+        return {path for path in self._target_files if is_pattern(path)}
+
     @property
     def target_files(self) -> Set[Path]:
-        return {_resolve_path(path, self.config_dir) for path in self._target_files}
+        target_files = self._explicit_target_files()
+        if self.target_patterns:
+            self.start_target_expansion()
+            assert self._expansion is not None
+            target_files |= self._expansion.result()
+        return target_files
+
+    def start_target_expansion(self) -> None:
+        """Expand target patterns in a background thread."""
+        for marker_config in self._marker_configs.values():
+            marker_config.start_target_expansion()
+        if self._expansion is not None or not self.target_patterns:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        self._expansion = executor.submit(self._expand_target_patterns)
+        executor.shutdown(wait=False)
+
+    def refresh_target_files(self) -> None:
+        """Forget expanded patterns so new or removed files are picked up."""
+        for marker_config in self._marker_configs.values():
+            marker_config.refresh_target_files()
+        self._expansion = None
+
+    def _expand_target_patterns(self) -> Set[Path]:
+        # Pattern matches that are binary or too large are skipped, not errors
+        target_files: Set[Path] = set()
+        for path in expand_target_patterns(self.target_patterns, self.config_dir):
+            reason = sniff_target_file(path, self.max_file_size)
+            if reason is None:
+                target_files.add(path)
+            else:
+                trace_event("config", "skipped", file=str(path), reason=reason)
+        return target_files
+
+    def _explicit_target_files(self) -> Set[Path]:
+        return {
+            _resolve_path(path, self.config_dir)
+            for path in self._target_files
+            if not is_pattern(path)
+        }
+
+
+def _master_files_from(value: Any) -> Dict[str, Any]:
+    # Support shorthand: master_files: path/to/file.env → {"default": "path/to/file.env"}
+    if isinstance(value, str):
+        return {"default": value}
+    return value
+
+
+def _target_files_from(value: Any) -> Set[str]:
+    return set(value) if isinstance(value, list) else set()
 
 
 def _resolve_path(path: str | Path, base_dir: Path) -> Path:
@@ -130,7 +301,9 @@ def load_config(
     no_backup: bool = False,
     verbose: bool = False,
 ) -> Config:
-    file_path = _find_config_file(config_path)
+    import yaml
+
+    file_path = find_config_file(config_path)
 
     with open(file_path, "r", encoding="utf-8") as f:
         config_data = yaml.safe_load(f)
@@ -138,21 +311,20 @@ def load_config(
     if config_data is None:
         raise ValueError("Configuration file is empty.")
 
-    master_files = config_data.get("master_files", {})
-    # Support shorthand: master_files: path/to/file.env → {"default": "path/to/file.env"}
-    if isinstance(master_files, str):
-        master_files = {"default": master_files}
-
-    raw_target_files = config_data.get("target_files", [])
-    target_files = (
-        set(raw_target_files) if isinstance(raw_target_files, list) else set()
-    )
+    master_files = _master_files_from(config_data.get("master_files", {}))
+    target_files = _target_files_from(config_data.get("target_files", []))
     marker = config_data.get("marker", DEFAULT_MARKER)
+    max_file_size = config_data.get("max_file_size", DEFAULT_MAX_FILE_SIZE)
+    comment_prefixes = config_data.get("comment_prefixes") or {}
+    markers = config_data.get("markers") or {}
 
-    return Config(
+    config = Config(
         _master_files=master_files,
         _target_files=target_files,
         marker=marker,
+        max_file_size=max_file_size,
+        comment_prefixes=comment_prefixes,
+        markers=markers,
         config_file=str(file_path),
         save_options=SaveOptions(
             dry_run=dry_run,
@@ -161,9 +333,12 @@ def load_config(
         ),
         verbose=verbose,
     )
+    # Walk the tree for target patterns while the master files are parsed
+    config.start_target_expansion()
+    return config
 
 
-def _find_config_file(config_path: Optional[Path]) -> Path:
+def find_config_file(config_path: Optional[Path]) -> Path:
     file_path: Optional[Path] = None
 
     if config_path and config_path.exists():
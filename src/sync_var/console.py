@@ -0,0 +1,34 @@
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator, Optional
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+_console: Optional["Console"] = None
+_redirected: Optional["Console"] = None
+
+
+def get_console() -> "Console":
+    """Return the console used for user-facing output, creating it on first use."""
+    global _console
+
+    if _redirected is not None:
+        return _redirected
+    if _console is None:
+        from rich.console import Console
+
+        _console = Console(highlight=False)
+    return _console
+
+
+@contextmanager
+def redirect_console(console: "Console") -> Iterator["Console"]:
+    """Send user-facing output to another console, e.g. to capture it."""
+    global _redirected
+
+    previous = _redirected
+    _redirected = console
+    try:
+        yield console
+    finally:
+        _redirected = previous
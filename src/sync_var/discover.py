@@ -0,0 +1,176 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sync_var.config import CONFIG_FILE_SEARCH_PATHS, Config, SaveOptions, load_config
+from sync_var.fingerprint import is_unchanged, record_fingerprint
+from sync_var.index import load_index
+from sync_var.markers import MarkerGroup, load_marker_groups
+from sync_var.parallel import render_target_groups
+from sync_var.parse_cache import ParseCache
+from sync_var.parse_master_var import MasterVar
+from sync_var.parse_target_var import TargetFile, TargetLine
+from sync_var.providers import load_master_vars
+from sync_var.save import save_target_files
+from sync_var.walk import DirectoryWalker
+
+
+@dataclass
+class ConfigResult:
+    config_file: Path
+    logs: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    # skipped because no input changed since the last sync
+    unchanged: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def discover_config_files(root: Path) -> List[Path]:
+    """Find config files below root, keeping one per directory.
+
+    Within a directory, file names are preferred in the same order as the
+    default config search.
+    """
+    walker = DirectoryWalker()
+    by_dir: Dict[Path, Path] = {}
+    for name in reversed(CONFIG_FILE_SEARCH_PATHS):
+        for path in walker.expand(f"**/{name}", root.resolve()):
+            by_dir[path.parent] = path
+    return sorted(by_dir.values())
+
+
+def sync_discovered(
+    config_files: List[Path],
+    save_options: SaveOptions,
+    jobs: int = 1,
+    force: bool = False,
+) -> List[ConfigResult]:
+    """Sync many configs in one process, sharing parsed files and workers.
+
+    Master files are parsed once per (path, environment), configs with the
+    same master files share one variable table, and target files claimed by
+    several configs are merged into a single write. Configs rendering
+    different content for the same line all fail for that file.
+    """
+    results = [ConfigResult(config_file=path) for path in config_files]
+    in_place = not (save_options.dry_run or save_options.output_dir)
+
+    # Load every config first so all pattern expansions run in the background
+    configs: List[Tuple[ConfigResult, Config]] = []
+    for result in results:
+        try:
+            config = load_config(
+                result.config_file,
+                dry_run=save_options.dry_run,
+                output_dir=(
+                    str(save_options.output_dir) if save_options.output_dir else None
+                ),
+                no_backup=save_options.no_backup,
+            )
+        except Exception as e:
+            result.errors.append(str(e))
+            continue
+        configs.append((result, config))
+
+    cache = ParseCache()
+    tables: Dict[Tuple[Tuple[str, Path], ...], List[MasterVar]] = {}
+    active: List[Tuple[ConfigResult, Config, List[MarkerGroup]]] = []
+    for result, config in configs:
+        if in_place and not force and is_unchanged(config):
+            result.unchanged = True
+            continue
+
+        # Providers fetch the keys of each config's own targets
+        key = tuple(sorted(config.master_files.items()))
+        if config.master_providers:
+            key += (("", Path(config.config_file)),)
+        try:
+            if key not in tables:
+                tables[key] = load_master_vars(config, cache=cache)
+            groups = load_marker_groups(config, tables[key], cache=cache)
+        except Exception as e:
+            result.errors.append(str(e))
+            continue
+        active.append((result, config, groups))
+
+    rendered = render_target_groups(
+        [(groups, config.comment_profiles) for _, config, groups in active],
+        jobs,
+    )
+
+    claims: Dict[Path, List[Tuple[ConfigResult, TargetFile]]] = {}
+    for (result, _, _), (target_files, errors) in zip(active, rendered):
+        result.errors.extend(errors)
+        for target_file in target_files:
+            claims.setdefault(target_file.path, []).append((result, target_file))
+
+    for path, claimants in claims.items():
+        conflict = _find_conflict(claimants)
+        if conflict is not None:
+            for result, _ in claimants:
+                result.errors.append(f"{path}: {conflict}")
+
+    # Like a single sync, a config with any error writes nothing
+    merged: List[Tuple[TargetFile, List[ConfigResult]]] = []
+    for path, claimants in sorted(claims.items()):
+        owners = [(result, tf) for result, tf in claimants if result.ok]
+        if owners:
+            merged.append(
+                (_merge(path, [tf for _, tf in owners]), [r for r, _ in owners])
+            )
+
+    if save_options.dry_run:
+        save_target_files([target_file for target_file, _ in merged], save_options)
+    else:
+        for target_file, owners in merged:
+            logs = save_target_files([target_file], save_options)
+            for result in owners:
+                result.logs.extend(logs)
+
+    for (result, config, groups), (target_files, _) in zip(active, rendered):
+        if not result.ok or save_options.dry_run:
+            continue
+
+        index = load_index(config)
+        index.prune(config.all_target_files)
+        index.update_targets(target_files)
+        if in_place:
+            index.update_masters(groups[0][2])
+        index.save()
+
+        if in_place:
+            record_fingerprint(config)
+
+    return results
+
+
+def _find_conflict(
+    claimants: List[Tuple[ConfigResult, TargetFile]],
+) -> Optional[str]:
+    written: Dict[int, Tuple[ConfigResult, Optional[str]]] = {}
+    for result, target_file in claimants:
+        for target_line in target_file.target_lines:
+            line = target_line.target_line_number
+            content = target_line.replaced_target_line
+            if line not in written:
+                written[line] = (result, content)
+                continue
+
+            other, other_content = written[line]
+            if other is not result and other_content != content:
+                return (
+                    f"line {line} is written with different content by "
+                    f"{other.config_file} and {result.config_file}."
+                )
+    return None
+
+
+def _merge(path: Path, target_files: List[TargetFile]) -> TargetFile:
+    lines: Dict[int, TargetLine] = {}
+    for target_file in target_files:
+        for target_line in target_file.target_lines:
+            lines.setdefault(target_line.marker_line_number, target_line)
+    return TargetFile(path=path, target_lines=[lines[n] for n in sorted(lines)])
@@ -0,0 +1,135 @@
+import io
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from sync_var.comments import DEFAULT_PREFIXES
+from sync_var.config import Config, find_config_file, load_config
+from sync_var.markers import (
+    MarkerGroup,
+    load_marker_groups,
+    marker_tables,
+    restrict_groups,
+)
+from sync_var.parse_cache import ParseCache
+from sync_var.parse_master_var import MasterVar
+from sync_var.parse_target_var import parse_marker_groups
+from sync_var.plan import SyncPlan, apply_plan, build_plan
+from sync_var.providers import load_master_vars, provider_fetchers
+from sync_var.replace import Lookup, master_lookup, replace_with_lookups
+from sync_var.stream import StreamRenderer
+from sync_var.utils import MISSING_STAT, Stat, file_stat
+
+
+class Engine:
+    """A loaded config with its master variables, for use from Python.
+
+    Master and target files are parsed once and kept until they change on
+    disk; call reload_changed() to pick up changes. Nothing is printed and
+    errors are raised as ValueError, so a long-lived process can render any
+    number of files against warm state.
+    """
+
+    def __init__(self, config_path: Optional[Path] = None) -> None:
+        self.config_path = config_path
+        self.parse_cache = ParseCache()
+        self._config_stat: Stat = MISSING_STAT
+        self.config: Config
+        self.master_vars: List[MasterVar] = []
+        self.groups: List[MarkerGroup] = []
+        # Marker -> lookup of its master variables
+        self._lookups: Dict[str, Lookup] = {}
+        self.reload_changed()
+
+    def reload_changed(self) -> bool:
+        """Reload the config and master files changed since the last load.
+
+        Returns True if anything was reloaded. Target files are re-parsed
+        lazily, when they are planned after a change.
+        """
+        try:
+            config_file = find_config_file(self.config_path)
+        except FileNotFoundError as e:
+            raise ValueError(str(e)) from e
+        stat = file_stat(config_file)
+        reloaded = stat != self._config_stat
+        if reloaded:
+            self.config = load_config(config_file)
+            self._config_stat = stat
+        else:
+            self.config.validate_config()
+            self.config.refresh_target_files()
+            self.config.start_target_expansion()
+
+        misses = self.parse_cache.misses
+        master_vars = load_master_vars(self.config, cache=self.parse_cache)
+        groups = load_marker_groups(self.config, master_vars, cache=self.parse_cache)
+        # Provider values may change without any file changing
+        if (
+            reloaded
+            or self.parse_cache.misses != misses
+            or master_vars != self.master_vars
+        ):
+            self.master_vars = master_vars
+            self.groups = groups
+            self._lookups = {
+                marker: master_lookup(table)
+                for marker, table in marker_tables(groups).items()
+            }
+            reloaded = True
+        else:
+            # Target files may have been added or removed by patterns
+            self.groups = groups
+        return reloaded
+
+    def render_text(self, text: str, name: Optional[str] = None) -> str:
+        """Render the directives in text as if it were a target file.
+
+        name chooses the comment prefixes; without it every prefix is used.
+        """
+        prefixes = (
+            self.config.comment_profiles.prefixes_for(Path(name))
+            if name
+            else DEFAULT_PREFIXES
+        )
+        renderer = StreamRenderer(
+            marker_tables(self.groups),
+            prefixes,
+            name or "<text>",
+            lookups=self._lookups,
+            fetchers=provider_fetchers(self.config),
+        )
+        # Split on line endings only, as files are read
+        lines = io.StringIO(text, newline="").readlines()
+        return "".join(renderer.render(lines))
+
+    def plan(self, paths: Optional[Iterable[Union[str, Path]]] = None) -> SyncPlan:
+        """Return the edits a sync would make to paths, or to every target.
+
+        Relative paths are taken from the config file's directory.
+        """
+        targets = self.config.all_target_files
+        if paths is not None:
+            selected = {(self.config.config_dir / p).resolve() for p in paths}
+            unknown = sorted(str(p) for p in selected - targets)
+            if unknown:
+                raise ValueError(f"Not target files: {', '.join(unknown)}")
+            targets = selected
+
+        target_files = parse_marker_groups(
+            restrict_groups(self.groups, targets),
+            cache=self.parse_cache,
+            comment_profiles=self.config.comment_profiles,
+        )
+        replace_with_lookups(
+            target_files, self._lookups[self.config.marker], self._lookups
+        )
+        return build_plan(target_files, self.config.config_dir)
+
+    def apply(self, plan: SyncPlan, create_backup: bool = True) -> List[Path]:
+        """Apply a plan and return the files written.
+
+        Raises ValueError without writing anything if a file changed since
+        the plan was made.
+        """
+        apply_plan(plan, create_backup=create_backup)
+        return [plan.root / file_plan.path for file_plan in plan.files]
@@ -1,9 +1,7 @@
 import sys
 from functools import wraps
 
-from rich.console import Console
-
-console = Console(highlight=False)
+from sync_var.console import get_console
 
 
 def error_handle(func):
@@ -14,7 +12,7 @@ def error_handle(func):
         except KeyboardInterrupt:
             sys.exit(130)
         except Exception as e:
-            console.print(f"[bold red]Error:[/bold red] {str(e)}")
+            get_console().print(f"[bold red]Error:[/bold red] {str(e)}")
             sys.exit(1)
 
     return wrapper
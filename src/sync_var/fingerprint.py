@@ -0,0 +1,107 @@
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sync_var.cache import cache_path, load_json, save_json
+from sync_var.config import Config
+from sync_var.metrics import metrics
+from sync_var.utils import MISSING_STAT, file_stat
+
+FINGERPRINT_VERSION = 1
+
+# path -> (size, mtime_ns, sha256)
+FileEntry = Tuple[int, int, str]
+
+
+def is_unchanged(config: Config) -> bool:
+    """Return True if no input changed since the last recorded in-place sync.
+
+    Files whose size and mtime match are trusted without reading them; only
+    files with a different mtime but the same size are hashed.
+    """
+    # Provider values can change without any file changing
+    if any(
+        group.master_providers for group in [config, *config.marker_configs.values()]
+    ):
+        return False
+
+    data = load_json(cache_path(config.config_file, "fingerprint"))
+    if data is None or data.get("key") != _run_key(config):
+        return False
+
+    recorded = _load_entries(data)
+    if recorded is None or set(recorded) != _input_files(config):
+        return False
+
+    for path, (size, mtime_ns, digest) in recorded.items():
+        stat = file_stat(path)
+        if stat == MISSING_STAT or stat[0] != size:
+            return False
+        if stat[1] != mtime_ns and _hash(path) != digest:
+            return False
+
+    metrics.inc("files_skipped_unchanged", len(config.all_target_files))
+    return True
+
+
+def record_fingerprint(config: Config) -> None:
+    """Record the inputs of a successful sync."""
+    path = cache_path(config.config_file, "fingerprint")
+    previous = _load_entries(load_json(path) or {}) or {}
+
+    entries: Dict[str, FileEntry] = {}
+    for file in sorted(_input_files(config)):
+        stat = file_stat(file)
+        if stat == MISSING_STAT:
+            return
+
+        # Reuse the previous hash of files that were not touched since then
+        cached = previous.get(file)
+        if cached is not None and cached[:2] == stat:
+            entries[file] = cached
+        else:
+            entries[file] = (stat[0], stat[1], _hash(file))
+
+    save_json(
+        path,
+        {
+            "key": _run_key(config),
+            "files": {file: list(entry) for file, entry in entries.items()},
+        },
+    )
+
+
+def _run_key(config: Config) -> Dict[str, Any]:
+    from sync_var import __version__
+
+    return {
+        "version": FINGERPRINT_VERSION,
+        "tool_version": __version__,
+        "marker": config.marker,
+    }
+
+
+def _input_files(config: Config) -> Set[str]:
+    files = {str(Path(config.config_file).resolve())}
+    for group in [config, *config.marker_configs.values()]:
+        files.update(str(path) for path in group.master_files.values())
+    files.update(str(path) for path in config.all_target_files)
+    return files
+
+
+def _load_entries(data: Dict[str, Any]) -> Optional[Dict[str, FileEntry]]:
+    try:
+        return {
+            str(file): (int(size), int(mtime_ns), str(digest))
+            for file, (size, mtime_ns, digest) in data["files"].items()
+        }
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+
+
+def _hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,189 @@
+import hashlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sync_var import __version__
+from sync_var.cache import cache_path, load_json, save_json
+from sync_var.config import Config
+from sync_var.parse_master_var import MasterVar
+from sync_var.parse_target_var import TargetFile
+from sync_var.utils import file_stat
+
+INDEX_VERSION = 2
+
+# (env, KEY) as stored in the master variables
+VarId = Tuple[str, str]
+
+
+@dataclass
+class DependencyIndex:
+    """Reverse index from master variables to the target lines using them."""
+
+    path: Path
+    marker: str
+    # target file -> ((size, mtime_ns), [(env, KEY, marker line number)])
+    files: Dict[str, Tuple[Tuple[int, int], List[Tuple[str, str, int]]]] = field(
+        default_factory=dict
+    )
+    # "env.KEY" -> digest of the value used by the last in-place sync
+    masters: Dict[str, str] = field(default_factory=dict)
+    # configured comment prefixes change which lines are directives
+    comment_prefixes: Dict[str, List[str]] = field(default_factory=dict)
+
+    @property
+    def refs(self) -> Dict[VarId, List[Tuple[Path, int]]]:
+        refs: Dict[VarId, List[Tuple[Path, int]]] = {}
+        for file, (_, entries) in self.files.items():
+            for env, key, line_number in entries:
+                refs.setdefault((env, key), []).append((Path(file), line_number))
+        return refs
+
+    def update_targets(self, target_files: List[TargetFile]) -> None:
+        """Record the directives of parsed target files and their current stats."""
+        for target_file in target_files:
+            entries = []
+            for target_line in target_file.target_lines:
+                for env, key in target_line.target_vars:
+                    entries.append(
+                        (env.lower(), key.upper(), target_line.marker_line_number)
+                    )
+            self.files[str(target_file.path)] = (file_stat(target_file.path), entries)
+
+    def update_masters(
+        self, master_vars: List[MasterVar], keys: Optional[Iterable[VarId]] = None
+    ) -> None:
+        """Record the master values synced, only those of keys if given."""
+        current = {f"{mv.env}.{mv.key}": _digest(mv.value) for mv in master_vars}
+        if keys is None:
+            self.masters = current
+            return
+
+        for env, key in keys:
+            name = f"{env}.{key}"
+            if name in current:
+                self.masters[name] = current[name]
+            else:
+                self.masters.pop(name, None)
+
+    def prune(self, target_files: Set[Path]) -> None:
+        """Drop target files that are no longer configured."""
+        configured = {str(path) for path in target_files}
+        for file in list(self.files):
+            if file not in configured:
+                del self.files[file]
+
+    def changed_master_keys(self, master_vars: List[MasterVar]) -> Set[VarId]:
+        """Return variables added, removed or modified since the last sync."""
+        current = {f"{mv.env}.{mv.key}": _digest(mv.value) for mv in master_vars}
+        changed = {
+            name
+            for name in current.keys() | self.masters.keys()
+            if current.get(name) != self.masters.get(name)
+        }
+        return {_split_name(name) for name in changed}
+
+    def affected_targets(
+        self, keys: Iterable[VarId], target_files: Set[Path]
+    ) -> Set[Path]:
+        """Return configured targets referencing keys, plus unindexed or stale ones."""
+        wanted = set(keys)
+        affected: Set[Path] = set()
+
+        for path in target_files:
+            if not self.is_current(path):
+                affected.add(path)
+                continue
+
+            if any((env, key) in wanted for env, key, _ in self.files[str(path)][1]):
+                affected.add(path)
+
+        return affected
+
+    def is_current(self, path: Path) -> bool:
+        """Return True if the file is indexed and unchanged since."""
+        indexed = self.files.get(str(path))
+        return indexed is not None and indexed[0] == file_stat(path)
+
+    def save(self) -> None:
+        save_json(
+            self.path,
+            {
+                "version": INDEX_VERSION,
+                "tool_version": __version__,
+                "marker": self.marker,
+                "comment_prefixes": self.comment_prefixes,
+                "files": {
+                    file: {"stat": list(stat), "refs": [list(e) for e in entries]}
+                    for file, (stat, entries) in self.files.items()
+                },
+                "masters": self.masters,
+            },
+        )
+
+
+def load_index(config: Config) -> DependencyIndex:
+    """Load the index stored next to the config file, or return an empty one."""
+    path = cache_path(config.config_file, "index")
+    index = DependencyIndex(
+        path=path, marker=config.marker, comment_prefixes=config.comment_prefixes
+    )
+
+    data = load_json(path)
+    if (
+        data is None
+        or data.get("version") != INDEX_VERSION
+        or data.get("tool_version") != __version__
+        or data.get("marker") != config.marker
+        or data.get("comment_prefixes", {}) != config.comment_prefixes
+    ):
+        return index
+
+    try:
+        for file, entry in data.get("files", {}).items():
+            size, mtime_ns = entry["stat"]
+            refs = [(str(env), str(key), int(line)) for env, key, line in entry["refs"]]
+            index.files[file] = ((int(size), int(mtime_ns)), refs)
+        index.masters = {str(k): str(v) for k, v in data.get("masters", {}).items()}
+    except (KeyError, TypeError, ValueError):
+        return DependencyIndex(
+            path=path, marker=config.marker, comment_prefixes=config.comment_prefixes
+        )
+
+    return index
+
+
+def parse_keys(keys: str, master_vars: List[MasterVar]) -> Set[VarId]:
+    """Parse a comma-separated list like ``API_KEY,prod.DB_HOST``."""
+    known = {(mv.env, mv.key) for mv in master_vars}
+
+    result: Set[VarId] = set()
+    errors = []
+    for item in keys.split(","):
+        item = item.strip()
+        if not item:
+            continue
+
+        env, key = _split_name(item) if "." in item else ("default", item)
+        var_id = (env.strip().lower(), key.strip().upper())
+        if var_id not in known:
+            errors.append(f"Variable '{item}' not found in any master variable files.")
+            continue
+        result.add(var_id)
+
+    if errors:
+        raise ValueError("\n".join(errors))
+
+    if not result:
+        raise ValueError("At least one key must be specified.")
+
+    return result
+
+
+def _split_name(name: str) -> VarId:
+    env, key = name.split(".", 1)
+    return env, key
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
@@ -1,18 +1,23 @@
 import logging
 
-from rich.logging import RichHandler
-
 FORMAT = "%(message)s"
 
-_handler = RichHandler(rich_tracebacks=True)
-_handler.setFormatter(logging.Formatter(FORMAT, datefmt="[%X]"))
-
 log = logging.getLogger("sync_var")
-log.addHandler(_handler)
 log.setLevel(logging.WARNING)
 
+_handler: logging.Handler | None = None
+
 
 def setup_logging(verbose: bool = False) -> None:
+    global _handler
+
+    if _handler is None:
+        from rich.logging import RichHandler
+
+        _handler = RichHandler(rich_tracebacks=True)
+        _handler.setFormatter(logging.Formatter(FORMAT, datefmt="[%X]"))
+        log.addHandler(_handler)
+
     if verbose:
         log.setLevel(logging.DEBUG)
     else:
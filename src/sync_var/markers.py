@@ -0,0 +1,61 @@
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from sync_var.parse_master_var import MasterVar
+
+if TYPE_CHECKING:
+    from sync_var.config import Config
+    from sync_var.parse_cache import ParseCache
+
+# (marker, target files, master variables); directives of each marker are
+# validated and rendered against that marker's own master files
+MarkerGroup = Tuple[str, Set[Path], List[MasterVar]]
+
+
+def load_marker_groups(
+    config: "Config",
+    master_vars: List[MasterVar],
+    cache: Optional["ParseCache"] = None,
+) -> List[MarkerGroup]:
+    """Return one group per marker of the config, the config's own first.
+
+    Master files of the additional markers are parsed here, each file once,
+    and their providers asked for the keys their targets use.
+    """
+    from sync_var.providers import load_master_vars
+
+    if cache is None:
+        from sync_var.parse_cache import ParseCache
+
+        cache = ParseCache()
+
+    groups: List[MarkerGroup] = [(config.marker, config.target_files, master_vars)]
+    for marker, marker_config in config.marker_configs.items():
+        groups.append(
+            (
+                marker,
+                marker_config.target_files,
+                load_master_vars(marker_config, cache=cache),
+            )
+        )
+    return groups
+
+
+def restrict_groups(
+    groups: List[MarkerGroup], target_files: Set[Path]
+) -> List[MarkerGroup]:
+    """Keep only the given target files in every group."""
+    return [(m, files & target_files, table) for m, files, table in groups]
+
+
+def marker_tables(groups: List[MarkerGroup]) -> Dict[str, List[MasterVar]]:
+    return {marker: master_vars for marker, _, master_vars in groups}
+
+
+def markers_by_path(groups: List[MarkerGroup]) -> Dict[Path, Tuple[str, ...]]:
+    """Return the markers to search for in each target file, in group order."""
+    markers: Dict[Path, Tuple[str, ...]] = {}
+    for marker, target_files, _ in groups:
+        for path in target_files:
+            markers[path] = markers.get(path, ()) + (marker,)
+    return markers
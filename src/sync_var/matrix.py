@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace as replace_field
+from pathlib import Path
+from typing import Dict, List
+
+from sync_var.markers import MarkerGroup, marker_tables
+from sync_var.metrics import metrics
+from sync_var.parse_master_var import MasterVar
+from sync_var.parse_target_var import TargetFile
+from sync_var.profiling import get_profiler
+from sync_var.replace import replace
+from sync_var.save import _apply_target_lines, output_path_for
+
+
+def parse_matrix(value: str) -> List[str]:
+    """Split a comma-separated list of environments, keeping their order."""
+    envs: List[str] = []
+    for env in value.split(","):
+        env = env.strip().lower()
+        if env and env not in envs:
+            envs.append(env)
+    if not envs:
+        raise ValueError("Expected a comma-separated list of environments.")
+    return envs
+
+
+def override_default(master_vars: List[MasterVar], env: str) -> List[MasterVar]:
+    """Return master_vars with `default` keys taking the values of env.
+
+    Keys env does not define keep their default value, and placeholders
+    naming an environment explicitly are unaffected.
+    """
+    values = {mv.key: mv.value for mv in master_vars if mv.env == env}
+    return [
+        replace_field(mv, value=values[mv.key])
+        if mv.env == "default" and mv.key in values
+        else mv
+        for mv in master_vars
+    ]
+
+
+def render_matrix(
+    target_files: List[TargetFile],
+    groups: List[MarkerGroup],
+    envs: List[str],
+    output_dir: Path,
+) -> List[str]:
+    """Render the parsed target files once per environment.
+
+    Each variant is written below output_dir/<env>. Target files are read
+    once; rendering stays on this thread while a pool writes the files of
+    earlier variants.
+    """
+    known = {mv.env for _, _, table in groups for mv in table}
+    unknown = [env for env in envs if env not in known]
+    if unknown:
+        raise ValueError(
+            f"Unknown environments in --matrix: {', '.join(unknown)}. "
+            f"Known: {', '.join(sorted(known))}."
+        )
+
+    sources: Dict[Path, List[str]] = {}
+    for target_file in target_files:
+        with open(target_file.path, "r", encoding="utf-8") as f:
+            sources[target_file.path] = f.readlines()
+
+    master_vars = groups[0][2]
+    tables = marker_tables(groups)
+    profiler = get_profiler()
+    logs: List[str] = []
+    with ThreadPoolExecutor() as pool:
+        writes = []
+        for env in envs:
+            env_dir = output_dir / env
+            env_dir.mkdir(parents=True, exist_ok=True)
+            with profiler.stage(f"render:{env}"):
+                replace(
+                    target_files,
+                    override_default(master_vars, env),
+                    {m: override_default(t, env) for m, t in tables.items()},
+                )
+                for target_file in target_files:
+                    content = _apply_target_lines(
+                        list(sources[target_file.path]), target_file
+                    )
+                    # Counted here, since counters are not thread-safe
+                    metrics.inc("bytes_written", len(content.encode("utf-8")))
+                    writes.append(
+                        pool.submit(
+                            output_path_for(env_dir, target_file.path).write_text,
+                            content,
+                            encoding="utf-8",
+                        )
+                    )
+            logs.append(f"  Saved {len(target_files)} files to [cyan]{env_dir}[/cyan]")
+
+        for write in writes:
+            write.result()
+
+    return logs
@@ -0,0 +1,77 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+PREFIX = "sync_var"
+
+# Counter name -> help text
+COUNTERS: Dict[str, str] = {
+    "lines_scanned": "Target file lines scanned for markers.",
+    "bytes_read": "Bytes read from target files.",
+    "bytes_written": "Bytes written to target and output files.",
+    "markers_found": "Marker lines found in target files.",
+    "directives_rendered": "Directives rendered with master values.",
+    "files_skipped_unchanged": "Target files skipped because nothing changed.",
+    "cache_hits": "Parse cache hits.",
+    "cache_misses": "Parse cache misses.",
+    "backup_bytes": "Bytes written to backup files.",
+    "provider_fetches": "Values requested from master providers.",
+    "provider_cache_hits": "Provider values taken from the on-disk cache.",
+}
+
+
+class Metrics:
+    """Process-wide counters, kept for the lifetime of the process.
+
+    Counting is a dict update per file, so counters are always on; only
+    writing them out is optional.
+    """
+
+    def __init__(self) -> None:
+        self.values: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+
+    def inc(self, name: str, amount: int = 1) -> None:
+        self.values[name] += amount
+
+    def reset(self) -> None:
+        self.values = dict.fromkeys(COUNTERS, 0)
+
+    def since(self, snapshot: Dict[str, int]) -> Dict[str, int]:
+        """Return how much each counter grew since a copy of the values."""
+        return {
+            name: value - snapshot[name]
+            for name, value in self.values.items()
+            if value != snapshot[name]
+        }
+
+    def merge(self, counts: Dict[str, int]) -> None:
+        """Add counts taken in another process."""
+        for name, amount in counts.items():
+            self.values[name] += amount
+
+    def to_text(self) -> str:
+        """Format the counters in the Prometheus text exposition format."""
+        lines = []
+        for name, help_text in COUNTERS.items():
+            metric = f"{PREFIX}_{name}_total"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {self.values[name]}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path) -> None:
+        """Replace the metrics file atomically, so collectors never see half of it."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.to_text())
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+metrics = Metrics()
@@ -0,0 +1,242 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from sync_var.comments import DEFAULT_PROFILES, CommentProfiles
+from sync_var.markers import MarkerGroup, markers_by_path
+from sync_var.metrics import metrics
+from sync_var.parse_master_var import MasterVar
+from sync_var.parse_target_var import (
+    TargetFile,
+    TargetLine,
+    _parse_target_file,
+    _validate_by_marker,
+)
+from sync_var.replace import Lookup, master_lookup, replace_lines
+
+# (marker, marker_line_number, raw_marker_line, raw_target_line,
+#  replaced_target_line, target_offset, target_line_count, fixed_line_count)
+LineDelta = Tuple[str, int, str, str, Optional[str], int, int, bool]
+
+# (marker groups of one config, comment profiles); marker groups sharing the
+# same master variable list object are rendered against one table
+RenderGroup = Tuple[List[MarkerGroup], Optional[CommentProfiles]]
+
+# (path, markers, table of each marker, comment prefixes)
+RenderTask = Tuple[Path, Tuple[str, ...], Tuple[int, ...], Tuple[str, ...]]
+
+# (parsed target files, errors) of one render group
+GroupResult = Tuple[List[TargetFile], List[str]]
+
+# (directive lines, error, counters incremented while rendering) of one file
+FileResult = Tuple[List[LineDelta], Optional[str], Dict[str, int]]
+
+# Lookups of the master variable tables, built once per worker process from
+# the tables sent through the pool initializer instead of once per task
+_shared_lookups: List[Lookup] = []
+
+
+def resolve_jobs(jobs: int) -> int:
+    """Return the number of worker processes, 0 meaning one per CPU."""
+    if jobs < 0:
+        raise ValueError("Number of jobs cannot be negative.")
+    if jobs == 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def render_target_files(
+    target_files: Set[Path],
+    marker: str,
+    master_vars: List[MasterVar],
+    jobs: int,
+    comment_profiles: Optional[CommentProfiles] = None,
+) -> List[TargetFile]:
+    """Parse, validate and replace target files in a process pool."""
+    return render_marker_groups(
+        [(marker, target_files, master_vars)], jobs, comment_profiles
+    )
+
+
+def render_marker_groups(
+    groups: List[MarkerGroup],
+    jobs: int,
+    comment_profiles: Optional[CommentProfiles] = None,
+) -> List[TargetFile]:
+    """Render the target files of several markers, scanning each file once."""
+    [(target_file_objs, errors)] = render_target_groups(
+        [(groups, comment_profiles)], jobs
+    )
+
+    if errors:
+        raise ValueError("Errors while parsing target files:\n" + "\n".join(errors))
+
+    return target_file_objs
+
+
+def render_target_groups(groups: List[RenderGroup], jobs: int) -> List[GroupResult]:
+    """Render several groups of target files through one shared pool.
+
+    Groups passing the same master variable list object share its table, and
+    a (path, markers, tables) combination requested by several groups is only
+    rendered once.
+    """
+    tables: List[List[MasterVar]] = []
+    table_ids: Dict[int, int] = {}
+    group_tasks: List[List[RenderTask]] = []
+    for marker_groups, comment_profiles in groups:
+        for _, _, master_vars in marker_groups:
+            if id(master_vars) not in table_ids:
+                table_ids[id(master_vars)] = len(tables)
+                tables.append(master_vars)
+        table_of = {marker: table_ids[id(mv)] for marker, _, mv in marker_groups}
+        profiles = comment_profiles or DEFAULT_PROFILES
+        group_tasks.append(
+            [
+                (
+                    path,
+                    markers,
+                    tuple(table_of[marker] for marker in markers),
+                    profiles.prefixes_for(path),
+                )
+                for path, markers in sorted(markers_by_path(marker_groups).items())
+            ]
+        )
+
+    # insertion-ordered set of tasks
+    tasks: Dict[RenderTask, None] = dict.fromkeys(
+        task for render_tasks in group_tasks for task in render_tasks
+    )
+
+    keys = list(tasks)
+    workers = min(resolve_jobs(jobs), len(keys)) or 1
+
+    if workers == 1:
+        _init_worker(tables)
+        try:
+            results = [_render_file(*key) for key in keys]
+        finally:
+            _init_worker([])
+    else:
+        results = _render_in_pool(keys, tables, workers)
+        # Workers count into their own copy of the counters
+        for _, _, counts in results:
+            metrics.merge(counts)
+
+    rendered = dict(zip(keys, results))
+    group_results: List[GroupResult] = []
+    for render_tasks in group_tasks:
+        target_file_objs: List[TargetFile] = []
+        errors = []
+        for key in render_tasks:
+            path = key[0]
+            deltas, error, _ = rendered[key]
+            if error is not None:
+                errors.append(error)
+                continue
+
+            target_file_objs.append(
+                TargetFile(
+                    path=path,
+                    target_lines=[_line_from_delta(path, d) for d in deltas],
+                )
+            )
+        group_results.append((target_file_objs, errors))
+
+    return group_results
+
+
+def _render_in_pool(
+    keys: List[RenderTask],
+    tables: List[List[MasterVar]],
+    workers: int,
+) -> List[FileResult]:
+    # Forking this process could copy a lock held by the spinner or target
+    # expansion threads; a fork server is a fresh process with the package
+    # already imported
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+    else:
+        context = multiprocessing.get_context()
+
+    # Large chunks keep the per-task IPC overhead low on big target sets.
+    chunksize = max(1, len(keys) // (workers * 4))
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(tables,),
+    ) as executor:
+        return list(executor.map(_render_file, *zip(*keys), chunksize=chunksize))
+
+
+def _init_worker(tables: List[List[MasterVar]]) -> None:
+    global _shared_lookups
+    _shared_lookups = [master_lookup(table) for table in tables]
+
+
+def _render_file(
+    path: Path,
+    markers: Tuple[str, ...],
+    tables: Tuple[int, ...],
+    prefixes: Tuple[str, ...],
+) -> FileResult:
+    # Runs in a worker process; only the directive lines are sent back.
+    snapshot = dict(metrics.values)
+    lookups = {marker: _shared_lookups[table] for marker, table in zip(markers, tables)}
+    try:
+        target_lines = _parse_target_file(path, markers, prefixes)
+        _validate_by_marker(target_lines, markers, lookups)
+    except ValueError as e:
+        return [], f"{path}: {e}", metrics.since(snapshot)
+
+    target_file = TargetFile(path=path, target_lines=target_lines)
+    try:
+        replace_lines(target_file, lookups[markers[0]], lookups)
+    except ValueError as e:
+        # A range rendering the wrong number of lines; the message names
+        # the file already
+        return [], str(e), metrics.since(snapshot)
+
+    deltas = [
+        (
+            tl._marker,
+            tl.marker_line_number,
+            tl.raw_marker_line,
+            tl.raw_target_line,
+            tl.replaced_target_line,
+            tl.target_offset,
+            tl.target_line_count,
+            tl.fixed_line_count,
+        )
+        for tl in target_lines
+    ]
+    return deltas, None, metrics.since(snapshot)
+
+
+def _line_from_delta(path: Path, delta: LineDelta) -> TargetLine:
+    (
+        marker,
+        marker_line_number,
+        raw_marker_line,
+        raw_target_line,
+        replaced,
+        offset,
+        count,
+        fixed,
+    ) = delta
+    return TargetLine(
+        _marker=marker,
+        source_file=path,
+        marker_line_number=marker_line_number,
+        raw_marker_line=raw_marker_line,
+        raw_target_line=raw_target_line,
+        replaced_target_line=replaced,
+        target_offset=offset,
+        target_line_count=count,
+        fixed_line_count=fixed,
+    )
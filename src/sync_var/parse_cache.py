@@ -0,0 +1,61 @@
+import dataclasses
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from sync_var.metrics import metrics
+from sync_var.parse_master_var import MasterVar, _parse_master_file
+from sync_var.parse_target_var import TargetLine, _parse_target_file
+from sync_var.utils import Stat, file_exists, file_stat
+
+# (path, markers, comment prefixes)
+TargetKey = Tuple[Path, Union[str, Tuple[str, ...]], Optional[Tuple[str, ...]]]
+
+
+class ParseCache:
+    """Parsed master and target files, invalidated when size or mtime change."""
+
+    def __init__(self) -> None:
+        self._masters: Dict[Tuple[Path, str], Tuple[Stat, List[MasterVar]]] = {}
+        self._targets: Dict[TargetKey, Tuple[Stat, List[TargetLine]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def master_file(self, path: Path, env: str) -> List[MasterVar]:
+        stat = file_stat(path)
+        cached = self._masters.get((path, env))
+        if cached is not None and cached[0] == stat:
+            self.hits += 1
+            metrics.inc("cache_hits")
+            return cached[1]
+
+        self.misses += 1
+        metrics.inc("cache_misses")
+        file_exists(path)
+        master_vars = _parse_master_file(path, env)
+        self._masters[(path, env)] = (stat, master_vars)
+        return master_vars
+
+    def target_file(
+        self,
+        path: Path,
+        marker: Union[str, Tuple[str, ...]],
+        prefixes: Optional[Tuple[str, ...]] = None,
+    ) -> List[TargetLine]:
+        stat = file_stat(path)
+        key = (path, marker, prefixes)
+        cached = self._targets.get(key)
+        if cached is not None and cached[0] == stat:
+            self.hits += 1
+            metrics.inc("cache_hits")
+        else:
+            self.misses += 1
+            metrics.inc("cache_misses")
+            cached = (stat, _parse_target_file(path, marker, prefixes))
+            self._targets[key] = cached
+
+        # Replacing mutates target lines, so hand out fresh copies.
+        return [dataclasses.replace(tl) for tl in cached[1]]
+
+    def clear(self) -> None:
+        self._masters.clear()
+        self._targets.clear()
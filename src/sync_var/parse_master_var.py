@@ -1,10 +1,10 @@
 import re
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-import yaml
-from dotenv import dotenv_values
+if TYPE_CHECKING:
+    from sync_var.parse_cache import ParseCache
 
 
 @dataclass
@@ -35,13 +35,16 @@ class MasterVar:
         return self._key.upper()
 
 
-def parse_master_vars(master_files: Dict[str, Path]) -> List[MasterVar]:
+def parse_master_vars(
+    master_files: Dict[str, Path], cache: Optional["ParseCache"] = None
+) -> List[MasterVar]:
     master_vars: List[MasterVar] = []
+    parse_file = cache.master_file if cache else _parse_master_file
 
     errors = []
     for env, path in master_files.items():
         try:
-            vars_in_file = _parse_master_file(path, env)
+            vars_in_file = parse_file(path, env)
         except ValueError as e:
             errors.append(f"{path}: {e}")
             continue
@@ -66,6 +69,8 @@ def _parse_master_file(path: Path, env: str) -> List[MasterVar]:
 
 
 def _parse_master_env_file(path: Path, env: str) -> List[MasterVar]:
+    from dotenv import dotenv_values
+
     master_vars: List[MasterVar] = []
 
     errors = []
@@ -95,6 +100,8 @@ def _parse_master_env_file(path: Path, env: str) -> List[MasterVar]:
 
 
 def _parse_master_yaml_file(path: Path, env: str) -> List[MasterVar]:
+    import yaml
+
     master_vars: List[MasterVar] = []
 
     with path.open("r", encoding="utf-8") as f:
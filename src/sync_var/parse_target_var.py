@@ -1,28 +1,37 @@
 import re
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Set, Tuple
-
+from typing import (
+    TYPE_CHECKING,
+    Container,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+    Union,
+)
+
+from sync_var.comments import (
+    DEFAULT_PREFIXES,
+    DEFAULT_PROFILES,
+    CommentProfiles,
+    block_comments,
+    compile_prefixes,
+)
+from sync_var.markers import MarkerGroup, marker_tables, markers_by_path
+from sync_var.metrics import metrics
 from sync_var.parse_master_var import MasterVar
+from sync_var.profiling import get_profiler
+from sync_var.trace import is_tracing, trace_event
+
+if TYPE_CHECKING:
+    from sync_var.parse_cache import ParseCache
 
-COMMENT_PREFIX = [
-    "#",
-    "//",
-    "///",
-    "////",
-    "--",
-    ";",
-    "'",
-    "%",
-    "::",
-    "REM",
-    "*",
-    "%",
-    "@",
-    "@@",
-    "!",
-    "<!--",
-]
+COMMENT_PREFIX = list(DEFAULT_PREFIXES)
 
 
 @dataclass
@@ -31,17 +40,27 @@ class TargetLine:
     source_file: Path
     marker_line_number: int
     raw_marker_line: str
+    # Governed lines joined with "\n"
     raw_target_line: str
     replaced_target_line: Optional[str]
+    # Directives in comment blocks govern the line after the block
+    target_offset: int = 1
+    # Range directives govern several lines, or none for an empty region
+    target_line_count: int = 1
+    # A range of N lines must render exactly N lines, or it would grow or
+    # shrink with every sync
+    fixed_line_count: bool = False
 
     @property
     def target_line_number(self) -> int:
-        return self.marker_line_number + 1
+        return self.marker_line_number + self.target_offset
 
     @property
     def replace_template(self) -> str:
-        content = strip_comment_simbols(self.raw_marker_line)
-        marker_removed = strip_marker(content, self._marker)
+        # A marker line is a comment prefix followed by the marker, so the
+        # template starts after the marker's first occurrence
+        start = self.raw_marker_line.find(self._marker)
+        marker_removed = self.raw_marker_line[start + len(self._marker) :].strip()
 
         # Expecting the value to be enclosed in double quotes
         pattern = re.compile(r'^"((?:[^"\\]|\\.)*)"')
@@ -78,8 +97,20 @@ class TargetLine:
 
     @property
     def target_line_indent(self) -> str:
-        match = re.match(r"^(\s*)", self.raw_target_line)
-        return match.group(1) if match else ""
+        # An empty region takes the indentation of its marker line
+        line = self.raw_target_line if self.target_line_count else self.raw_marker_line
+        # Only the first line counts; "\s" would run on past a blank one
+        match = re.match(r"[ \t]*", line)
+        return match.group(0) if match else ""
+
+    def with_indent(self, content: str) -> str:
+        """Indent every line of rendered content like the governed lines."""
+        indent = self.target_line_indent
+        lines = content.split("\n")
+        if len(lines) > 1 and not lines[-1]:
+            # A value ending with a newline does not add an empty line
+            lines.pop()
+        return "\n".join(f"{indent}{line}" if line else line for line in lines)
 
     @property
     def target_line_content(self) -> str:
@@ -93,15 +124,46 @@ class TargetFile:
 
 
 def parse_target_files(
-    target_files: Set[Path], marker: str, master_vars: List[MasterVar]
+    target_files: Set[Path],
+    marker: str,
+    master_vars: List[MasterVar],
+    validate: bool = True,
+    cache: Optional["ParseCache"] = None,
+    comment_profiles: Optional[CommentProfiles] = None,
+) -> List[TargetFile]:
+    return parse_marker_groups(
+        [(marker, target_files, master_vars)], validate, cache, comment_profiles
+    )
+
+
+def parse_marker_groups(
+    groups: List[MarkerGroup],
+    validate: bool = True,
+    cache: Optional["ParseCache"] = None,
+    comment_profiles: Optional[CommentProfiles] = None,
 ) -> List[TargetFile]:
+    """Parse the target files of several markers, scanning each file once.
+
+    A file listed by several groups is searched for all of their markers in
+    a single pass and returned as one TargetFile.
+    """
     target_file_objs: List[TargetFile] = []
+    parse_file = cache.target_file if cache else _parse_target_file
+    profiles = comment_profiles or DEFAULT_PROFILES
+    profiler = get_profiler()
+    # Known (env, key) pairs of each marker, built once for every file
+    known = {
+        marker: {(mv.env, mv.key) for mv in table}
+        for marker, table in marker_tables(groups).items()
+    }
 
     errors = []
-    for path in target_files:
+    for path, markers in sorted(markers_by_path(groups).items()):
         try:
-            target_lines = _parse_target_file(path, marker)
-            validate_target_lines(target_lines, master_vars)
+            with profiler.file("parse", path):
+                target_lines = parse_file(path, markers, profiles.prefixes_for(path))
+                if validate:
+                    _validate_by_marker(target_lines, markers, known)
         except ValueError as e:
             errors.append(f"{path}: {e}")
             continue
@@ -118,29 +180,425 @@ def parse_target_files(
     return target_file_objs
 
 
-def _parse_target_file(path: Path, marker: str) -> List[TargetLine]:
-    with open(path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
+def _validate_by_marker(
+    target_lines: List[TargetLine],
+    markers: Tuple[str, ...],
+    known: Mapping[str, Container[Tuple[str, str]]],
+) -> None:
+    # known holds the (env, key) pairs of each marker, such as its lookup
+    if len(markers) == 1:
+        validate_keys(target_lines, known[markers[0]])
+        return
+
+    for marker in markers:
+        validate_keys(
+            [tl for tl in target_lines if tl._marker == marker], known[marker]
+        )
+
 
-    target_lines: List[TargetLine] = []
-    for i, line in enumerate(lines):
-        if not is_marker_line(line, marker):
-            continue
+# Options after the quoted template: a range of N lines, or a region
+# closed by an end marker
+_RANGE_OPTION = re.compile(r'"[ \t]+(?:lines=(\d+)|(begin))[ \t]*(?:\*/|-->)?[ \t]*$')
+_END_MARKER = re.compile(r"[ \t]*end[ \t]*(?:\*/|-->)?[ \t]*$")
+# A quoted template, skipped so that a closer inside it does not end a block
+_QUOTED = re.compile(r'[ \t]*"(?:[^"\\\n]|\\.)*"')
+
+
+@lru_cache(maxsize=None)
+def _compile_scanner(
+    markers: Tuple[str, ...],
+    prefixes: Tuple[str, ...],
+    blocks: Tuple[Tuple[str, str], ...],
+) -> Tuple[Pattern[str], Dict[str, Pattern[str]]]:
+    """Return the patterns used outside of comment blocks and inside each.
+
+    Outside, a token is a marker line or a block opener at the start of a
+    line; inside, a marker line or the block's closer. Line starts are
+    matched as the preceding newline, which is searched for much faster
+    than "^" in multiline mode.
+    """
+    marker = "|".join(map(re.escape, markers))
+    # Longest first, so "///" is not taken for "//" followed by "/"
+    prefix = "|".join(map(re.escape, sorted(set(prefixes), key=len, reverse=True)))
+    line_marker = rf"(?:{prefix})[ \t]*(?P<marker>{marker})"
+
+    if not blocks:
+        return re.compile(rf"\n[ \t]*{line_marker}"), {}
+
+    opener = "|".join(re.escape(o) for o, _ in blocks)
+    outside = re.compile(
+        rf"\n[ \t]*(?:(?P<open>{opener})"
+        rf"(?:[ \t]*\*?[ \t]*(?P<block_marker>{marker}))?|{line_marker})"
+    )
+    inside = {
+        o: re.compile(
+            rf"(?P<close>{re.escape(c)})"
+            rf"|\n[ \t]*(?:(?:\*|{prefix})[ \t]*)?(?P<marker>{marker})"
+        )
+        for o, c in blocks
+    }
+    return outside, inside
+
+
+# (line start, marker end, marker) of a marker line found in a comment block
+_BlockMarker = Tuple[int, int, str]
+
+
+class TargetScanner:
+    """Single forward pass over the lines of a target.
+
+    Text is fed in whole lines, all at once for a file or as they arrive
+    for a stream. The position only moves forward: tokens are searched from
+    the end of the previous one and line numbers are counted as it
+    advances, so large files are never searched twice, whatever their
+    directives govern. Scanned text is dropped on the next feed unless a
+    comment block or a range of N lines still needs it; a region spanning
+    several feeds only keeps its first line.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        markers: Tuple[str, ...],
+        prefixes: Tuple[str, ...],
+    ) -> None:
+        self.path = path
+        self.markers = markers
+        self.prefixes = prefixes
+        self.blocks = block_comments(prefixes)
+        self.outside, self.inside = _compile_scanner(markers, prefixes, self.blocks)
+        self.tracing = is_tracing()
+        # Directives in file order, added once the lines they govern are
+        # known; a region is added when it starts and counted when it ends
+        self.target_lines: List[TargetLine] = []
+
+        # Every line, the first included, starts after a newline
+        self.text = ""
+        self._pos = 0
+        self._line_number = 0
+        self._counted_to = 0
+        # Position after the last range of N lines; markers before it
+        # would be overwritten
+        self._range_end = 0
+        # Directive waiting for the lines it governs, with its range option
+        # and the position of its first line
+        self._pending: Optional[Tuple[TargetLine, Optional[str], int]] = None
+        # Region directive waiting for its end marker, with the position
+        # and number of its first line; the position is -1 once the text of
+        # the region is dropped, keeping its first line
+        self._region: Optional[TargetLine] = None
+        self._region_start = (0, 0)
+        self._region_first = ""
+        # Open comment block: opener, position and number of its first
+        # line, and the markers found in it so far
+        self._block: Optional[Tuple[str, int, int, List[_BlockMarker]]] = None
+        # Lines fed while a block or range waits, joined to the text only
+        # once they may close it, and the number of lines the range wants
+        self._held: List[str] = []
+        self._held_lines = 0
+        self._wanted = 0
 
-        raw_marker_line = line.rstrip("\n")
-        raw_target_line = lines[i + 1].rstrip("\n") if i + 1 < len(lines) else ""
+    @property
+    def region(self) -> Optional[TargetLine]:
+        """The region directive still waiting for its end marker."""
+        return self._region
+
+    @property
+    def held_from(self) -> Optional[int]:
+        """Number of the first line that later text may still change."""
+        if self._block is not None:
+            return self._block[2]
+        if self._pending is not None:
+            return self._pending[0].target_line_number
+        return None
+
+    def feed(self, text: str) -> None:
+        """Scan text starting a new line; a final newline starts an empty one."""
+        piece = "\n" + text
+        block, pending = self._block, self._pending
+        if block is not None:
+            if not self.inside[block[0]].search(piece):
+                # Nothing in it closes the block or adds a marker to it
+                self._held.append(piece)
+                return
+        elif pending is not None:
+            self._held_lines += piece.count("\n")
+            if self._held_lines < self._wanted:
+                self._held.append(piece)
+                return
+        else:
+            self._release()
+
+        self._join(piece)
+        self._advance(final=False)
+
+    def close(self) -> List[TargetLine]:
+        """Scan to the end of the text and return the directives found."""
+        self._join("")
+        self._advance(final=True)
+        if self._region is not None:
+            raise ValueError(
+                f"Range at line {self._region.marker_line_number} has no end marker."
+            )
+        return self.target_lines
+
+    def _release(self) -> None:
+        # Drops the text scanned so far; only an open region may remain,
+        # which keeps its first line
+        released = len(self.text)
+        start, start_line = self._region_start
+        if self._region is not None and 0 <= start <= released:
+            self._region_first = self.text[start : self._line_end(start)]
+            self._region_start = (-1, start_line)
+        elif start > released:
+            self._region_start = (start - released, start_line)
+
+        self._line_at(released)
+        self._range_end = max(0, self._range_end - released)
+        self.text = ""
+        self._pos = self._counted_to = 0
+
+    def _join(self, piece: str) -> None:
+        # Appends the held pieces and piece to the text at once
+        if self._held:
+            piece = "".join(self._held) + piece
+            self._held = []
+        self._held_lines = 0
+        self.text += piece
+
+    def _advance(self, final: bool) -> None:
+        # Scans until the end of the text, or until later text is needed
+        text = self.text
+        while True:
+            pending, block = self._pending, self._block
+            if pending is not None and not self._resolve(pending, final):
+                return
+            if block is not None:
+                if not self._scan_block(block, final):
+                    return
+                continue
+
+            match = self.outside.search(text, self._pos)
+            if match is None:
+                self._pos = len(text)
+                return
+
+            line_start = match.start() + 1
+            if match.group("marker") is not None:
+                self._pos = match.end()
+                directive = self._directive(
+                    line_start, match.end("marker"), match.group("marker")
+                )
+                if directive is not None:
+                    target_line, option = directive
+                    self._govern(
+                        target_line,
+                        option,
+                        self._line_end(line_start) + 1,
+                        target_line.marker_line_number + 1,
+                    )
+                continue
+
+            # Markers are only handled once the block is known to be closed
+            markers: List[_BlockMarker] = []
+            if match.group("block_marker") is not None:
+                markers.append(
+                    (line_start, match.end("block_marker"), match.group("block_marker"))
+                )
+            self._block = (
+                match.group("open"),
+                line_start,
+                self._line_at(line_start),
+                markers,
+            )
+            self._pos = self._skip_template(match.end())
+
+    def _scan_block(
+        self, block: Tuple[str, int, int, List[_BlockMarker]], final: bool
+    ) -> bool:
+        # Returns False while the block may still be closed by later text
+        opener, line_start, opened_at, markers = block
+        text = self.text
+        pattern = self.inside[opener]
+        while True:
+            match = pattern.search(text, self._pos)
+            if match is None:
+                if not final:
+                    self._pos = len(text)
+                    return False
+                # An opener that is never closed is plain text, and so is
+                # every later one of its kind
+                self.blocks = tuple(b for b in self.blocks if b[0] != opener)
+                self.outside, self.inside = _compile_scanner(
+                    self.markers, self.prefixes, self.blocks
+                )
+                self._block = None
+                self._pos = line_start - 1
+                return True
+            if match.group("close") is not None:
+                break
+            markers.append(
+                (match.start() + 1, match.end("marker"), match.group("marker"))
+            )
+            self._pos = self._skip_template(match.end())
+
+        self._block = None
+        self._pos = match.end()
+        directive = None
+        for marker in markers:
+            found = self._directive(*marker)
+            if found is not None:
+                if directive is not None:
+                    raise ValueError(
+                        f"Comment block at line {opened_at} "
+                        "holds more than one directive."
+                    )
+                directive = found
+
+        if directive is not None:
+            target_line, option = directive
+            self._govern(
+                target_line,
+                option,
+                self._line_end(match.start()) + 1,
+                self._line_at(match.start()) + 1,
+            )
+        return True
+
+    def _directive(
+        self, line_start: int, marker_end: int, marker: str
+    ) -> Optional[Tuple[TargetLine, Optional[str]]]:
+        """Return the directive of a marker line and its range option.
+
+        End markers close the pending region and return None.
+        """
+        text = self.text
+        line_number = self._line_at(line_start)
+        line_end = self._line_end(line_start)
+        is_end = _END_MARKER.match(text, marker_end, line_end) is not None
+        if line_start < self._range_end or (self._region is not None and not is_end):
+            raise ValueError(f"Marker at line {line_number} is inside a range.")
+
+        if is_end:
+            self._close_region(line_number, line_start)
+            return None
+
+        raw_marker_line = text[line_start:line_end]
+        option = _RANGE_OPTION.search(raw_marker_line)
+        if self.tracing:
+            trace_event("parse", "marker", file=str(self.path), line=line_number)
 
         target_line = TargetLine(
             _marker=marker,
-            source_file=path,
-            marker_line_number=i + 1,
+            source_file=self.path,
+            marker_line_number=line_number,
             raw_marker_line=raw_marker_line,
-            raw_target_line=raw_target_line,
+            raw_target_line="",
             replaced_target_line=None,
         )
-
-        target_lines.append(target_line)
-
+        return target_line, (option.group(1) or "begin") if option else None
+
+    def _govern(
+        self,
+        target_line: TargetLine,
+        option: Optional[str],
+        start: int,
+        start_line: int,
+    ) -> None:
+        # Attach the lines from position start, line start_line, on
+        target_line.target_offset = start_line - target_line.marker_line_number
+        if option == "begin":
+            self.target_lines.append(target_line)
+            self._region = target_line
+            self._region_start = (start, start_line)
+        else:
+            self._pending = (target_line, option, start)
+
+    def _resolve(
+        self, pending: Tuple[TargetLine, Optional[str], int], final: bool
+    ) -> bool:
+        # Attaches the lines of the pending directive once they are all fed
+        target_line, option, start = pending
+        text = self.text
+        if option is None:
+            if start > len(text) and not final:
+                self._wanted = 1
+                return False
+            target_line.raw_target_line = text[start : self._line_end(start)]
+        else:
+            end = start - 1
+            for fed in range(int(option)):
+                if end + 1 >= len(text):
+                    if not final:
+                        self._wanted = int(option) - fed
+                        return False
+                    raise ValueError(
+                        f"Range at line {target_line.marker_line_number} "
+                        "runs past the end of the file."
+                    )
+                end = self._line_end(end + 1)
+            target_line.raw_target_line = text[start:end]
+            target_line.target_line_count = int(option)
+            target_line.fixed_line_count = True
+            self._range_end = end + 1
+
+        self._pending = None
+        self.target_lines.append(target_line)
+        return True
+
+    def _close_region(self, line_number: int, line_start: int) -> None:
+        target_line = self._region
+        if target_line is None:
+            raise ValueError(f"End marker at line {line_number} has no range.")
+
+        start, start_line = self._region_start
+        target_line.target_line_count = line_number - start_line
+        if start < 0:
+            # Fed over several calls, the region kept its first line only
+            target_line.raw_target_line = self._region_first
+        else:
+            target_line.raw_target_line = self.text[start : max(start, line_start - 1)]
+        self._region = None
+
+    def _skip_template(self, pos: int) -> int:
+        match = _QUOTED.match(self.text, pos)
+        return match.end() if match else pos
+
+    def _line_at(self, pos: int) -> int:
+        # Positions only grow, so counting resumes where it stopped
+        self._line_number += self.text.count("\n", self._counted_to, pos)
+        self._counted_to = pos
+        return self._line_number
+
+    def _line_end(self, pos: int) -> int:
+        end = self.text.find("\n", pos)
+        return len(self.text) if end == -1 else end
+
+
+def _parse_target_file(
+    path: Path,
+    marker: Union[str, Tuple[str, ...]],
+    prefixes: Optional[Tuple[str, ...]] = None,
+) -> List[TargetLine]:
+    markers = (marker,) if isinstance(marker, str) else marker
+    content = path.read_bytes()
+    metrics.inc("bytes_read", len(content))
+    # Skip decoding for files without any marker
+    if not any(m.encode() in content for m in markers):
+        return []
+
+    text = content.decode("utf-8")
+    if "\r" in text:
+        # Universal newlines, as when reading in text mode
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    metrics.inc("lines_scanned", text.count("\n") + (not text.endswith("\n")))
+
+    scanner = TargetScanner(
+        path, markers, prefixes or DEFAULT_PROFILES.prefixes_for(path)
+    )
+    scanner.feed(text)
+    target_lines = scanner.close()
+    metrics.inc("markers_found", len(target_lines))
     return target_lines
 
 
@@ -148,11 +606,15 @@ def validate_target_lines(
     target_lines: List[TargetLine], master_vars: List[MasterVar]
 ) -> None:
     # Check if (env, key) pairs exists in master vars
+    validate_keys(target_lines, {(mv.env, mv.key) for mv in master_vars})
+
+
+def validate_keys(
+    target_lines: List[TargetLine], known: Container[Tuple[str, str]]
+) -> None:
     for target_line in target_lines:
         for env, key in target_line.target_vars:
-            if not any(
-                mv.env == env.lower() and mv.key == key.upper() for mv in master_vars
-            ):
+            if (env.lower(), key.upper()) not in known:
                 raise ValueError(
                     f"Variable '{key}' with environment '{env}' in target file "
                     f"at line {target_line.marker_line_number} "
@@ -161,28 +623,20 @@ def validate_target_lines(
 
 
 def is_comment_line(line: str) -> bool:
-    stripped_line = line.strip()
-    for prefix in COMMENT_PREFIX:
-        if stripped_line.startswith(prefix):
-            return True
-    return False
+    return compile_prefixes(DEFAULT_PREFIXES).match(line.strip()) is not None
 
 
-def is_marker_line(line: str, marker: str) -> bool:
-    stripped_line = line.strip()
-    if is_comment_line(stripped_line):
-        content = strip_comment_simbols(stripped_line)
-        return content.startswith(marker)
-
-    return False
+def is_marker_line(
+    line: str, marker: str, prefix_pattern: Optional[Pattern[str]] = None
+) -> bool:
+    match = (prefix_pattern or compile_prefixes(DEFAULT_PREFIXES)).match(line)
+    return match is not None and line.startswith(marker, match.end())
 
 
 def strip_comment_simbols(line: str) -> str:
     stripped_line = line.strip()
-    for prefix in COMMENT_PREFIX:
-        if stripped_line.startswith(prefix):
-            return stripped_line[len(prefix) :].lstrip()
-    return stripped_line
+    match = compile_prefixes(DEFAULT_PREFIXES).match(stripped_line)
+    return stripped_line[match.end() :] if match else stripped_line
 
 
 def strip_marker(line: str, marker: str) -> str:
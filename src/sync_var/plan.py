@@ -0,0 +1,224 @@
+import hashlib
+import io
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sync_var.parse_target_var import TargetFile
+from sync_var.save import _create_backup
+
+PLAN_VERSION = 1
+
+
+@dataclass
+class LineEdit:
+    line: int
+    # Lines joined with "\n"; range directives replace count lines
+    before: str
+    after: str
+    count: int = 1
+
+
+@dataclass
+class FilePlan:
+    # relative to the plan root when the file lives below it
+    path: str
+    sha256: str
+    edits: List[LineEdit] = field(default_factory=list)
+
+
+@dataclass
+class SyncPlan:
+    root: Path
+    files: List[FilePlan] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        from sync_var import __version__
+
+        return {
+            "version": PLAN_VERSION,
+            "tool_version": __version__,
+            "root": str(self.root),
+            "files": [
+                {
+                    "path": file_plan.path,
+                    "sha256": file_plan.sha256,
+                    "edits": [
+                        {
+                            "line": e.line,
+                            "count": e.count,
+                            "before": e.before,
+                            "after": e.after,
+                        }
+                        for e in file_plan.edits
+                    ],
+                }
+                for file_plan in self.files
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SyncPlan":
+        if data.get("version") != PLAN_VERSION:
+            raise ValueError(
+                f"Unsupported plan version: {data.get('version')} "
+                f"(expected {PLAN_VERSION})."
+            )
+
+        try:
+            return cls(
+                root=Path(data["root"]),
+                files=[
+                    FilePlan(
+                        path=str(f["path"]),
+                        sha256=str(f["sha256"]),
+                        edits=[
+                            LineEdit(
+                                line=int(e["line"]),
+                                before=str(e["before"]),
+                                after=str(e["after"]),
+                                count=int(e.get("count", 1)),
+                            )
+                            for e in f["edits"]
+                        ],
+                    )
+                    for f in data["files"]
+                ],
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid plan file: {e}") from e
+
+
+def build_plan(target_files: List[TargetFile], root: Path) -> SyncPlan:
+    """Capture the content hash and line edits of every file that would change."""
+    plan = SyncPlan(root=root)
+
+    for target_file in sorted(target_files, key=lambda tf: tf.path):
+        content = target_file.path.read_bytes()
+        lines = [line.rstrip("\r\n") for line in _split_lines(content)]
+
+        edits: List[LineEdit] = []
+        for target_line in target_file.target_lines:
+            if target_line.replaced_target_line is None:
+                continue
+
+            line_number = target_line.target_line_number
+            count = target_line.target_line_count
+            before = "\n".join(lines[line_number - 1 : line_number - 1 + count])
+            after = target_line.with_indent(target_line.replaced_target_line)
+            if before != after:
+                edits.append(
+                    LineEdit(line=line_number, before=before, after=after, count=count)
+                )
+
+        if edits:
+            plan.files.append(
+                FilePlan(
+                    path=_relative_path(target_file.path, root),
+                    sha256=hashlib.sha256(content).hexdigest(),
+                    edits=edits,
+                )
+            )
+
+    return plan
+
+
+def save_plan(plan: SyncPlan, output: Optional[Path]) -> str:
+    text = json.dumps(plan.to_dict(), indent=2) + "\n"
+    if output is not None:
+        output.write_text(text, encoding="utf-8")
+    return text
+
+
+def load_plan(path: Path) -> SyncPlan:
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"Invalid plan file: {e}") from e
+
+    if not isinstance(data, dict):
+        raise ValueError("Invalid plan file: expected a JSON object.")
+    return SyncPlan.from_dict(data)
+
+
+def apply_plan(
+    plan: SyncPlan,
+    root: Optional[Path] = None,
+    create_backup: bool = True,
+    dry_run: bool = False,
+) -> List[str]:
+    """Apply the line edits of a plan after verifying every file's hash."""
+    base = root or plan.root
+
+    errors = []
+    file_lines: Dict[str, List[str]] = {}
+    for file_plan in plan.files:
+        path = base / file_plan.path
+        try:
+            content = path.read_bytes()
+        except OSError as e:
+            errors.append(f"{path}: {e}")
+            continue
+
+        if hashlib.sha256(content).hexdigest() != file_plan.sha256:
+            errors.append(f"{path}: content changed since the plan was created.")
+            continue
+
+        lines = _split_lines(content)
+        for edit in file_plan.edits:
+            start = edit.line - 1
+            if not 0 < edit.line <= len(lines) - max(edit.count, 1) + 1 or (
+                "\n".join(
+                    line.rstrip("\r\n") for line in lines[start : start + edit.count]
+                )
+                != edit.before
+            ):
+                errors.append(f"{path}: line {edit.line} does not match the plan.")
+        file_lines[file_plan.path] = lines
+
+    if errors:
+        raise ValueError("Plan cannot be applied:\n" + "\n".join(errors))
+
+    logs: List[str] = []
+    for file_plan in plan.files:
+        path = base / file_plan.path
+        lines = file_lines[file_plan.path]
+
+        # Bottom up, so edits changing the line count keep the others valid
+        for edit in reversed(file_plan.edits):
+            start = edit.line - 1
+            # An empty region is filled before its end marker line
+            original = lines[start + max(edit.count, 1) - 1]
+            newline = original[len(original.rstrip("\r\n")) :]
+            ending = newline or "\n"
+            after = edit.after.split("\n")
+            lines[start : start + edit.count] = [
+                f"{line}{ending}" for line in after[:-1]
+            ] + [f"{after[-1]}{newline}"]
+
+        if dry_run:
+            logs.append(f"  Would update: [cyan]{path}[/cyan]")
+            continue
+
+        if create_backup:
+            backup_path = _create_backup(path)
+            logs.append(f"  Backup: [dim]{backup_path}[/dim]")
+
+        path.write_bytes("".join(lines).encode("utf-8"))
+        logs.append(f"  Updated: [cyan]{path}[/cyan]")
+
+    return logs
+
+
+def _split_lines(content: bytes) -> List[str]:
+    # Same line numbering as text-mode readlines(), keeping the line endings
+    return io.StringIO(content.decode("utf-8"), newline="").readlines()
+
+
+def _relative_path(path: Path, root: Path) -> str:
+    try:
+        return path.relative_to(root).as_posix()
+    except ValueError:
+        return str(path)
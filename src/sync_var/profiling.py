@@ -0,0 +1,148 @@
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    import cProfile
+
+# (wall seconds, CPU seconds)
+Timing = List[float]
+
+_NULL = nullcontext()
+
+
+class NullProfiler:
+    """Profiler used when profiling is disabled; every hook is a no-op."""
+
+    enabled = False
+
+    def stage(self, name: str) -> ContextManager[None]:
+        return _NULL
+
+    def file(self, stage: str, path: Path) -> ContextManager[None]:
+        return _NULL
+
+
+class Profiler(NullProfiler):
+    """Wall and CPU time per stage and per file, with optional captures.
+
+    cProfile and tracemalloc are only started when an output directory is
+    given, since both slow the run down noticeably.
+    """
+
+    enabled = True
+
+    def __init__(self, output_dir: Optional[Path] = None) -> None:
+        self.output_dir = output_dir
+        self.stages: Dict[str, Timing] = {}
+        # (stage, path) -> timing
+        self.files: Dict[Tuple[str, str], Timing] = {}
+        self._cprofile: Optional["cProfile.Profile"] = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        with self._measure(self.stages.setdefault(name, [0.0, 0.0])):
+            yield
+
+    @contextmanager
+    def file(self, stage: str, path: Path) -> Iterator[None]:
+        with self._measure(self.files.setdefault((stage, str(path)), [0.0, 0.0])):
+            yield
+
+    def start(self) -> None:
+        if self.output_dir is None:
+            return
+
+        import cProfile
+        import tracemalloc
+
+        tracemalloc.start()
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+
+    def stop(self) -> List[Path]:
+        """Stop the captures and write them to the output directory."""
+        if self.output_dir is None or self._cprofile is None:
+            return []
+
+        import tracemalloc
+
+        self._cprofile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stats_path = self.output_dir / "cprofile.pstats"
+        self._cprofile.dump_stats(stats_path)
+
+        memory_path = self.output_dir / "tracemalloc.txt"
+        top = snapshot.statistics("lineno")[:50]
+        memory_path.write_text("".join(f"{stat}\n" for stat in top), encoding="utf-8")
+
+        summary_path = self.output_dir / "profile.json"
+        summary_path.write_text(
+            json.dumps(self.to_dict(), indent=2) + "\n", encoding="utf-8"
+        )
+        return [summary_path, stats_path, memory_path]
+
+    def slowest_files(self, count: int) -> List[Tuple[str, float, float]]:
+        """Return the files with the highest total wall time over all stages."""
+        totals: Dict[str, Timing] = {}
+        for (_, path), (wall, cpu) in self.files.items():
+            total = totals.setdefault(path, [0.0, 0.0])
+            total[0] += wall
+            total[1] += cpu
+        ranked = sorted(totals.items(), key=lambda item: item[1][0], reverse=True)
+        return [(path, wall, cpu) for path, (wall, cpu) in ranked[:count]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stages": {
+                name: {"wall": wall, "cpu": cpu}
+                for name, (wall, cpu) in self.stages.items()
+            },
+            "files": [
+                {"stage": stage, "path": path, "wall": wall, "cpu": cpu}
+                for (stage, path), (wall, cpu) in self.files.items()
+            ],
+        }
+
+    @contextmanager
+    def _measure(self, timing: Timing) -> Iterator[None]:
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            timing[0] += time.perf_counter() - wall
+            timing[1] += time.process_time() - cpu
+
+
+_profiler: NullProfiler = NullProfiler()
+
+
+def get_profiler() -> NullProfiler:
+    return _profiler
+
+
+@contextmanager
+def profiling(profiler: NullProfiler) -> Iterator[NullProfiler]:
+    """Install a profiler for the duration of a run."""
+    global _profiler
+
+    previous = _profiler
+    _profiler = profiler
+    try:
+        yield profiler
+    finally:
+        _profiler = previous
@@ -0,0 +1,384 @@
+import os
+import shlex
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Container,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+from urllib.parse import urlsplit
+
+from sync_var.cache import cache_path, load_json, save_json
+from sync_var.metrics import metrics
+from sync_var.parse_master_var import MasterVar, parse_master_vars
+
+if TYPE_CHECKING:
+    from http.client import HTTPConnection
+
+    from sync_var.config import Config
+    from sync_var.parse_cache import ParseCache
+
+PROVIDERS_VERSION = 1
+MAX_WORKERS = 8
+DEFAULT_TIMEOUT = 30.0
+
+# Replaced with the key in commands and URLs
+KEY_PLACEHOLDER = "{key}"
+
+# (value, ETag), or None if the source has no such key
+Fetched = Optional[Tuple[str, Optional[str]]]
+
+# (scheme, host, port)
+Origin = Tuple[str, str, Optional[int]]
+
+
+@dataclass
+class Provider:
+    """A master source fetching one value per key from a command or a URL."""
+
+    command: Optional[str] = None
+    url: Optional[str] = None
+    # Seconds a fetched value is used without asking the source again
+    ttl: float = 0
+    timeout: float = DEFAULT_TIMEOUT
+    # Sent with every request; $VARIABLES are expanded from the environment
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self.validate()
+
+    def validate(self) -> None:
+        if (self.command is None) == (self.url is None):
+            raise ValueError("Set exactly one of 'command' or 'url'.")
+
+        kind = "command" if self.command is not None else "url"
+        if not isinstance(self.source, str) or KEY_PLACEHOLDER not in self.source:
+            raise ValueError(f"'{kind}' must be a string containing {KEY_PLACEHOLDER}.")
+        if self.url is not None and urlsplit(self.url).scheme not in ("http", "https"):
+            raise ValueError("'url' must be an http or https URL.")
+
+        for name in ("ttl", "timeout"):
+            value = getattr(self, name)
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                raise ValueError(f"'{name}' must be a number of seconds.")
+        if self.ttl < 0 or self.timeout <= 0:
+            raise ValueError("'ttl' cannot be negative and 'timeout' must be positive.")
+
+        if not isinstance(self.headers, dict) or not all(
+            isinstance(k, str) and isinstance(v, str) for k, v in self.headers.items()
+        ):
+            raise ValueError("'headers' must map header names to strings.")
+        if self.headers and self.command is not None:
+            raise ValueError("'headers' only apply to 'url' providers.")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Provider":
+        unknown = sorted(set(data) - {f.name for f in fields(cls)})
+        if unknown:
+            raise ValueError(f"Unknown provider settings: {', '.join(unknown)}.")
+        return cls(**data)
+
+    @property
+    def source(self) -> str:
+        return self.command if self.command is not None else str(self.url)
+
+    def entry_id(self, key: str) -> str:
+        """Return the cache entry of key; changing the source starts afresh."""
+        kind = "command" if self.command is not None else "url"
+        return f"{kind} {self.source.replace(KEY_PLACEHOLDER, key)}"
+
+
+def load_master_vars(
+    config: "Config", cache: Optional["ParseCache"] = None
+) -> List[MasterVar]:
+    """Parse the master files of config and fetch the values of its providers.
+
+    Providers are only asked for keys that the target files reference;
+    ProviderFetcher fetches the keys of other rendered input.
+    """
+    master_vars = parse_master_vars(config.master_files, cache=cache)
+    providers = config.master_providers
+    if not providers:
+        return master_vars
+
+    keys = referenced_keys(config, cache)
+    # Default keys are wanted too, as --matrix overrides them per environment
+    wanted = {
+        env: keys.get(env, set()) | keys.get("default", set()) for env in providers
+    }
+    return master_vars + fetch_provider_vars(
+        providers, wanted, cache_path(config.config_file, "providers")
+    )
+
+
+def referenced_keys(
+    config: "Config", cache: Optional["ParseCache"] = None
+) -> Dict[str, Set[str]]:
+    """Return the keys used by the directives of config, by environment."""
+    from sync_var.parse_target_var import _parse_target_file
+
+    # Same arguments as the full parse, so the file is only scanned once
+    parse_file = cache.target_file if cache else _parse_target_file
+    markers = (config.marker,)
+    keys: Dict[str, Set[str]] = {}
+    for path in config.target_files:
+        try:
+            target_lines = parse_file(
+                path, markers, config.comment_profiles.prefixes_for(path)
+            )
+        except (OSError, ValueError):
+            # Reported when the target files are parsed
+            continue
+        for target_line in target_lines:
+            for env, key in target_line.target_vars:
+                keys.setdefault(env.lower(), set()).add(key.upper())
+    return keys
+
+
+class ProviderFetcher:
+    """Fetch the provider values of keys found while rendering other input.
+
+    Text and streams are not target files, so their keys are not known when
+    the master values are loaded; they are fetched on first use instead.
+    """
+
+    def __init__(self, config: "Config") -> None:
+        self.providers = config.master_providers
+        self.cache_file = cache_path(config.config_file, "providers")
+        # (env, key) already asked for, including those no provider has
+        self._asked: Set[Tuple[str, str]] = set()
+
+    def fetch_missing(
+        self, target_vars: Iterable[Tuple[str, str]], known: Container[Tuple[str, str]]
+    ) -> List[MasterVar]:
+        """Return the provider values of target_vars not in known."""
+        wanted: Dict[str, Set[str]] = {}
+        for env, key in target_vars:
+            var = (env.lower(), key.upper())
+            if var in known or var in self._asked or var[0] not in self.providers:
+                continue
+            self._asked.add(var)
+            wanted.setdefault(var[0], set()).add(var[1])
+        if not wanted:
+            return []
+        return fetch_provider_vars(self.providers, wanted, self.cache_file)
+
+
+def provider_fetchers(config: "Config") -> Dict[str, ProviderFetcher]:
+    """Return a fetcher for each marker of config whose masters have providers."""
+    configs = {config.marker: config, **config.marker_configs}
+    return {
+        marker: ProviderFetcher(marker_config)
+        for marker, marker_config in configs.items()
+        if marker_config.master_providers
+    }
+
+
+def fetch_provider_vars(
+    providers: Dict[str, Provider], keys: Dict[str, Set[str]], cache_file: Path
+) -> List[MasterVar]:
+    """Return the values of keys from each provider, fetching concurrently.
+
+    Values fetched less than ttl seconds ago come from the on-disk cache.
+    Older values are revalidated with their ETag when the server sent one.
+    Keys a URL answers 404 for are left out.
+    """
+    entries = _load_entries(cache_file)
+    stored = dict(entries)
+    now = time.time()
+    values: Dict[Tuple[str, str], str] = {}
+    # (env, key, provider)
+    jobs: List[Tuple[str, str, Provider]] = []
+    for env, provider in sorted(providers.items()):
+        for key in sorted(keys.get(env, ())):
+            entry = entries.get(provider.entry_id(key))
+            if entry is not None and now - entry["fetched"] < provider.ttl:
+                metrics.inc("provider_cache_hits")
+                values[(env, key)] = entry["value"]
+            else:
+                jobs.append((env, key, provider))
+
+    errors = []
+    if jobs:
+        metrics.inc("provider_fetches", len(jobs))
+        pool = ConnectionPool()
+        try:
+            with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(jobs))) as ex:
+                futures = [
+                    ex.submit(
+                        _fetch, provider, key, entries.get(provider.entry_id(key)), pool
+                    )
+                    for _, key, provider in jobs
+                ]
+        finally:
+            pool.close()
+
+        for (env, key, provider), future in zip(jobs, futures):
+            entry_id = provider.entry_id(key)
+            try:
+                fetched = future.result()
+            except ValueError as e:
+                errors.append(f"{env}.{key}: {e}")
+                continue
+
+            if fetched is None:
+                entries.pop(entry_id, None)
+                continue
+            value, etag = fetched
+            values[(env, key)] = value
+            # Without a ttl or an ETag there is nothing to reuse the value for
+            if provider.ttl or etag:
+                entries[entry_id] = {"value": value, "etag": etag, "fetched": now}
+            else:
+                entries.pop(entry_id, None)
+
+        if entries != stored:
+            save_json(cache_file, {"version": PROVIDERS_VERSION, "entries": entries})
+
+    if errors:
+        raise ValueError("Errors while fetching master values:\n" + "\n".join(errors))
+
+    return [
+        MasterVar(source_file=Path(f"<{env} provider>"), env=env, _key=key, value=value)
+        for (env, key), value in sorted(values.items())
+    ]
+
+
+class ConnectionPool:
+    """Keep-alive HTTP connections, reused by later requests to the same host."""
+
+    def __init__(self) -> None:
+        self._idle: Dict[Origin, List["HTTPConnection"]] = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    def get(
+        self, url: str, headers: Dict[str, str], timeout: float = DEFAULT_TIMEOUT
+    ) -> Tuple[int, Optional[str], bytes]:
+        """Return the status, ETag and body of a GET request."""
+        import http.client
+
+        parts = urlsplit(url)
+        origin = (parts.scheme, parts.hostname or "", parts.port)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        while True:
+            conn, reused = self._acquire(origin, timeout)
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                # The server may have closed an idle connection; retry on
+                # another one, ending with a new connection
+                if reused:
+                    continue
+                raise ValueError(f"{url}: {e}") from e
+
+            if response.will_close:
+                conn.close()
+            else:
+                with self._lock:
+                    self._idle.setdefault(origin, []).append(conn)
+            return response.status, response.getheader("ETag"), body
+
+    def close(self) -> None:
+        with self._lock:
+            for connections in self._idle.values():
+                for conn in connections:
+                    conn.close()
+            self._idle.clear()
+
+    def _acquire(self, origin: Origin, timeout: float) -> Tuple["HTTPConnection", bool]:
+        import http.client
+
+        with self._lock:
+            idle = self._idle.get(origin)
+            if idle:
+                return idle.pop(), True
+            self.opened += 1
+
+        scheme, host, port = origin
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+
+def _fetch(
+    provider: Provider, key: str, entry: Optional[Dict[str, Any]], pool: ConnectionPool
+) -> Fetched:
+    if provider.command is not None:
+        return _run_command(provider.command, key, provider.timeout), None
+
+    headers = {
+        name: os.path.expandvars(value) for name, value in provider.headers.items()
+    }
+    if entry is not None and entry["etag"]:
+        headers["If-None-Match"] = entry["etag"]
+
+    url = provider.source.replace(KEY_PLACEHOLDER, key)
+    status, etag, body = pool.get(url, headers, provider.timeout)
+    if status == 304 and entry is not None:
+        return entry["value"], entry["etag"]
+    if status == 404:
+        return None
+    if status != 200:
+        raise ValueError(f"{url}: HTTP {status}")
+    return _strip_newline(body.decode("utf-8")), etag
+
+
+def _run_command(command: str, key: str, timeout: float) -> str:
+    import subprocess
+
+    args = [arg.replace(KEY_PLACEHOLDER, key) for arg in shlex.split(command)]
+    try:
+        completed = subprocess.run(
+            args, capture_output=True, encoding="utf-8", timeout=timeout
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise ValueError(f"{shlex.join(args)}: {e}") from e
+
+    if completed.returncode != 0:
+        raise ValueError(
+            f"{shlex.join(args)} exited with {completed.returncode}: "
+            f"{completed.stderr.strip()}"
+        )
+    return _strip_newline(completed.stdout)
+
+
+def _strip_newline(value: str) -> str:
+    # Commands and files usually end their only line with a newline
+    if value.endswith("\r\n"):
+        return value[:-2]
+    return value[:-1] if value.endswith("\n") else value
+
+
+def _load_entries(path: Path) -> Dict[str, Dict[str, Any]]:
+    data = load_json(path)
+    if data is None or data.get("version") != PROVIDERS_VERSION:
+        return {}
+
+    stored = data.get("entries")
+    if not isinstance(stored, dict):
+        return {}
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    for entry_id, entry in stored.items():
+        if (
+            isinstance(entry, dict)
+            and isinstance(entry.get("value"), str)
+            and isinstance(entry.get("etag"), (str, type(None)))
+            and isinstance(entry.get("fetched"), (int, float))
+        ):
+            entries[entry_id] = entry
+    return entries
@@ -1,81 +1,128 @@
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from sync_var.logging import log
+from sync_var.metrics import metrics
 from sync_var.parse_master_var import MasterVar
 from sync_var.parse_target_var import TargetFile, TargetLine
+from sync_var.profiling import get_profiler
+from sync_var.trace import is_tracing, trace_event
+
+# (env, KEY) -> MasterVar
+Lookup = Dict[Tuple[str, str], MasterVar]
 
 
 def replace(
     target_files: List[TargetFile],
     master_vars: List[MasterVar],
+    marker_tables: Optional[Dict[str, List[MasterVar]]] = None,
 ) -> None:
+    """Render every directive; markers in marker_tables use their own masters."""
+    replace_with_lookups(
+        target_files, master_lookup(master_vars), _marker_lookups(marker_tables)
+    )
+
 
+def replace_with_lookups(
+    target_files: List[TargetFile], lookup: Lookup, marker_lookups: Dict[str, Lookup]
+) -> None:
+    """Render every directive with lookups kept from master_lookup()."""
+    profiler = get_profiler()
     for target_file in target_files:
-        replace_target_lines(target_file, master_vars)
+        with profiler.file("replace", target_file.path):
+            replace_lines(target_file, lookup, marker_lookups)
 
 
 def replace_target_lines(
     target_file: TargetFile,
     master_vars: List[MasterVar],
+    marker_tables: Optional[Dict[str, List[MasterVar]]] = None,
 ) -> None:
+    replace_lines(
+        target_file, master_lookup(master_vars), _marker_lookups(marker_tables)
+    )
+
+
+def replace_lines(
+    target_file: TargetFile, lookup: Lookup, marker_lookups: Dict[str, Lookup]
+) -> None:
+    tracing = is_tracing()
+    rendered = 0
     for target_line in target_file.target_lines:
-        log.debug(
-            f"Replacing variables in {target_file.path} at line {target_line.marker_line_number}"
+        replaced_line = render_target_line(
+            target_line, marker_lookups.get(target_line._marker, lookup)
         )
-        corresponding_vars: List[Tuple[MasterVar, Tuple[str, str]]] = []
-        for master_var in master_vars:
-            corresponding_vars.extend(get_corresponding_vars(master_var, target_line))
-
-        if not corresponding_vars:
-            log.debug(
-                f"No corresponding master vars found for {target_file.path} at line {target_line.marker_line_number}"
+        if tracing:
+            trace_event(
+                "replace",
+                "unresolved" if replaced_line is None else "rendered",
+                file=str(target_file.path),
+                line=target_line.marker_line_number,
+                keys=[f"{env}.{key}" for env, key in target_line.target_vars],
             )
+        if replaced_line is None:
             continue
 
-        log.debug(
-            f"Found corresponding master vars for {target_file.path} at line {target_line.marker_line_number}: "
-            f"{[(mv.env, mv.key) for mv, _ in corresponding_vars]}"
-        )
+        target_line.replaced_target_line = replaced_line
+        rendered += 1
 
-        replaced_line = target_line.replace_template
-        log.debug(f"Replace template: {replaced_line}")
+    metrics.inc("directives_rendered", rendered)
 
-        for master_var, target_var in corresponding_vars:
-            replaced_line = replaced_line.replace(
-                f"{{{{ {target_var[0]}.{target_var[1]} }}}}",
-                master_var.value,
-            )
-            log.debug(
-                f"Replaced {{{{ {target_var[0]}.{target_var[1]} }}}} with {master_var.value}"
-            )
 
-            if master_var.env == "default":
-                replaced_line = replaced_line.replace(
-                    f"{{{{ {target_var[1]} }}}}",
-                    master_var.value,
-                )
-                log.debug(f"Replaced {{{{ {target_var[1]} }}}} with {master_var.value}")
-
-        # Unescape any escaped placeholders
-        replaced_line = (
-            replaced_line.replace(r"\{{", "{{")
-            .replace(r"\}}", "}}")
-            .replace(r"\.", ".")
-            .replace(r"\"", '"')
-            .replace(r"\\", "\\")
-        )
+def master_lookup(master_vars: List[MasterVar]) -> Lookup:
+    # Built once instead of scanning per placeholder
+    return {(mv.env, mv.key): mv for mv in master_vars}
 
-        log.debug(f"Final replaced line: {replaced_line}")
-        target_line.replaced_target_line = replaced_line
+
+def _marker_lookups(
+    marker_tables: Optional[Dict[str, List[MasterVar]]],
+) -> Dict[str, Lookup]:
+    return {
+        marker: master_lookup(table) for marker, table in (marker_tables or {}).items()
+    }
 
 
-def get_corresponding_vars(
-    master_var: MasterVar,
+def render_target_line(
     target_line: TargetLine,
-) -> List[Tuple[MasterVar, Tuple[str, str]]]:
-    # Return list of (MasterVar, (env, key)) tuples that correspond to the given master_var
-    corresponding_vars = []
+    lookup: Lookup,
+) -> Optional[str]:
+    """Render the directive template, or return None if no variable is known."""
+    corresponding_vars: List[Tuple[MasterVar, Tuple[str, str]]] = []
     for env, key in target_line.target_vars:
-        if master_var.env == env.lower() and master_var.key == key.upper():
+        master_var = lookup.get((env.lower(), key.upper()))
+        if master_var is not None:
             corresponding_vars.append((master_var, (env, key)))
-    return corresponding_vars
+
+    if not corresponding_vars:
+        return None
+
+    replaced_line = target_line.replace_template
+    for master_var, target_var in corresponding_vars:
+        replaced_line = replaced_line.replace(
+            f"{{{{ {target_var[0]}.{target_var[1]} }}}}",
+            master_var.value,
+        )
+
+        if master_var.env == "default":
+            replaced_line = replaced_line.replace(
+                f"{{{{ {target_var[1]} }}}}",
+                master_var.value,
+            )
+
+    # Unescape any escaped placeholders
+    replaced_line = (
+        replaced_line.replace(r"\{{", "{{")
+        .replace(r"\}}", "}}")
+        .replace(r"\.", ".")
+        .replace(r"\"", '"')
+        .replace(r"\\", "\\")
+    )
+
+    if target_line.fixed_line_count:
+        line_count = target_line.with_indent(replaced_line).count("\n") + 1
+        if line_count != target_line.target_line_count:
+            raise ValueError(
+                f"{target_line.source_file}: directive at line "
+                f"{target_line.marker_line_number} renders {line_count} lines, "
+                f"but its range has {target_line.target_line_count}."
+            )
+
+    return replaced_line
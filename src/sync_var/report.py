@@ -0,0 +1,124 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Set, Tuple
+
+from sync_var.config import Config
+from sync_var.markers import MarkerGroup
+from sync_var.parse_master_var import MasterVar
+from sync_var.parse_target_var import TargetFile, TargetLine
+
+
+@dataclass
+class UsageReport:
+    # env -> keys defined in the master file but never referenced
+    unused: Dict[str, List[str]] = field(default_factory=dict)
+    # KEY -> environments whose master file lacks a referenced key
+    missing: Dict[str, List[str]] = field(default_factory=dict)
+    # directives referencing variables defined in no master file
+    unresolved: List[Dict[str, Any]] = field(default_factory=list)
+    # directives that could not be parsed
+    invalid: List[Dict[str, Any]] = field(default_factory=list)
+    # additional marker -> report against its own master files
+    markers: Dict[str, "UsageReport"] = field(default_factory=dict)
+
+    @property
+    def has_issues(self) -> bool:
+        return bool(
+            self.unused
+            or self.missing
+            or self.unresolved
+            or self.invalid
+            or any(report.has_issues for report in self.markers.values())
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "unused": self.unused,
+            "missing": self.missing,
+            "unresolved": self.unresolved,
+            "invalid": self.invalid,
+        }
+        if self.markers:
+            data["markers"] = {
+                marker: report.to_dict() for marker, report in self.markers.items()
+            }
+        return data
+
+
+def build_report(
+    config: Config,
+    groups: List[MarkerGroup],
+    target_files: List[TargetFile],
+) -> UsageReport:
+    """Compare master definitions with directive references, marker by marker.
+
+    The report of the config's own marker holds those of the others.
+    """
+    configs = {config.marker: config, **config.marker_configs}
+    reports: Dict[str, UsageReport] = {}
+    for marker, _, master_vars in groups:
+        directives = [
+            (
+                target_file,
+                [tl for tl in target_file.target_lines if tl._marker == marker],
+            )
+            for target_file in target_files
+        ]
+        reports[marker] = _build_marker_report(configs[marker], master_vars, directives)
+
+    report = reports.pop(config.marker)
+    report.markers = reports
+    return report
+
+
+def _build_marker_report(
+    config: Config,
+    master_vars: List[MasterVar],
+    directives: List[Tuple[TargetFile, List[TargetLine]]],
+) -> UsageReport:
+    defined: Set[Tuple[str, str]] = {(mv.env, mv.key) for mv in master_vars}
+    envs_by_key: Dict[str, Set[str]] = {}
+    for env, key in defined:
+        envs_by_key.setdefault(key, set()).add(env)
+
+    report = UsageReport()
+    referenced: Set[Tuple[str, str]] = set()
+    locations: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+
+    for target_file, target_lines in sorted(directives, key=lambda d: str(d[0].path)):
+        for target_line in target_lines:
+            try:
+                target_vars = target_line.target_vars
+            except ValueError as e:
+                report.invalid.append(
+                    {
+                        "file": str(target_file.path),
+                        "line": target_line.marker_line_number,
+                        "error": str(e),
+                    }
+                )
+                continue
+
+            for env, key in target_vars:
+                var_id = (env.lower(), key.upper())
+                referenced.add(var_id)
+                locations.setdefault(var_id, []).append(
+                    {
+                        "file": str(target_file.path),
+                        "line": target_line.marker_line_number,
+                    }
+                )
+
+    for env, key in sorted(defined - referenced):
+        report.unused.setdefault(env, []).append(key)
+
+    all_envs = set(config.master_files) | set(config.master_providers)
+    for key in sorted({key for _, key in referenced}):
+        missing_envs = all_envs - envs_by_key.get(key, set())
+        if missing_envs:
+            report.missing[key] = sorted(missing_envs)
+
+    for env, key in sorted(referenced - defined):
+        for location in locations[(env, key)]:
+            report.unresolved.append({**location, "env": env, "key": key})
+
+    return report
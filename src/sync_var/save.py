@@ -2,12 +2,11 @@ from datetime import datetime
 from pathlib import Path
 from typing import List
 
-from rich.console import Console
-
 from sync_var.config import SaveOptions
+from sync_var.console import get_console
+from sync_var.metrics import metrics
 from sync_var.parse_target_var import TargetFile
-
-console = Console(highlight=False)
+from sync_var.profiling import get_profiler
 
 
 def save_target_files(
@@ -31,28 +30,30 @@ def save_target_files(
 
 
 def _show_diff(target_files: List[TargetFile]) -> None:
+    console = get_console()
     has_changes = False
 
     for target_file in target_files:
         changes = [
-            tl for tl in target_file.target_lines if tl.replaced_target_line is not None
+            (tl, tl.replaced_target_line)
+            for tl in target_file.target_lines
+            if tl.replaced_target_line is not None
         ]
         if not changes:
             continue
 
         logs = []
-        for target_line in changes:
+        for target_line, replaced in changes:
             line_num = target_line.target_line_number
             before = target_line.raw_target_line
-            after = (
-                f"{target_line.target_line_indent}{target_line.replaced_target_line}"
-            )
+            after = target_line.with_indent(replaced)
             if before == after:
                 continue
 
             logs.append(f"  Line {line_num}:")
-            logs.append(f"    [red]- {before}[/red]")
-            logs.append(f"    [green]+ {after}[/green]")
+            if target_line.target_line_count:
+                logs.extend(f"    [red]- {line}[/red]" for line in before.split("\n"))
+            logs.extend(f"    [green]+ {line}[/green]" for line in after.split("\n"))
 
         console.print(f"\n[bold blue]{target_file.path}[/bold blue]")
         if not logs:
@@ -75,71 +76,119 @@ def _save_to_output_dir(
 
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    profiler = get_profiler()
     for target_file in target_files:
-        content = _build_file_content(target_file)
-
-        # generate output filename by replacing "/" with "_"
-        output_filename = str(target_file.path).replace("/", "_")
-        # remove leading "_" (for absolute paths)
-        output_filename = output_filename.lstrip("_")
-
-        output_path = output_dir / output_filename
-        output_path.write_text(content, encoding="utf-8")
+        with profiler.file("save", target_file.path):
+            content = _build_file_content(target_file)
+            output_path = output_path_for(output_dir, target_file.path)
+            _write_text(output_path, content)
 
         logs.append(f"  Saved: [cyan]{output_path}[/cyan]")
 
     return logs
 
 
+def output_path_for(output_dir: Path, path: Path) -> Path:
+    # generate output filename by replacing "/" with "_"
+    output_filename = str(path).replace("/", "_")
+    # remove leading "_" (for absolute paths)
+    output_filename = output_filename.lstrip("_")
+
+    return output_dir / output_filename
+
+
 def _overwrite_target_files(
     target_files: List[TargetFile],
     create_backup: bool,
 ) -> List[str]:
     logs: List[str] = []
 
+    profiler = get_profiler()
     for target_file in target_files:
         if not any(tl.replaced_target_line for tl in target_file.target_lines):
+            metrics.inc("files_skipped_unchanged")
             continue
 
-        if create_backup:
-            backup_path = _create_backup(target_file.path)
-            logs.append(f"  Backup: [dim]{backup_path}[/dim]")
+        with profiler.file("save", target_file.path):
+            if create_backup:
+                backup_path = _create_backup(target_file.path)
+                logs.append(f"  Backup: [dim]{backup_path}[/dim]")
 
-        content = _build_file_content(target_file)
-        target_file.path.write_text(content, encoding="utf-8")
+            content = _build_file_content(target_file)
+            _write_text(target_file.path, content)
 
         logs.append(f"  Updated: [cyan]{target_file.path}[/cyan]")
 
     return logs
 
 
+def save_changed_target_file(
+    target_file: TargetFile,
+    create_backup: bool,
+) -> List[str]:
+    """Overwrite a target file only if the rendered content differs."""
+    with open(target_file.path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+
+    original = "".join(lines)
+    content = _apply_target_lines(lines, target_file)
+    if content == original:
+        metrics.inc("files_skipped_unchanged")
+        return []
+
+    logs: List[str] = []
+    if create_backup:
+        backup_path = _create_backup(target_file.path)
+        logs.append(f"  Backup: [dim]{backup_path}[/dim]")
+
+    _write_text(target_file.path, content)
+    logs.append(f"  Updated: [cyan]{target_file.path}[/cyan]")
+
+    return logs
+
+
 def _create_backup(file_path: Path) -> Path:
     # backup format: filename.ext.bak.YYYYMMDDHHMMSS
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
     backup_path = file_path.with_suffix(f"{file_path.suffix}.bak.{timestamp}")
 
     # Copy the original file's content to the backup file
-    backup_path.write_text(file_path.read_text(encoding="utf-8"), encoding="utf-8")
+    content = file_path.read_text(encoding="utf-8")
+    backup_path.write_text(content, encoding="utf-8")
+    metrics.inc("backup_bytes", len(content.encode("utf-8")))
 
     return backup_path
 
 
+def _write_text(path: Path, content: str) -> None:
+    path.write_text(content, encoding="utf-8")
+    metrics.inc("bytes_written", len(content.encode("utf-8")))
+
+
 def _build_file_content(target_file: TargetFile) -> str:
     with open(target_file.path, "r", encoding="utf-8") as f:
         lines = f.readlines()
 
-    for target_line in target_file.target_lines:
+    return _apply_target_lines(lines, target_file)
+
+
+def _apply_target_lines(lines: List[str], target_file: TargetFile) -> str:
+    # Bottom up, so ranges changing their line count keep the line numbers
+    # of the directives above them valid
+    for target_line in reversed(target_file.target_lines):
         if target_line.replaced_target_line is None:
             continue
 
         line_index = target_line.target_line_number - 1  # 0-indexed
-        indent = target_line.target_line_indent
-        new_content = target_line.replaced_target_line
+        line_count = target_line.target_line_count
+        new_content = target_line.with_indent(target_line.replaced_target_line)
 
         # Preserve newline character if it existed
-        original_line = lines[line_index]
-        newline = "\n" if original_line.endswith("\n") else ""
+        replaced = lines[line_index : line_index + line_count]
+        newline = "\n" if not replaced or replaced[-1].endswith("\n") else ""
 
-        lines[line_index] = f"{indent}{new_content}{newline}"
+        new_lines = [f"{line}\n" for line in new_content.split("\n")]
+        new_lines[-1] = new_lines[-1][:-1] + newline
+        lines[line_index : line_index + line_count] = new_lines
 
     return "".join(lines)
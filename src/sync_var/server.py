@@ -0,0 +1,207 @@
+import io
+import json
+import os
+import socket
+import socketserver
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, cast
+
+from sync_var.check import check_marker_groups
+from sync_var.client import Request, Response
+from sync_var.config import Config, load_config
+from sync_var.console import get_console, redirect_console
+from sync_var.fingerprint import is_unchanged, record_fingerprint
+from sync_var.index import load_index
+from sync_var.logging import log
+from sync_var.markers import load_marker_groups, marker_tables
+from sync_var.metrics import metrics
+from sync_var.parse_cache import ParseCache
+from sync_var.parse_target_var import parse_marker_groups
+from sync_var.providers import load_master_vars
+from sync_var.replace import replace
+from sync_var.save import save_target_files
+from sync_var.utils import file_stat
+
+
+class WarmState:
+    """Configs and parsed files kept between requests, invalidated by mtime."""
+
+    def __init__(self) -> None:
+        self.parse_cache = ParseCache()
+        self._configs: Dict[Tuple[Any, ...], Tuple[Tuple[int, int], Config]] = {}
+
+    def config(self, config_path: Path, **options: Any) -> Config:
+        key = (str(config_path), *sorted(options.items()))
+        stat = file_stat(config_path)
+
+        cached = self._configs.get(key)
+        if cached is not None and cached[0] == stat:
+            cached[1].validate_config()
+            cached[1].refresh_target_files()
+            cached[1].start_target_expansion()
+            return cached[1]
+
+        config = load_config(config_path, **options)
+        self._configs[key] = (stat, config)
+        return config
+
+
+def _validate(state: WarmState, request: Request) -> int:
+    config = state.config(Path(request["config_path"]))
+    master_vars = load_master_vars(config, cache=state.parse_cache)
+    parse_marker_groups(
+        load_marker_groups(config, master_vars, cache=state.parse_cache),
+        cache=state.parse_cache,
+        comment_profiles=config.comment_profiles,
+    )
+
+    get_console().print("[green]Validation completed successfully.[/green]")
+    return 0
+
+
+def _sync(state: WarmState, request: Request) -> int:
+    options = request.get("options", {})
+    config = state.config(
+        Path(request["config_path"]),
+        dry_run=bool(options.get("dry_run")),
+        output_dir=options.get("output_dir"),
+        no_backup=bool(options.get("no_backup")),
+    )
+    console = get_console()
+    # Forced and partial syncs never reach the server, so every in-place
+    # sync is a full run
+    in_place = not (config.save_options.dry_run or config.save_options.output_dir)
+    if in_place and is_unchanged(config):
+        console.print("[green]No changes since the last sync.[/green]")
+        return 0
+
+    master_vars = load_master_vars(config, cache=state.parse_cache)
+    groups = load_marker_groups(config, master_vars, cache=state.parse_cache)
+    target_files = parse_marker_groups(
+        groups, cache=state.parse_cache, comment_profiles=config.comment_profiles
+    )
+    replace(target_files, master_vars, marker_tables(groups))
+
+    if config.save_options.dry_run:
+        console.print("\n[bold yellow]Dry run mode:[/bold yellow]")
+        save_target_files(target_files, config.save_options)
+        return 0
+
+    logs = save_target_files(target_files, config.save_options)
+
+    index = load_index(config)
+    index.prune(config.all_target_files)
+    index.update_targets(target_files)
+    if in_place:
+        index.update_masters(master_vars)
+    index.save()
+
+    if in_place:
+        record_fingerprint(config)
+
+    console.print("Files edited:")
+    for line in logs:
+        console.print(line)
+    return 0
+
+
+def _check(state: WarmState, request: Request) -> int:
+    options = request.get("options", {})
+    config = state.config(Path(request["config_path"]))
+    master_vars = load_master_vars(config, cache=state.parse_cache)
+    result = check_marker_groups(
+        load_marker_groups(config, master_vars, cache=state.parse_cache),
+        stop_on_first=not options.get("all"),
+        comment_profiles=config.comment_profiles,
+    )
+
+    get_console().print(
+        json.dumps(result.to_dict(), separators=(",", ":")),
+        markup=False,
+        highlight=False,
+        soft_wrap=True,
+    )
+    return 0 if result.in_sync else 1
+
+
+COMMANDS: Dict[str, Callable[[WarmState, Request], int]] = {
+    "validate": _validate,
+    "sync": _sync,
+    "check": _check,
+}
+
+
+def handle_request(state: WarmState, request: Request) -> Response:
+    """Run a command against the warm state, capturing its console output."""
+    from rich.console import Console
+
+    output = io.StringIO()
+    console = Console(
+        file=output,
+        force_terminal=bool(request.get("color")),
+        width=int(request.get("width") or 80),
+        highlight=False,
+    )
+
+    with redirect_console(console):
+        try:
+            command = COMMANDS.get(request.get("command", ""))
+            if command is None:
+                raise ValueError(f"Unknown command: {request.get('command')}")
+            exit_code = command(state, request)
+        except Exception as e:
+            console.print(f"[bold red]Error:[/bold red] {str(e)}")
+            exit_code = 1
+
+    return {"exit_code": exit_code, "output": output.getvalue()}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        server = cast("SyncVarServer", self.server)
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line)
+        except ValueError:
+            response = {"exit_code": 1, "output": "Error: Invalid request.\n"}
+        else:
+            log.debug("Request: %s", request)
+            response = handle_request(server.state, request)
+            if server.metrics_file is not None:
+                metrics.write(server.metrics_file)
+
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class SyncVarServer(socketserver.UnixStreamServer):
+    """Serve requests one at a time, as the console redirect is process-wide."""
+
+    def __init__(self, socket_path: Path, metrics_file: Optional[Path] = None) -> None:
+        self.state = WarmState()
+        self.socket_path = socket_path
+        self.metrics_file = metrics_file
+        _remove_stale_socket(socket_path)
+        # Created private, so no one can connect before it is locked down
+        umask = os.umask(0o177)
+        try:
+            super().__init__(str(socket_path), _RequestHandler)
+        finally:
+            os.umask(umask)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+
+def _remove_stale_socket(socket_path: Path) -> None:
+    if not socket_path.exists():
+        return
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+        except OSError:
+            socket_path.unlink()
+            return
+
+    raise RuntimeError(f"A sync-var server is already running at {socket_path}.")
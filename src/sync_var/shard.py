@@ -0,0 +1,37 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Iterable, Set, Tuple
+
+# (index, count), index starting at 1
+Shard = Tuple[int, int]
+
+
+def parse_shard(value: str) -> Shard:
+    """Parse "INDEX/COUNT", e.g. "2/4" for the second of four shards."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}': expected INDEX/COUNT.") from None
+
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{value}': INDEX must be between 1 and COUNT.")
+    return index, count
+
+
+def shard_of(path: Path, base_dir: Path, count: int) -> int:
+    """Return the 1-based shard of a path.
+
+    The hash is taken over the path relative to base_dir, so every checkout of
+    the repository assigns a file to the same shard.
+    """
+    relative = os.path.relpath(path, base_dir).replace(os.sep, "/")
+    digest = hashlib.sha1(relative.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def select_shard(
+    target_files: Iterable[Path], base_dir: Path, shard: Shard
+) -> Set[Path]:
+    index, count = shard
+    return {path for path in target_files if shard_of(path, base_dir, count) == index}
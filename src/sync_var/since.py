@@ -0,0 +1,143 @@
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Set
+
+from sync_var.config import Config
+from sync_var.index import DependencyIndex, VarId
+from sync_var.parse_master_var import MasterVar, _parse_master_file
+from sync_var.parse_target_var import _parse_target_file
+
+
+def select_changed_targets(
+    config: Config,
+    master_vars: List[MasterVar],
+    ref: str,
+    index: DependencyIndex,
+    target_files: Set[Path],
+) -> Set[Path]:
+    """Return the targets changed since ref or depending on changed master keys.
+
+    Changes are taken between ref and the working tree, including untracked
+    files. Only the local repository is used.
+    """
+    root = repo_root(config.config_dir)
+    _verify_ref(ref, root)
+    changed = changed_paths(ref, root)
+
+    selected = target_files & changed
+    keys: Set[VarId] = set()
+    for env, path in config.master_files.items():
+        if path in changed:
+            current = [mv for mv in master_vars if mv.env == env]
+            keys |= changed_master_keys(ref, path, env, current, root)
+
+    if keys:
+        selected |= _dependent_targets(keys, target_files - selected, index, config)
+    return selected
+
+
+def repo_root(cwd: Path) -> Path:
+    return Path(_git(["rev-parse", "--show-toplevel"], cwd).strip()).resolve()
+
+
+def changed_paths(ref: str, root: Path) -> Set[Path]:
+    """Return files differing from ref in the working tree, and untracked ones."""
+    output = _git(["diff", "--name-only", "-z", ref, "--"], root)
+    output += _git(["ls-files", "--others", "--exclude-standard", "-z"], root)
+    return {(root / name).resolve() for name in output.split("\0") if name}
+
+
+def changed_master_keys(
+    ref: str,
+    path: Path,
+    env: str,
+    current: List[MasterVar],
+    root: Path,
+) -> Set[VarId]:
+    """Return the keys of one master file added, removed or modified since ref."""
+    previous = {mv.key: mv.value for mv in _master_vars_at(ref, path, env, root)}
+    values = {mv.key: mv.value for mv in current}
+    return {
+        (env, key)
+        for key in previous.keys() | values.keys()
+        if previous.get(key) != values.get(key)
+    }
+
+
+def _master_vars_at(ref: str, path: Path, env: str, root: Path) -> List[MasterVar]:
+    content = _show(ref, path, root)
+    if content is None:
+        return []
+
+    # Parse through a file of the same name so the format is detected alike
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path = Path(tmp) / path.name
+        old_path.write_bytes(content)
+        return _parse_master_file(old_path, env)
+
+
+def _dependent_targets(
+    keys: Set[VarId],
+    target_files: Set[Path],
+    index: DependencyIndex,
+    config: Config,
+) -> Set[Path]:
+    dependent: Set[Path] = set()
+    for path in index.affected_targets(keys, target_files):
+        if index.is_current(path):
+            dependent.add(path)
+            continue
+
+        # Not indexed, e.g. in a fresh CI checkout: read the directives
+        try:
+            refs = {
+                (env.lower(), key.upper())
+                for target_line in _parse_target_file(
+                    path,
+                    config.marker,
+                    config.comment_profiles.prefixes_for(path),
+                )
+                for env, key in target_line.target_vars
+            }
+        except ValueError:
+            # Keep invalid files so the parse step reports them
+            refs = keys
+        if refs & keys:
+            dependent.add(path)
+    return dependent
+
+
+def _verify_ref(ref: str, root: Path) -> None:
+    try:
+        _git(["rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}"], root)
+    except ValueError:
+        raise ValueError(f"Unknown git revision: {ref}") from None
+
+
+def _show(ref: str, path: Path, root: Path) -> Optional[bytes]:
+    relative = path.relative_to(root).as_posix()
+    result = subprocess.run(
+        ["git", "show", f"{ref}:{relative}"],
+        cwd=root,
+        capture_output=True,
+    )
+    # The file did not exist at ref
+    return result.stdout if result.returncode == 0 else None
+
+
+def _git(args: List[str], cwd: Path) -> str:
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+        )
+    except FileNotFoundError as e:
+        raise ValueError("git executable not found.") from e
+
+    if result.returncode != 0:
+        raise ValueError(result.stderr.strip() or f"git {args[0]} failed.")
+    return result.stdout
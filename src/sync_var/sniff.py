@@ -0,0 +1,28 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+# Bytes read to decide whether a file is text
+SNIFF_SIZE = 8192
+
+DEFAULT_MAX_FILE_SIZE = 10 * 1024 * 1024
+
+
+def sniff_target_file(path: Path, max_size: int) -> Optional[str]:
+    """Return why a file cannot be a target, or None if it looks like text.
+
+    Only the size and the first block are inspected, so images, archives and
+    other blobs are rejected without reading them.
+    """
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size > max_size:
+                return f"larger than {max_size} bytes"
+            block = f.read(SNIFF_SIZE)
+    except OSError as e:
+        return str(e)
+
+    if b"\0" in block:
+        return "binary content"
+    return None
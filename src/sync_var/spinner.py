@@ -1,8 +1,6 @@
 from functools import partial
 from typing import Type, Union
 
-from halo import Halo
-
 from sync_var.logging import log
 
 
@@ -49,4 +47,7 @@ class LogSpinner:
 def get_spinner(verbose: bool) -> Union[Type[LogSpinner], partial]:
     if verbose:
         return LogSpinner
+
+    from halo import Halo
+
     return partial(Halo, spinner="dots")
@@ -0,0 +1,174 @@
+from collections import deque
+from pathlib import Path
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from sync_var.metrics import metrics
+from sync_var.parse_master_var import MasterVar
+from sync_var.parse_target_var import TargetLine, TargetScanner, validate_keys
+from sync_var.providers import ProviderFetcher
+from sync_var.replace import Lookup, master_lookup, render_target_line
+
+
+class StreamRenderer:
+    """Render the directives of a stream as its lines arrive.
+
+    Directives are found by the scanner of target files, fed one line at a
+    time. A line is written out as soon as no later line can change it, so
+    only comment blocks and ranges of N lines are held back; the lines of a
+    region are dropped as they arrive.
+    """
+
+    def __init__(
+        self,
+        tables: Dict[str, List[MasterVar]],
+        prefixes: Tuple[str, ...],
+        name: str = "<stdin>",
+        lookups: Optional[Dict[str, Lookup]] = None,
+        fetchers: Optional[Dict[str, ProviderFetcher]] = None,
+    ) -> None:
+        self.name = name
+        # Callers rendering many streams pass the lookups they keep
+        self._lookups = (
+            dict(lookups)
+            if lookups
+            else {marker: master_lookup(t) for marker, t in tables.items()}
+        )
+        # Provider values of keys only this stream uses are fetched as they
+        # are found, into copies of the lookups passed in
+        self._fetchers = fetchers or {}
+        self._copied: Set[str] = set()
+        self._scanner = TargetScanner(Path(name), tuple(tables), prefixes)
+
+        # Lines not written out yet, the number of the first one and the
+        # ending of the last line fed
+        self._lines: Deque[str] = deque()
+        self._first = 1
+        self._ending = ""
+        # Directives whose first governed line is not written out yet
+        self._directives: Deque[TargetLine] = deque()
+        # Rendered directive governing the lines being written out
+        self._current: Optional[TargetLine] = None
+
+    def render(self, lines: Iterable[str]) -> Iterator[str]:
+        """Yield the output lines, line endings included, as input arrives."""
+        for line in lines:
+            yield from self.feed(line)
+        yield from self.close()
+
+    def feed(self, line: str) -> List[str]:
+        content = line.rstrip("\r\n")
+        self._ending = line[len(content) :]
+        self._lines.append(line)
+        self._scan(self._scanner.feed, content)
+
+        last = self._first + len(self._lines) - 1
+        held = self._scanner.held_from
+        return self._flush(last if held is None else min(last, held - 1))
+
+    def close(self) -> List[str]:
+        """Write out the lines held back, checking that no range is left open."""
+        metrics.inc("lines_scanned", self._first + len(self._lines) - 1)
+        self._scan(self._scanner.close)
+        output = self._flush(self._first + len(self._lines) - 1)
+
+        if self._directives:
+            # A directive on the last line governs the empty line after its
+            # line ending, as in target files; without one it is only checked
+            self._lines.append(self._ending)
+            rendered = self._flush(self._first)
+            if self._ending:
+                output += rendered
+        return output
+
+    def _scan(self, step: Callable[..., object], *args: str) -> None:
+        try:
+            step(*args)
+        except ValueError as e:
+            raise ValueError(f"{self.name}: {e}") from e
+
+        # Directives are taken off the scanner so they do not pile up
+        found = self._scanner.target_lines
+        self._directives.extend(found)
+        found.clear()
+
+    def _flush(self, last: int) -> List[str]:
+        # Writes out the lines up to number last
+        output: List[str] = []
+        while self._lines and self._first <= last:
+            number = self._first
+            if self._directives and self._directives[0].target_line_number == number:
+                output += self._start(self._directives.popleft())
+
+            line = self._lines.popleft()
+            self._first += 1
+            if not self._governs(number):
+                output.append(line)
+        return output
+
+    def _start(self, target_line: TargetLine) -> List[str]:
+        # Renders a directive at its first governed line, or at the end
+        # marker of an empty region
+        lookup = self._complete(target_line)
+        first = self._lines[0]
+        if target_line is self._scanner.region:
+            # Only its first line is known yet, which sets the indentation
+            target_line.raw_target_line = first.rstrip("\r\n")
+        try:
+            validate_keys([target_line], lookup)
+        except ValueError as e:
+            raise ValueError(f"{self.name}: {e}") from e
+        metrics.inc("markers_found")
+
+        rendered = render_target_line(target_line, lookup)
+        self._current = None if rendered is None else target_line
+        if rendered is None:
+            return []
+
+        metrics.inc("directives_rendered")
+        ending = first[len(first.rstrip("\r\n")) :]
+        newline = ending or "\n"
+        lines = target_line.with_indent(rendered).split("\n")
+        output = [f"{line}{newline}" for line in lines]
+        if (
+            target_line.target_line_count == 1
+            and target_line is not self._scanner.region
+        ):
+            # A single governed line keeps its ending, even at the end
+            output[-1] = f"{lines[-1]}{ending}"
+        return output
+
+    def _complete(self, target_line: TargetLine) -> Lookup:
+        # Returns the lookup of the directive with its provider values added
+        marker = target_line._marker
+        lookup = self._lookups[marker]
+        fetcher = self._fetchers.get(marker)
+        if fetcher is None:
+            return lookup
+        try:
+            fetched = fetcher.fetch_missing(target_line.target_vars, lookup)
+        except ValueError as e:
+            raise ValueError(f"{self.name}: {e}") from e
+        if fetched:
+            if marker not in self._copied:
+                lookup = self._lookups[marker] = dict(lookup)
+                self._copied.add(marker)
+            lookup.update(master_lookup(fetched))
+        return lookup
+
+    def _governs(self, number: int) -> bool:
+        current = self._current
+        if current is None or number < current.target_line_number:
+            return False
+        return current is self._scanner.region or number < (
+            current.target_line_number + current.target_line_count
+        )
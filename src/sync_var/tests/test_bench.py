@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pytest
+
+from sync_var.bench import (
+    STAGES,
+    Workload,
+    compare_results,
+    generate_workload,
+    run_benchmark,
+)
+from sync_var.config import load_config
+
+WORKLOAD = Workload(targets=5, lines=10, directives=2, keys=4, envs=2)
+
+
+class TestBench:
+    """Tests for the synthetic benchmark."""
+
+    def test_generate_workload(self, tmp_path: Path) -> None:
+        """The generated repository is a valid configuration."""
+        config = load_config(generate_workload(tmp_path, WORKLOAD))
+
+        assert len(config.target_files) == 5
+        assert set(config.master_files) == {"default", "env1"}
+        assert all(
+            len(path.read_text().splitlines()) == 10 for path in config.target_files
+        )
+
+    def test_run_benchmark(self) -> None:
+        """Every stage is timed and measured."""
+        result = run_benchmark(WORKLOAD, repeat=1).to_dict()
+
+        assert list(result["stages"]) == STAGES
+        assert result["stages"]["parse_target_files"]["items"] == 5
+        assert all(stage["peak_bytes"] > 0 for stage in result["stages"].values())
+
+    def test_compare_results(self) -> None:
+        """Stages slower than the threshold are reported."""
+        baseline = {"workload": {}, "stages": {"replace": {"seconds": 1.0}}}
+        current = {"workload": {}, "stages": {"replace": {"seconds": 1.5}}}
+
+        assert compare_results(current, baseline, 0.6) == []
+        assert compare_results(current, baseline, 0.1) == [
+            "replace: 1.0000s -> 1.5000s (+50.0%)"
+        ]
+
+    def test_compare_different_workloads(self) -> None:
+        """Results of different workloads are not comparable."""
+        with pytest.raises(ValueError, match="different workloads"):
+            compare_results({"workload": {"targets": 1}}, {"workload": {}}, 0.1)
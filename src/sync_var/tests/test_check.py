@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import pytest
+
+from sync_var.check import check_target_files
+from sync_var.parse_master_var import parse_master_vars
+
+MARKER = "[sync-var]"
+
+
+@pytest.fixture
+def master_vars(tmp_path: Path):
+    master_file = tmp_path / "master.env"
+    master_file.write_text("API_KEY=key\nDB_HOST=db\n")
+    return parse_master_vars({"default": master_file})
+
+
+def _write(path: Path, value: str) -> Path:
+    path.write_text(
+        f'# [sync-var] "KEY={{{{ API_KEY }}}}"\n  KEY={value}\n'
+        '# [sync-var] "HOST={{ DB_HOST }}"\nHOST=stale\n'
+    )
+    return path
+
+
+class TestCheckTargetFiles:
+    """Tests for in-memory drift detection."""
+
+    def test_in_sync(self, tmp_path: Path, master_vars) -> None:
+        """Targets matching the rendered directives report no drift."""
+        path = tmp_path / "target.env"
+        path.write_text('# [sync-var] "KEY={{ API_KEY }}"\n  KEY=key\n')
+
+        result = check_target_files({path}, MARKER, master_vars)
+
+        assert result.in_sync
+        assert result.to_dict()["status"] == "ok"
+        assert result.checked_directives == 1
+
+    def test_stops_at_first_drift(self, tmp_path: Path, master_vars) -> None:
+        """By default checking stops at the first out-of-sync directive."""
+        a = _write(tmp_path / "a.env", "old")
+        b = _write(tmp_path / "b.env", "old")
+
+        result = check_target_files({a, b}, MARKER, master_vars)
+
+        assert result.drift == [{"file": str(a), "line": 2}]
+        assert result.checked_files == 1
+
+    def test_collects_all_drift(self, tmp_path: Path, master_vars) -> None:
+        """With stop_on_first disabled every drifted line is reported."""
+        a = _write(tmp_path / "a.env", "key")
+        b = _write(tmp_path / "b.env", "old")
+
+        result = check_target_files({a, b}, MARKER, master_vars, stop_on_first=False)
+
+        assert result.drift == [
+            {"file": str(a), "line": 4},
+            {"file": str(b), "line": 2},
+            {"file": str(b), "line": 4},
+        ]
+
+    def test_unknown_variable(self, tmp_path: Path, master_vars) -> None:
+        """Directives referencing unknown variables are errors."""
+        path = tmp_path / "target.env"
+        path.write_text('# [sync-var] "X={{ MISSING }}"\nX=\n')
+
+        with pytest.raises(ValueError, match="MISSING"):
+            check_target_files({path}, MARKER, master_vars)
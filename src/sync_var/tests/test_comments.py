@@ -0,0 +1,101 @@
+from pathlib import Path
+
+import pytest
+
+from sync_var.comments import DEFAULT_PREFIXES, CommentProfiles
+from sync_var.config import load_config
+from sync_var.parse_target_var import _parse_target_file
+
+MARKER = "[sync-var]"
+
+
+class TestCommentProfiles:
+    """Tests for per-file-type comment prefixes."""
+
+    def test_profile_lookup(self) -> None:
+        """Profiles are chosen by file name; unknown files use every prefix."""
+        profiles = CommentProfiles()
+
+        assert profiles.prefixes_for(Path("app/config.yaml")) == ("#",)
+        assert profiles.prefixes_for(Path(".env.local")) == ("#",)
+        assert profiles.prefixes_for(Path("deploy/values.unknown")) == (
+            DEFAULT_PREFIXES
+        )
+
+    def test_overrides_come_first(self) -> None:
+        """Configured profiles take precedence over built-in ones."""
+        profiles = CommentProfiles({"*.yaml": ["//"]})
+
+        assert profiles.prefixes_for(Path("config.yaml")) == ("//",)
+
+    def test_longest_prefix_wins(self, tmp_path: Path) -> None:
+        """A "///" prefix is not mistaken for "//" followed by "/"."""
+        path = tmp_path / "config.ts"
+        path.write_text('/// [sync-var] "key = {{ API_KEY }}"\nkey = old\n')
+
+        [target_line] = _parse_target_file(path, MARKER)
+
+        assert target_line.replace_template == "key = {{ API_KEY }}"
+
+    def test_illegal_prefix_is_ignored(self, tmp_path: Path) -> None:
+        """Prefixes from other languages do not start directives."""
+        path = tmp_path / "config.yaml"
+        path.write_text(
+            '-- [sync-var] "a: {{ A }}"\na: 1\n# [sync-var] "b: {{ B }}"\nb: 2\n'
+        )
+
+        target_lines = _parse_target_file(path, MARKER)
+
+        assert [tl.marker_line_number for tl in target_lines] == [3]
+
+    @pytest.mark.parametrize(
+        "name, line",
+        [
+            ("nginx.conf", '; [sync-var] "k = {{ A }}"'),
+            ("schema.sql", '# [sync-var] "k = {{ A }}"'),
+            ("README.md", '# [sync-var] "k = {{ A }}"'),
+        ],
+    )
+    def test_common_prefixes_kept(self, tmp_path: Path, name: str, line: str) -> None:
+        """Prefixes commonly used in a file type before profiles still work."""
+        path = tmp_path / name
+        path.write_text(f"{line}\nk = 1\n")
+
+        [target_line] = _parse_target_file(path, MARKER)
+
+        assert target_line.replace_template == "k = {{ A }}"
+
+    def test_custom_prefix_from_config(self, tmp_path: Path) -> None:
+        """Configured prefixes are used for matching files."""
+        (tmp_path / "master.env").write_text("A=1\n")
+        target = tmp_path / "page.hbs"
+        target.write_text('{{!-- [sync-var] "a={{ A }}" --}}\na=0\n')
+        config_file = tmp_path / "sync-var.yaml"
+        config_file.write_text(
+            "master_files: master.env\n"
+            "target_files: [page.hbs]\n"
+            "comment_prefixes:\n"
+            "  '*.hbs': ['{{!--']\n"
+        )
+        config = load_config(config_file)
+
+        [target_line] = _parse_target_file(
+            target, MARKER, config.comment_profiles.prefixes_for(target)
+        )
+
+        assert target_line.replace_template == "a={{ A }}"
+
+    def test_invalid_override(self, tmp_path: Path) -> None:
+        """Prefix lists must contain non-empty strings."""
+        (tmp_path / "master.env").touch()
+        (tmp_path / "target.env").touch()
+        config_file = tmp_path / "sync-var.yaml"
+        config_file.write_text(
+            "master_files: master.env\n"
+            "target_files: [target.env]\n"
+            "comment_prefixes:\n"
+            "  '*.hbs': []\n"
+        )
+
+        with pytest.raises(ValueError, match="non-empty list"):
+            load_config(config_file)
@@ -331,6 +331,26 @@ class TestLoadConfigValidationErrors:
         assert "missing_master.env" in error_message
         assert "missing_target.env" in error_message
 
+    def test_load_config_missing_files_in_order(
+        self, config_file: Path, tmp_path: Path, create_files
+    ) -> None:
+        """Test missing target files are reported in path order."""
+        create_files("master.env")
+        names = ["d.env", "b.env", "e.env", "a.env", "c.env"]
+        targets = "".join(f"  - {tmp_path}/{name}\n" for name in names)
+        config_file.write_text(
+            f"master_files:\n  default: {tmp_path}/master.env\ntarget_files:\n{targets}"
+        )
+
+        with pytest.raises(ValueError) as exc_info:
+            load_config(config_file)
+
+        reported = [
+            line.split("/")[-1].split("'")[0]
+            for line in str(exc_info.value).splitlines()[1:]
+        ]
+        assert reported == sorted(names)
+
 
 class TestMarkerValidation:
     """Tests for marker format validation."""
@@ -0,0 +1,85 @@
+from pathlib import Path
+
+import pytest
+
+from sync_var.config import SaveOptions
+from sync_var.discover import discover_config_files, sync_discovered
+
+TARGET = '# [sync-var] "KEY={{ API_KEY }}"\nKEY=old\n'
+
+
+@pytest.fixture
+def monorepo(tmp_path: Path) -> Path:
+    (tmp_path / "shared").mkdir()
+    (tmp_path / "shared" / "master.env").write_text("API_KEY=new\n")
+    (tmp_path / "common.env").write_text(TARGET)
+    for name in ["api", "web"]:
+        service = tmp_path / "services" / name
+        service.mkdir(parents=True)
+        (service / "app.env").write_text(TARGET)
+        (service / "sync-var.yaml").write_text(
+            "master_files: ../../shared/master.env\n"
+            "target_files: [app.env, ../../common.env]\n"
+        )
+    return tmp_path
+
+
+def _sync(config_files, **kwargs):
+    return sync_discovered(config_files, SaveOptions(no_backup=True), **kwargs)
+
+
+class TestDiscover:
+    """Tests for syncing many configs in one process."""
+
+    def test_discover_config_files(self, monorepo: Path) -> None:
+        """One config per directory is found, ignored directories are skipped."""
+        (monorepo / "services" / "api" / ".sync-var.yml").touch()
+        (monorepo / "node_modules" / "pkg").mkdir(parents=True)
+        (monorepo / "node_modules" / "pkg" / "sync-var.yaml").touch()
+
+        assert discover_config_files(monorepo) == [
+            monorepo / "services" / "api" / "sync-var.yaml",
+            monorepo / "services" / "web" / "sync-var.yaml",
+        ]
+
+    def test_shared_target_is_written_once(self, monorepo: Path) -> None:
+        """Identical writes to a shared target are merged."""
+        results = _sync(discover_config_files(monorepo))
+
+        assert all(result.ok for result in results)
+        assert (monorepo / "common.env").read_text() == TARGET.replace("old", "new")
+        assert (monorepo / "services" / "web" / "app.env").read_text() == (
+            TARGET.replace("old", "new")
+        )
+
+    def test_unchanged_configs_are_skipped(self, monorepo: Path) -> None:
+        """The second run is a no-op for every config."""
+        _sync(discover_config_files(monorepo))
+
+        results = _sync(discover_config_files(monorepo))
+
+        assert all(result.unchanged for result in results)
+
+    def test_conflicting_writes(self, monorepo: Path) -> None:
+        """Different content for the same line fails every config writing it."""
+        (monorepo / "other.env").write_text("API_KEY=other\n")
+        (monorepo / "sync-var.yaml").write_text(
+            "master_files: other.env\ntarget_files: [common.env]\n"
+        )
+
+        results = _sync(discover_config_files(monorepo), jobs=2)
+
+        assert not any(result.ok for result in results)
+        assert "written with different content" in results[0].errors[0]
+        assert (monorepo / "common.env").read_text() == TARGET
+        assert (monorepo / "services" / "web" / "app.env").read_text() == TARGET
+
+    def test_errors_are_reported_per_config(self, monorepo: Path) -> None:
+        """A broken config does not stop the others."""
+        (monorepo / "services" / "api" / "sync-var.yaml").write_text("marker: x\n")
+
+        results = _sync(discover_config_files(monorepo))
+
+        assert not results[0].ok
+        assert results[1].ok
+        assert results[1].logs
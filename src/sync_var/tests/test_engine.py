@@ -0,0 +1,88 @@
+import os
+from pathlib import Path
+
+import pytest
+
+import sync_var
+from sync_var.engine import Engine
+
+
+@pytest.fixture
+def config_file(tmp_path: Path) -> Path:
+    (tmp_path / "master.env").write_text("HOST=example.com\n")
+    (tmp_path / "app.env").write_text('# [sync-var] "HOST={{ HOST }}"\nHOST=old\n')
+    (tmp_path / "other.env").write_text('# [sync-var] "H={{ HOST }}"\nH=old\n')
+    path = tmp_path / "sync-var.yaml"
+    path.write_text(
+        "master_files:\n  default: master.env\n"
+        "target_files:\n  - app.env\n  - other.env\n"
+    )
+    return path
+
+
+def _touch(path: Path, content: str) -> None:
+    # Make sure the change is seen even on coarse mtime filesystems
+    stat = path.stat()
+    path.write_text(content)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+class TestEngine:
+    """Tests for the embeddable engine."""
+
+    def test_lazy_export(self) -> None:
+        assert sync_var.Engine is Engine
+
+    def test_render_text(self, config_file: Path) -> None:
+        engine = Engine(config_file)
+
+        assert engine.render_text('// [sync-var] "h = {{ HOST }}"\nh = old\n') == (
+            '// [sync-var] "h = {{ HOST }}"\nh = example.com\n'
+        )
+        # Only "#" comments are directives in .env files
+        text = '// [sync-var] "h = {{ HOST }}"\nh = old\n'
+        assert engine.render_text(text, name="x.env") == text
+
+    def test_render_text_line_endings(self, config_file: Path) -> None:
+        """Form feeds and Unicode line separators do not end lines."""
+        engine = Engine(config_file)
+        text = '# [sync-var] "h = {{ HOST }}"\r\nh = a\x0cb\u2028c\r\nx\x0c\n'
+
+        assert engine.render_text(text) == (
+            '# [sync-var] "h = {{ HOST }}"\r\nh = example.com\r\nx\x0c\n'
+        )
+
+    def test_missing_config(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A missing config file is reported as ValueError, like other errors."""
+        monkeypatch.chdir(tmp_path)
+
+        with pytest.raises(ValueError, match="No configuration file found"):
+            Engine(tmp_path / "missing.yaml")
+
+    def test_plan_and_apply(self, config_file: Path, tmp_path: Path) -> None:
+        engine = Engine(config_file)
+
+        plan = engine.plan(["app.env"])
+        assert [f.path for f in plan.files] == ["app.env"]
+
+        written = engine.apply(plan, create_backup=False)
+        assert written == [tmp_path / "app.env"]
+        assert (tmp_path / "app.env").read_text().endswith("HOST=example.com\n")
+        assert engine.plan(["app.env"]).files == []
+
+        with pytest.raises(ValueError, match="Not target files"):
+            engine.plan(["master.env"])
+
+    def test_reload_changed(self, config_file: Path, tmp_path: Path) -> None:
+        """Only changed files are reloaded."""
+        engine = Engine(config_file)
+        assert engine.reload_changed() is False
+
+        _touch(tmp_path / "master.env", "HOST=changed.example\n")
+        assert engine.reload_changed() is True
+        assert engine.render_text('# [sync-var] "{{ HOST }}"\nold\n') == (
+            '# [sync-var] "{{ HOST }}"\nchanged.example\n'
+        )
+        assert engine.reload_changed() is False
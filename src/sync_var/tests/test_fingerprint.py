@@ -0,0 +1,57 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from sync_var.config import load_config
+from sync_var.fingerprint import is_unchanged, record_fingerprint
+
+
+@pytest.fixture
+def config_file(tmp_path: Path) -> Path:
+    (tmp_path / "master.env").write_text("API_KEY=key\n")
+    (tmp_path / "target.env").write_text('# [sync-var] "KEY={{ API_KEY }}"\nKEY=key\n')
+    path = tmp_path / "sync-var.yaml"
+    path.write_text("master_files: master.env\ntarget_files: [target.env]\n")
+    return path
+
+
+class TestFingerprint:
+    """Tests for the run-level input fingerprint."""
+
+    def test_unchanged_after_record(self, config_file: Path) -> None:
+        """Nothing changed since the recorded sync."""
+        config = load_config(config_file)
+        assert not is_unchanged(config)
+
+        record_fingerprint(config)
+
+        assert is_unchanged(load_config(config_file))
+
+    def test_touched_file_is_hashed(self, config_file: Path) -> None:
+        """A newer mtime with the same content is still unchanged."""
+        record_fingerprint(load_config(config_file))
+        master = config_file.parent / "master.env"
+        st = master.stat()
+        os.utime(master, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+        assert is_unchanged(load_config(config_file))
+
+    def test_content_change(self, config_file: Path) -> None:
+        """A same-sized content change is detected."""
+        record_fingerprint(load_config(config_file))
+        master = config_file.parent / "master.env"
+        st = master.stat()
+        master.write_text("API_KEY=new\n")
+        os.utime(master, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+        assert not is_unchanged(load_config(config_file))
+
+    def test_config_change(self, config_file: Path) -> None:
+        """Changing the configuration invalidates the fingerprint."""
+        record_fingerprint(load_config(config_file))
+        config_file.write_text(
+            'master_files: master.env\ntarget_files: [target.env]\nmarker: "[other]"\n'
+        )
+
+        assert not is_unchanged(load_config(config_file))
@@ -0,0 +1,136 @@
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+from click.testing import CliRunner
+
+from sync_var.cli import root
+from sync_var.config import load_config
+from sync_var.index import load_index, parse_keys
+from sync_var.parse_master_var import parse_master_vars
+from sync_var.parse_target_var import parse_target_files
+
+
+@pytest.fixture
+def config_file(tmp_path: Path) -> Path:
+    (tmp_path / "default.env").write_text("API_KEY=key\nDB_HOST=db\n")
+    (tmp_path / "prod.env").write_text("DB_HOST=prod-db\n")
+    (tmp_path / "api.env").write_text('# [sync-var] "KEY={{ API_KEY }}"\nKEY=\n')
+    (tmp_path / "db.env").write_text('# [sync-var] "HOST={{ prod.DB_HOST }}"\nHOST=\n')
+
+    config_file = tmp_path / "sync-var.yaml"
+    config_file.write_text(
+        dedent(
+            """\
+            master_files:
+              default: default.env
+              prod: prod.env
+            target_files:
+              - api.env
+              - db.env
+            """
+        )
+    )
+    return config_file
+
+
+def _build_index(config_file: Path):
+    config = load_config(config_file)
+    master_vars = parse_master_vars(config.master_files)
+    index = load_index(config)
+    index.update_targets(
+        parse_target_files(config.target_files, config.marker, master_vars)
+    )
+    index.update_masters(master_vars)
+    index.save()
+    return config, master_vars
+
+
+class TestDependencyIndex:
+    """Tests for the reverse dependency index."""
+
+    def test_refs_persisted(self, config_file: Path, tmp_path: Path) -> None:
+        """Index maps (env, KEY) to target files and marker lines after reload."""
+        config, _ = _build_index(config_file)
+
+        refs = load_index(config).refs
+
+        assert refs[("default", "API_KEY")] == [(tmp_path / "api.env", 1)]
+        assert refs[("prod", "DB_HOST")] == [(tmp_path / "db.env", 1)]
+
+    def test_affected_targets_by_key(self, config_file: Path, tmp_path: Path) -> None:
+        """Only targets referencing the selected keys are affected."""
+        config, master_vars = _build_index(config_file)
+        index = load_index(config)
+
+        keys = parse_keys("prod.db_host", master_vars)
+
+        assert index.affected_targets(keys, config.target_files) == {
+            tmp_path / "db.env"
+        }
+
+    def test_stale_targets_are_affected(
+        self, config_file: Path, tmp_path: Path
+    ) -> None:
+        """Targets modified since indexing are always re-parsed."""
+        config, master_vars = _build_index(config_file)
+        (tmp_path / "api.env").write_text("# edited\n")
+
+        index = load_index(config)
+
+        assert index.affected_targets(set(), config.target_files) == {
+            tmp_path / "api.env"
+        }
+
+    def test_changed_master_keys(self, config_file: Path, tmp_path: Path) -> None:
+        """Master values changed since the last sync are detected."""
+        config, _ = _build_index(config_file)
+        (tmp_path / "prod.env").write_text("DB_HOST=new-db\n")
+
+        master_vars = parse_master_vars(config.master_files)
+
+        assert load_index(config).changed_master_keys(master_vars) == {
+            ("prod", "DB_HOST")
+        }
+
+    def test_parse_keys_unknown(self, config_file: Path) -> None:
+        """Unknown keys are rejected."""
+        _, master_vars = _build_index(config_file)
+
+        with pytest.raises(ValueError, match="staging.DB_HOST"):
+            parse_keys("API_KEY,staging.DB_HOST", master_vars)
+
+    def test_validate_writes_nothing(
+        self, config_file: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Only commands that write target files update the index."""
+        monkeypatch.setenv("SYNC_VAR_NO_SERVER", "1")
+
+        result = CliRunner().invoke(root, ["validate", "-c", str(config_file)])
+
+        assert result.exit_code == 0, result.output
+        assert not (tmp_path / ".sync-var").exists()
+
+    def test_keys_sync_keeps_other_changes(
+        self, config_file: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A --keys sync does not hide other changed keys from --changed-masters."""
+        monkeypatch.setenv("SYNC_VAR_NO_SERVER", "1")
+        runner = CliRunner()
+
+        def sync(*args: str) -> None:
+            result = runner.invoke(
+                root, ["sync", "-c", str(config_file), "--no-backup", *args]
+            )
+            assert result.exit_code == 0, result.output
+
+        sync()
+        (tmp_path / "default.env").write_text("API_KEY=new-key\nDB_HOST=db\n")
+        (tmp_path / "prod.env").write_text("DB_HOST=new-db\n")
+
+        sync("--keys", "API_KEY")
+        assert (tmp_path / "api.env").read_text().endswith("KEY=new-key\n")
+        assert (tmp_path / "db.env").read_text().endswith("HOST=prod-db\n")
+
+        sync("--changed-masters")
+        assert (tmp_path / "db.env").read_text().endswith("HOST=new-db\n")
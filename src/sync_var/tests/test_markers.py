@@ -0,0 +1,157 @@
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from sync_var.check import check_marker_groups
+from sync_var.config import load_config
+from sync_var.markers import load_marker_groups, marker_tables, restrict_groups
+from sync_var.metrics import metrics
+from sync_var.parallel import render_marker_groups
+from sync_var.parse_master_var import parse_master_vars
+from sync_var.parse_target_var import _parse_target_file, parse_marker_groups
+from sync_var.replace import replace
+from sync_var.save import save_target_files
+
+
+@pytest.fixture
+def config_file(tmp_path: Path) -> Path:
+    """A config with a second marker sharing one target file."""
+    (tmp_path / "app.env").write_text("API_KEY=app\n")
+    (tmp_path / "secrets.env").write_text("API_KEY=secret\n")
+    (tmp_path / "shared.conf").write_text(
+        '# [sync-var] "app = {{ API_KEY }}"\napp = old\n'
+        '# [secrets] "secret = {{ API_KEY }}"\nsecret = old\n'
+    )
+    (tmp_path / "secrets.conf").write_text(
+        '# [secrets] "secret = {{ API_KEY }}"\nsecret = old\n'
+    )
+
+    path = tmp_path / "sync-var.yaml"
+    path.write_text(
+        dedent(
+            """\
+            master_files: app.env
+            target_files:
+              - shared.conf
+            markers:
+              "[secrets]":
+                master_files: secrets.env
+                target_files:
+                  - shared.conf
+                  - secrets.conf
+            """
+        )
+    )
+    return path
+
+
+class TestMarkers:
+    """Tests for configs with several markers."""
+
+    def test_renders_each_marker_with_its_masters(
+        self, config_file: Path, tmp_path: Path
+    ) -> None:
+        """A shared file gets each marker's directives from its own masters."""
+        config = load_config(config_file, no_backup=True)
+        master_vars = parse_master_vars(config.master_files)
+        groups = load_marker_groups(config, master_vars)
+
+        size = sum(len(path.read_bytes()) for path in config.all_target_files)
+        metrics.reset()
+        target_files = parse_marker_groups(groups)
+        replace(target_files, master_vars, marker_tables(groups))
+        save_target_files(target_files, config.save_options)
+
+        # The shared file is read once for both markers
+        assert metrics.values["bytes_read"] == size
+        assert (tmp_path / "shared.conf").read_text() == (
+            '# [sync-var] "app = {{ API_KEY }}"\napp = app\n'
+            '# [secrets] "secret = {{ API_KEY }}"\nsecret = secret\n'
+        )
+        assert (tmp_path / "secrets.conf").read_text().endswith("secret = secret\n")
+
+        result = check_marker_groups(groups)
+        assert result.in_sync
+        assert (result.checked_files, result.checked_directives) == (2, 3)
+
+    def test_parallel_matches_in_process(self, config_file: Path) -> None:
+        """Worker processes render the same lines."""
+        config = load_config(config_file)
+        master_vars = parse_master_vars(config.master_files)
+        groups = load_marker_groups(config, master_vars)
+
+        expected = parse_marker_groups(groups)
+        replace(expected, master_vars, marker_tables(groups))
+
+        assert render_marker_groups(groups, jobs=2) == expected
+
+    def test_restrict_groups(self, config_file: Path, tmp_path: Path) -> None:
+        """Selecting files keeps every marker claiming them."""
+        config = load_config(config_file)
+        groups = load_marker_groups(config, parse_master_vars(config.master_files))
+
+        restricted = restrict_groups(groups, {tmp_path / "secrets.conf"})
+
+        assert [files for _, files, _ in restricted] == [
+            set(),
+            {tmp_path / "secrets.conf"},
+        ]
+
+    def test_unknown_key_is_reported_per_marker(
+        self, config_file: Path, tmp_path: Path
+    ) -> None:
+        """Directives are validated against their own marker's masters."""
+        (tmp_path / "secrets.env").write_text("OTHER=1\n")
+        config = load_config(config_file)
+        groups = load_marker_groups(config, parse_master_vars(config.master_files))
+
+        with pytest.raises(ValueError, match="secrets.conf.*API_KEY"):
+            parse_marker_groups(groups)
+
+    @pytest.mark.parametrize(
+        "markers, message",
+        [
+            ('"[sync-var]": {}', "already the config's marker"),
+            ('"[bad marker]": {master_files: app.env, target_files: [a]}', "format"),
+            ('"[other]": {target_files: [shared.conf]}', "master file"),
+            ('"[other]": [shared.conf]', "must have master_files"),
+        ],
+    )
+    def test_invalid_markers(
+        self, config_file: Path, markers: str, message: str
+    ) -> None:
+        """Each marker is validated like a config of its own."""
+        config_file.write_text(
+            f"master_files: app.env\ntarget_files: [shared.conf]\nmarkers:\n  {markers}\n"
+        )
+
+        with pytest.raises(ValueError, match=message):
+            load_config(config_file)
+
+
+class TestSinglePassScan:
+    """Tests for finding marker lines in one pass over a file."""
+
+    def test_finds_every_marker(self, tmp_path: Path) -> None:
+        """Line numbers, lines and markers match a line-by-line scan."""
+        path = tmp_path / "target.conf"
+        path.write_bytes(
+            b"plain [a] line\r\n"
+            b'  # [a] "x = {{ K }}"\r\n'
+            b"x = 1\r\n"
+            b'#[b] "y = {{ K }}" [a]\n'
+            b'// [a] "not a comment prefix here"\n'
+            b'# [a] "z = {{ K }}"'
+        )
+
+        lines = _parse_target_file(path, ("[a]", "[b]"), ("#",))
+
+        assert [
+            (tl._marker, tl.marker_line_number, tl.raw_marker_line, tl.raw_target_line)
+            for tl in lines
+        ] == [
+            ("[a]", 2, '  # [a] "x = {{ K }}"', "x = 1"),
+            ("[b]", 4, '#[b] "y = {{ K }}" [a]', '// [a] "not a comment prefix here"'),
+            ("[a]", 6, '# [a] "z = {{ K }}"', ""),
+        ]
@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import pytest
+
+from sync_var.matrix import override_default, parse_matrix, render_matrix
+from sync_var.parse_master_var import parse_master_vars
+from sync_var.parse_target_var import parse_target_files
+
+
+@pytest.fixture
+def master_vars(tmp_path: Path):
+    (tmp_path / "default.env").write_text("HOST=default.example\nPORT=80\n")
+    (tmp_path / "prod.env").write_text("HOST=prod.example\n")
+    return parse_master_vars(
+        {"default": tmp_path / "default.env", "prod": tmp_path / "prod.env"}
+    )
+
+
+class TestMatrix:
+    """Tests for rendering one parse for several environments."""
+
+    def test_parse_matrix(self) -> None:
+        assert parse_matrix(" Dev, prod,dev,") == ["dev", "prod"]
+        with pytest.raises(ValueError):
+            parse_matrix(" , ")
+
+    def test_override_default(self, master_vars) -> None:
+        """Keys the environment lacks keep their default value."""
+        values = {
+            (mv.env, mv.key): mv.value for mv in override_default(master_vars, "prod")
+        }
+
+        assert values[("default", "HOST")] == "prod.example"
+        assert values[("default", "PORT")] == "80"
+        assert values[("prod", "HOST")] == "prod.example"
+
+    def test_render_matrix(self, tmp_path: Path, master_vars) -> None:
+        """Each variant is written to its own directory; the target is untouched."""
+        target = tmp_path / "app.env"
+        original = '# [sync-var] "URL={{ HOST }}:{{ PORT }}"\nURL=old\n'
+        target.write_text(original)
+        target_files = parse_target_files({target}, "[sync-var]", master_vars)
+        groups = [("[sync-var]", {target}, master_vars)]
+
+        logs = render_matrix(
+            target_files, groups, ["default", "prod"], tmp_path / "out"
+        )
+
+        assert len(logs) == 2
+        name = str(target).replace("/", "_").lstrip("_")
+        assert (
+            (tmp_path / "out" / "default" / name)
+            .read_text()
+            .endswith("URL=default.example:80\n")
+        )
+        assert (
+            (tmp_path / "out" / "prod" / name)
+            .read_text()
+            .endswith("URL=prod.example:80\n")
+        )
+        assert target.read_text() == original
+
+    def test_unknown_environment(self, tmp_path: Path, master_vars) -> None:
+        with pytest.raises(ValueError, match="Unknown environments in --matrix: qa"):
+            render_matrix([], [("[sync-var]", set(), master_vars)], ["qa"], tmp_path)
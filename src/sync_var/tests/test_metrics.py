@@ -0,0 +1,103 @@
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from sync_var.cli import root
+from sync_var.config import SaveOptions
+from sync_var.metrics import COUNTERS, metrics
+from sync_var.parse_cache import ParseCache
+from sync_var.parse_master_var import parse_master_vars
+from sync_var.parse_target_var import parse_target_files
+from sync_var.replace import replace
+from sync_var.save import save_target_files
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics() -> None:
+    metrics.reset()
+
+
+class TestMetrics:
+    """Tests for hot-path counters."""
+
+    def test_counts_a_sync(self, tmp_path: Path) -> None:
+        """Parsing, rendering and saving update their counters."""
+        master_file = tmp_path / "master.env"
+        master_file.write_text("API_KEY=secret\n")
+        target = tmp_path / "target.conf"
+        content = '# [sync-var] "key = {{ API_KEY }}"\nkey = old\nother = 1\n'
+        target.write_text(content)
+        (tmp_path / "plain.conf").write_text("no directives\n")
+
+        master_vars = parse_master_vars({"default": master_file})
+        target_files = parse_target_files(
+            {target, tmp_path / "plain.conf"}, "[sync-var]", master_vars
+        )
+        replace(target_files, master_vars)
+        save_target_files(target_files, SaveOptions())
+
+        assert metrics.values["bytes_read"] == len(content) + len("no directives\n")
+        # Files without the marker are not split into lines
+        assert metrics.values["lines_scanned"] == 3
+        assert metrics.values["markers_found"] == 1
+        assert metrics.values["directives_rendered"] == 1
+        assert metrics.values["bytes_written"] == len(target.read_bytes())
+        assert metrics.values["backup_bytes"] == len(content)
+        assert metrics.values["files_skipped_unchanged"] == 1
+
+    def test_counts_cache_hits(self, tmp_path: Path) -> None:
+        """Parse cache lookups are counted."""
+        target = tmp_path / "target.conf"
+        target.write_text("key = value\n")
+        cache = ParseCache()
+
+        cache.target_file(target, "[sync-var]")
+        cache.target_file(target, "[sync-var]")
+
+        assert metrics.values["cache_misses"] == 1
+        assert metrics.values["cache_hits"] == 1
+
+    def test_write_text_format(self, tmp_path: Path) -> None:
+        """Every counter is written with HELP and TYPE lines."""
+        metrics.inc("markers_found", 3)
+        path = tmp_path / "metrics" / "sync_var.prom"
+
+        metrics.write(path)
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 3 * len(COUNTERS)
+        assert "# TYPE sync_var_markers_found_total counter" in lines
+        assert "sync_var_markers_found_total 3" in lines
+        assert list(path.parent.iterdir()) == [path]
+
+    def test_counts_from_worker_processes(self, tmp_path: Path) -> None:
+        """Counters incremented in pool workers reach the metrics file."""
+        (tmp_path / "master.env").write_text("API_KEY=secret\n")
+        content = '# [sync-var] "key = {{ API_KEY }}"\nkey = old\n'
+        for name in ("a.conf", "b.conf"):
+            (tmp_path / name).write_text(content)
+        config_file = tmp_path / "sync-var.yaml"
+        config_file.write_text(
+            "master_files: master.env\ntarget_files:\n  - a.conf\n  - b.conf\n"
+        )
+        path = tmp_path / "sync_var.prom"
+
+        result = CliRunner().invoke(
+            root,
+            [
+                "validate",
+                "-c",
+                str(config_file),
+                "--jobs",
+                "2",
+                "--metrics-file",
+                str(path),
+            ],
+        )
+
+        assert result.exit_code == 0, result.output
+        lines = path.read_text().splitlines()
+        assert f"sync_var_bytes_read_total {2 * len(content)}" in lines
+        assert "sync_var_lines_scanned_total 4" in lines
+        assert "sync_var_markers_found_total 2" in lines
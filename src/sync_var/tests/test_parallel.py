@@ -0,0 +1,125 @@
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from sync_var import parallel
+from sync_var.parallel import render_target_files, render_target_groups, resolve_jobs
+from sync_var.parse_master_var import parse_master_vars
+from sync_var.parse_target_var import parse_target_files
+from sync_var.replace import master_lookup, replace
+
+MARKER = "[sync-var]"
+
+
+@pytest.fixture
+def master_file(tmp_path: Path) -> Path:
+    path = tmp_path / "master.env"
+    path.write_text("API_KEY=new_key\nDB_HOST=db.example.com\n")
+    return path
+
+
+def _write_targets(tmp_path: Path, count: int) -> set[Path]:
+    paths = set()
+    for i in range(count):
+        path = tmp_path / f"target{i}.yaml"
+        path.write_text(
+            dedent(
+                """\
+                server:
+                  # [sync-var] "api_key: {{ API_KEY }}"
+                  api_key: old
+                  # [sync-var] "host: {{ default.DB_HOST }}"
+                  host: old
+                """
+            )
+        )
+        paths.add(path)
+    return paths
+
+
+class TestRenderTargetFiles:
+    """Tests for process-pool rendering."""
+
+    def test_matches_serial_rendering(self, tmp_path: Path, master_file: Path) -> None:
+        """Parallel rendering produces the same lines as the serial path."""
+        targets = _write_targets(tmp_path, 8)
+        master_vars = parse_master_vars({"default": master_file})
+
+        serial = parse_target_files(targets, MARKER, master_vars)
+        replace(serial, master_vars)
+        parallel = render_target_files(targets, MARKER, master_vars, jobs=2)
+
+        def _lines(files):
+            return sorted(
+                (str(tf.path), tl.target_line_number, tl.replaced_target_line)
+                for tf in files
+                for tl in tf.target_lines
+            )
+
+        assert _lines(parallel) == _lines(serial)
+        assert "api_key: new_key" in {
+            tl.replaced_target_line for tf in parallel for tl in tf.target_lines
+        }
+
+    def test_collects_errors(self, tmp_path: Path, master_file: Path) -> None:
+        """Validation errors from workers are reported together."""
+        targets = _write_targets(tmp_path, 2)
+        broken = tmp_path / "broken.env"
+        broken.write_text('# [sync-var] "X={{ MISSING }}"\nX=1\n')
+        targets.add(broken)
+        master_vars = parse_master_vars({"default": master_file})
+
+        with pytest.raises(ValueError, match="broken.env"):
+            render_target_files(targets, MARKER, master_vars, jobs=2)
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_range_errors_per_file(
+        self, tmp_path: Path, master_file: Path, jobs: int
+    ) -> None:
+        """A range rendering the wrong number of lines fails its file only."""
+        master_vars = parse_master_vars({"default": master_file})
+        fixed = tmp_path / "fixed.txt"
+        fixed.write_text('# [sync-var] "{{ API_KEY }}" lines=1\nold\n')
+        broken = tmp_path / "broken.txt"
+        broken.write_text('# [sync-var] "{{ API_KEY }}" lines=2\na\nb\n')
+
+        [(ok, ok_errors), (_, errors)] = render_target_groups(
+            [
+                ([(MARKER, {fixed}, master_vars)], None),
+                ([(MARKER, {broken}, master_vars)], None),
+            ],
+            jobs,
+        )
+
+        assert ok_errors == []
+        [target_line] = ok[0].target_lines
+        assert target_line.fixed_line_count
+        assert target_line.replaced_target_line == "new_key"
+        assert errors == [
+            f"{broken}: directive at line 1 renders 1 lines, but its range has 2."
+        ]
+
+    def test_lookup_built_once(
+        self, tmp_path: Path, master_file: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Master lookups are built once, not once per target file."""
+        calls = []
+
+        def _lookup(master_vars):
+            calls.append(master_vars)
+            return master_lookup(master_vars)
+
+        monkeypatch.setattr(parallel, "master_lookup", _lookup)
+        master_vars = parse_master_vars({"default": master_file})
+
+        render_target_files(_write_targets(tmp_path, 4), MARKER, master_vars, jobs=1)
+
+        assert calls == [master_vars]
+
+    def test_resolve_jobs(self) -> None:
+        """Zero jobs means one worker per CPU."""
+        assert resolve_jobs(3) == 3
+        assert resolve_jobs(0) >= 1
+        with pytest.raises(ValueError):
+            resolve_jobs(-1)
@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import pytest
+
+from sync_var.parse_master_var import parse_master_vars
+from sync_var.parse_target_var import parse_target_files
+from sync_var.plan import apply_plan, build_plan, load_plan, save_plan
+from sync_var.replace import replace
+
+
+@pytest.fixture
+def target_file(tmp_path: Path) -> Path:
+    (tmp_path / "master.env").write_text("API_KEY=new\nDB_HOST=db\n")
+    path = tmp_path / "nested" / "target.env"
+    path.parent.mkdir()
+    path.write_bytes(
+        b'# [sync-var] "KEY={{ API_KEY }}"\r\n  KEY=old\r\n'
+        b'# [sync-var] "HOST={{ DB_HOST }}"\r\nHOST=db\r\n'
+    )
+    return path
+
+
+def _plan(tmp_path: Path, target_file: Path):
+    master_vars = parse_master_vars({"default": tmp_path / "master.env"})
+    target_files = parse_target_files({target_file}, "[sync-var]", master_vars)
+    replace(target_files, master_vars)
+    return build_plan(target_files, tmp_path)
+
+
+class TestPlan:
+    """Tests for plan creation and application."""
+
+    def test_build_plan(self, tmp_path: Path, target_file: Path) -> None:
+        """Only changed lines are recorded, relative to the root."""
+        plan = _plan(tmp_path, target_file)
+
+        assert [f.path for f in plan.files] == ["nested/target.env"]
+        edits = plan.files[0].edits
+        assert [(e.line, e.before, e.after) for e in edits] == [
+            (2, "  KEY=old", "  KEY=new")
+        ]
+
+    def test_round_trip_and_apply(self, tmp_path: Path, target_file: Path) -> None:
+        """A saved plan applies its edits, preserving line endings."""
+        plan_file = tmp_path / "plan.json"
+        save_plan(_plan(tmp_path, target_file), plan_file)
+
+        logs = apply_plan(load_plan(plan_file), create_backup=False)
+
+        assert len(logs) == 1
+        assert target_file.read_bytes() == (
+            b'# [sync-var] "KEY={{ API_KEY }}"\r\n  KEY=new\r\n'
+            b'# [sync-var] "HOST={{ DB_HOST }}"\r\nHOST=db\r\n'
+        )
+
+    def test_apply_to_other_root(self, tmp_path: Path, target_file: Path) -> None:
+        """Plans can be applied to a copy of the tree elsewhere."""
+        plan = _plan(tmp_path, target_file)
+        other = tmp_path / "other"
+        (other / "nested").mkdir(parents=True)
+        (other / "nested" / "target.env").write_bytes(target_file.read_bytes())
+
+        apply_plan(plan, root=other, create_backup=False)
+
+        assert b"KEY=new" in (other / "nested" / "target.env").read_bytes()
+        assert b"KEY=old" in target_file.read_bytes()
+
+    def test_stale_plan_is_rejected(self, tmp_path: Path, target_file: Path) -> None:
+        """Files changed after planning are not touched."""
+        plan = _plan(tmp_path, target_file)
+        target_file.write_text("edited\n")
+
+        with pytest.raises(ValueError, match="content changed"):
+            apply_plan(plan, create_backup=False)
+
+        assert target_file.read_text() == "edited\n"
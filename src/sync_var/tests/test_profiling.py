@@ -0,0 +1,79 @@
+import pstats
+from pathlib import Path
+
+from sync_var.parse_master_var import parse_master_vars
+from sync_var.parse_target_var import parse_target_files
+from sync_var.profiling import NullProfiler, Profiler, get_profiler, profiling
+from sync_var.replace import replace
+
+
+class TestProfiler:
+    """Tests for per-stage and per-file profiling."""
+
+    def test_disabled_by_default(self) -> None:
+        """Without --profile the hooks are shared no-ops."""
+        profiler = get_profiler()
+
+        assert not profiler.enabled
+        assert profiler.stage("parse") is profiler.file("parse", Path("a"))
+
+    def test_records_stages_and_files(self, tmp_path: Path) -> None:
+        """Stages and every parsed and replaced file are timed."""
+        master_file = tmp_path / "master.env"
+        master_file.write_text("API_KEY=secret\n")
+        paths = []
+        for i in range(3):
+            path = tmp_path / f"target{i}.conf"
+            path.write_text('# [sync-var] "key = {{ API_KEY }}"\nkey = old\n')
+            paths.append(path)
+
+        profiler = Profiler()
+        with profiling(profiler):
+            with profiler.stage("parse_master_vars"):
+                master_vars = parse_master_vars({"default": master_file})
+            target_files = parse_target_files(set(paths), "[sync-var]", master_vars)
+            replace(target_files, master_vars)
+
+        assert get_profiler() is not profiler
+        assert list(profiler.stages) == ["parse_master_vars"]
+        assert set(profiler.files) == {
+            (stage, str(path)) for stage in ("parse", "replace") for path in paths
+        }
+
+    def test_slowest_files(self) -> None:
+        """Files are ranked by their wall time summed over all stages."""
+        profiler = Profiler()
+        profiler.files = {
+            ("parse", "a"): [0.3, 0.1],
+            ("parse", "b"): [0.2, 0.2],
+            ("save", "b"): [0.2, 0.1],
+            ("parse", "c"): [0.1, 0.1],
+        }
+
+        slowest = profiler.slowest_files(2)
+
+        assert [path for path, _, _ in slowest] == ["b", "a"]
+        assert slowest[0][1] == 0.4
+
+    def test_writes_captures(self, tmp_path: Path) -> None:
+        """With an output directory, cProfile and tracemalloc captures are saved."""
+        profiler = Profiler(tmp_path / "profile")
+        profiler.start()
+        with profiler.stage("work"):
+            sorted(str(i) for i in range(1000))
+        written = profiler.stop()
+
+        assert {path.name for path in written} == {
+            "profile.json",
+            "cprofile.pstats",
+            "tracemalloc.txt",
+        }
+        assert pstats.Stats(str(tmp_path / "profile" / "cprofile.pstats"))
+
+    def test_no_captures_without_output_dir(self) -> None:
+        """Plain --profile only measures time."""
+        profiler = Profiler()
+        profiler.start()
+
+        assert profiler.stop() == []
+        assert isinstance(profiler, NullProfiler)
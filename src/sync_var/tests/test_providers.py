@@ -0,0 +1,232 @@
+import json
+import shlex
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, cast
+
+import pytest
+
+from sync_var.config import load_config
+from sync_var.providers import (
+    ConnectionPool,
+    Provider,
+    fetch_provider_vars,
+    load_master_vars,
+)
+
+
+class _StubServer(ThreadingHTTPServer):
+    values: Dict[str, str]
+    # (path, If-None-Match)
+    requests: List[Tuple[str, Optional[str]]]
+    connections: int
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        cast(_StubServer, self.server).connections += 1
+
+    def do_GET(self) -> None:
+        server = cast(_StubServer, self.server)
+        if_none_match = self.headers.get("If-None-Match")
+        server.requests.append((self.path, if_none_match))
+        value = server.values.get(self.path.rsplit("/", 1)[-1])
+        if value is None:
+            self._send(404, b"")
+            return
+
+        etag = f'"{len(value)}-{value}"'
+        if if_none_match == etag:
+            self._send(304, b"", etag)
+        else:
+            self._send(200, f"{value}\n".encode(), etag)
+
+    def _send(self, status: int, body: bytes, etag: Optional[str] = None) -> None:
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def server() -> Iterator[_StubServer]:
+    server = _StubServer(("127.0.0.1", 0), _Handler)
+    server.values = {"HOST": "example.com", "PORT": "8080"}
+    server.requests = []
+    server.connections = 0
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server: _StubServer) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}/values/{{key}}"
+
+
+def _values(master_vars) -> Dict[Tuple[str, str], str]:
+    return {(mv.env, mv.key): mv.value for mv in master_vars}
+
+
+class TestProviders:
+    """Tests for master values fetched from commands and URLs."""
+
+    @pytest.mark.parametrize(
+        "settings, message",
+        [
+            ({"command": "echo"}, "must be a string containing"),
+            ({"command": "echo {key}", "url": "http://x/{key}"}, "exactly one"),
+            ({"url": "ftp://x/{key}"}, "http or https"),
+            ({"url": "http://x/{key}", "ttl": -1}, "cannot be negative"),
+            ({"command": "echo {key}", "headers": {"A": "b"}}, "only apply"),
+            ({"command": "echo {key}", "cache": True}, "Unknown provider settings"),
+        ],
+    )
+    def test_invalid_settings(self, settings, message: str) -> None:
+        with pytest.raises(ValueError, match=message):
+            Provider.from_dict(settings)
+
+    def test_command_referenced_keys_only(self, tmp_path: Path) -> None:
+        """Only keys used by targets are fetched, default keys included."""
+        log = tmp_path / "calls.log"
+        script = (
+            "import sys; "
+            f"open({str(log)!r}, 'a').write(sys.argv[1] + ' '); "
+            "print('prod-' + sys.argv[1].lower())"
+        )
+        command = shlex.join([sys.executable, "-c", script]) + " {key}"
+        (tmp_path / "master.env").write_text("HOST=default.example\nUNUSED=x\n")
+        (tmp_path / "app.env").write_text(
+            '# [sync-var] "URL={{ prod.PORT }}"\nURL=old\n'
+            '# [sync-var] "HOST={{ HOST }}"\nHOST=old\n'
+        )
+        config_file = tmp_path / "sync-var.yaml"
+        config_file.write_text(
+            "master_files:\n"
+            "  default: master.env\n"
+            f"  prod:\n    command: {json.dumps(command)}\n"
+            "target_files:\n  - app.env\n"
+        )
+
+        values = _values(load_master_vars(load_config(config_file)))
+
+        assert sorted(log.read_text().split()) == ["HOST", "PORT"]
+        assert values[("prod", "PORT")] == "prod-port"
+        assert values[("prod", "HOST")] == "prod-host"
+        assert ("prod", "UNUSED") not in values
+        # A command without a ttl is run every time and never cached
+        assert not (tmp_path / ".sync-var").exists()
+
+    def test_command_failure(self, tmp_path: Path) -> None:
+        script = "import sys; sys.exit('no such secret')"
+        provider = Provider(command=shlex.join([sys.executable, "-c", script, "{key}"]))
+
+        with pytest.raises(ValueError, match="prod.HOST: .* exited with 1"):
+            fetch_provider_vars(
+                {"prod": provider}, {"prod": {"HOST"}}, tmp_path / "cache.json"
+            )
+
+    def test_ttl_cache(self, tmp_path: Path, server: _StubServer) -> None:
+        """Values younger than the ttl are not requested again."""
+        providers = {"prod": Provider(url=_url(server), ttl=60)}
+        cache_file = tmp_path / "cache.json"
+
+        first = fetch_provider_vars(providers, {"prod": {"HOST", "PORT"}}, cache_file)
+        server.values["HOST"] = "changed.example"
+        second = fetch_provider_vars(providers, {"prod": {"HOST", "PORT"}}, cache_file)
+
+        expected = {("prod", "HOST"): "example.com", ("prod", "PORT"): "8080"}
+        assert _values(first) == _values(second) == expected
+        assert len(server.requests) == 2
+
+    def test_etag_revalidation(self, tmp_path: Path, server: _StubServer) -> None:
+        providers = {"prod": Provider(url=_url(server))}
+        cache_file = tmp_path / "cache.json"
+
+        fetch_provider_vars(providers, {"prod": {"HOST"}}, cache_file)
+        unchanged = fetch_provider_vars(providers, {"prod": {"HOST"}}, cache_file)
+        server.values["HOST"] = "changed.example"
+        changed = fetch_provider_vars(providers, {"prod": {"HOST"}}, cache_file)
+
+        etag = '"11-example.com"'
+        assert server.requests == [
+            ("/values/HOST", None),
+            ("/values/HOST", etag),
+            ("/values/HOST", etag),
+        ]
+        assert _values(unchanged) == {("prod", "HOST"): "example.com"}
+        assert _values(changed) == {("prod", "HOST"): "changed.example"}
+
+    def test_missing_key(self, tmp_path: Path, server: _StubServer) -> None:
+        """Keys the server does not have are left out, not errors."""
+        providers = {"prod": Provider(url=_url(server))}
+
+        master_vars = fetch_provider_vars(
+            providers, {"prod": {"HOST", "NOPE"}}, tmp_path / "cache.json"
+        )
+
+        assert _values(master_vars) == {("prod", "HOST"): "example.com"}
+
+    def test_connection_reuse(self, server: _StubServer) -> None:
+        pool = ConnectionPool()
+        try:
+            for key in ("HOST", "PORT", "NOPE"):
+                pool.get(_url(server).replace("{key}", key), {})
+        finally:
+            pool.close()
+
+        assert pool.opened == 1
+        assert server.connections == 1
+        assert len(server.requests) == 3
+
+    def test_keys_of_rendered_input(self, tmp_path: Path) -> None:
+        """Keys only rendered text uses are fetched when they are found."""
+        from click.testing import CliRunner
+
+        from sync_var.cli import root
+        from sync_var.engine import Engine
+
+        log = tmp_path / "calls.log"
+        script = (
+            "import sys; "
+            f"open({str(log)!r}, 'a').write(sys.argv[1] + ' '); "
+            "print('s3cret')"
+        )
+        command = shlex.join([sys.executable, "-c", script]) + " {key}"
+        (tmp_path / "master.env").write_text("HOST=example.com\n")
+        (tmp_path / "app.env").write_text('# [sync-var] "HOST={{ HOST }}"\nHOST=old\n')
+        config_file = tmp_path / "sync-var.yaml"
+        config_file.write_text(
+            "master_files:\n"
+            "  default: master.env\n"
+            f"  vault:\n    command: {json.dumps(command)}\n"
+            "target_files:\n  - app.env\n"
+        )
+        text = (
+            '# [sync-var] "A={{ vault.DB_PASS }}"\nA=\n'
+            '# [sync-var] "B={{ vault.DB_PASS }}"\nB=\n'
+        )
+
+        engine = Engine(config_file)
+        assert "DB_PASS" not in log.read_text().split()
+        assert engine.render_text(text) == text.replace("=\n", "=s3cret\n")
+        # Asked once per render, and not kept for later renders
+        assert log.read_text().split().count("DB_PASS") == 1
+        assert ("vault", "DB_PASS") not in engine._lookups[engine.config.marker]
+
+        result = CliRunner().invoke(
+            root, ["render", "--stdin", "-c", str(config_file)], input=text
+        )
+        assert result.exit_code == 0, result.output
+        assert result.output == text.replace("=\n", "=s3cret\n")
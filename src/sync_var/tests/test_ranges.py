@@ -0,0 +1,202 @@
+from pathlib import Path
+
+import pytest
+
+from sync_var.parse_master_var import parse_master_vars
+from sync_var.parse_target_var import _parse_target_file, parse_target_files
+from sync_var.plan import apply_plan, build_plan
+from sync_var.replace import replace
+from sync_var.save import save_changed_target_file
+
+MASTER = """\
+HOST: example.com
+CERT: |
+  -----BEGIN CERT-----
+  AAAA
+  -----END CERT-----
+"""
+
+
+def _sync(tmp_path: Path, target: Path) -> None:
+    (tmp_path / "master.yaml").write_text(MASTER)
+    master_vars = parse_master_vars({"default": tmp_path / "master.yaml"})
+    target_files = parse_target_files({target}, "[sync-var]", master_vars)
+    replace(target_files, master_vars)
+    save_changed_target_file(target_files[0], create_backup=False)
+
+
+class TestCommentBlocks:
+    """Tests for directives in block comments."""
+
+    def test_block_directives(self, tmp_path: Path) -> None:
+        """A directive in a block governs the line after the block."""
+        path = tmp_path / "config.h"
+        path.write_text(
+            "/*\n"
+            ' * [sync-var] "#define HOST \\"{{ HOST }}\\""\n'
+            " */\n"
+            '#define HOST "old"\n'
+            '/** [sync-var] "host = {{ HOST }}" */\n'
+            "host = old\n"
+            '// [sync-var] "h = {{ HOST }}"\n'
+            "h = old\n"
+        )
+
+        target_lines = _parse_target_file(path, "[sync-var]")
+
+        assert [
+            (tl.marker_line_number, tl.target_line_number, tl.raw_target_line)
+            for tl in target_lines
+        ] == [(2, 4, '#define HOST "old"'), (5, 6, "host = old"), (7, 8, "h = old")]
+
+    def test_html_block(self, tmp_path: Path) -> None:
+        """A closer inside the template does not end the block."""
+        path = tmp_path / "index.html"
+        path.write_text(
+            '<!--\n  [sync-var] "<a title=\\"-->\\">{{ HOST }}</a>"\n-->\n<a>old</a>\n'
+        )
+
+        _sync(tmp_path, path)
+
+        assert path.read_text().endswith('<a title="-->">example.com</a>\n')
+
+    def test_block_errors(self, tmp_path: Path) -> None:
+        """Blocks with several directives are rejected."""
+        path = tmp_path / "index.html"
+        path.write_text('<!--\n[sync-var] "{{ HOST }}"\n[sync-var] "{{ HOST }}"\n-->\n')
+        with pytest.raises(ValueError, match="more than one directive"):
+            _parse_target_file(path, "[sync-var]")
+
+    def test_unclosed_block(self, tmp_path: Path) -> None:
+        """An opener that is never closed is plain text."""
+        path = tmp_path / "index.html"
+        path.write_text('<!-- [sync-var] "{{ HOST }}"\nold\n<!-- x\n')
+
+        assert [
+            tl.raw_target_line for tl in _parse_target_file(path, "[sync-var]")
+        ] == ["old"]
+
+        path = tmp_path / "app.js"
+        path.write_text('/* x\n// [sync-var] "h = {{ HOST }}"\nh = old\n')
+
+        assert [
+            tl.raw_target_line for tl in _parse_target_file(path, "[sync-var]")
+        ] == ["h = old"]
+
+    @pytest.mark.parametrize("opener", ["/*.log", "<!-- note"])
+    def test_no_blocks_without_profile(self, tmp_path: Path, opener: str) -> None:
+        """Files matching no profile have no block comments."""
+        path = tmp_path / "notes.txt"
+        path.write_text(f'{opener}\n# [sync-var] "{{{{ HOST }}}}"\nold\n*/\n-->\n')
+
+        assert [
+            tl.target_line_number for tl in _parse_target_file(path, "[sync-var]")
+        ] == [3]
+
+    def test_blocks_need_block_syntax(self, tmp_path: Path) -> None:
+        """Files without block comments keep line-by-line markers."""
+        path = tmp_path / "app.env"
+        path.write_text('/*\n# [sync-var] "HOST={{ HOST }}"\nHOST=old\n')
+
+        assert [
+            tl.target_line_number for tl in _parse_target_file(path, "[sync-var]")
+        ] == [3]
+
+
+class TestRanges:
+    """Tests for directives governing several lines."""
+
+    def test_region(self, tmp_path: Path) -> None:
+        """A region is replaced up to its end marker and stays stable."""
+        path = tmp_path / "tls.yaml"
+        path.write_text(
+            "tls:\n"
+            '  # [sync-var] "{{ CERT }}" begin\n'
+            "  old\n"
+            "  # [sync-var] end\n"
+            '  # [sync-var] "host: {{ HOST }}"\n'
+            "  host: old\n"
+        )
+        expected = (
+            "tls:\n"
+            '  # [sync-var] "{{ CERT }}" begin\n'
+            "  -----BEGIN CERT-----\n"
+            "  AAAA\n"
+            "  -----END CERT-----\n"
+            "  # [sync-var] end\n"
+            '  # [sync-var] "host: {{ HOST }}"\n'
+            "  host: example.com\n"
+        )
+
+        _sync(tmp_path, path)
+        assert path.read_text() == expected
+
+        _sync(tmp_path, path)
+        assert path.read_text() == expected
+
+    def test_empty_region_and_plan(self, tmp_path: Path) -> None:
+        """Plans fill empty regions and replace fixed ranges."""
+        path = tmp_path / "certs.txt"
+        path.write_text(
+            '# [sync-var] "{{ CERT }}" lines=3\n'
+            "a\nb\nc\n"
+            '# [sync-var] "{{ CERT }}" begin\n'
+            "# [sync-var] end\n"
+        )
+        (tmp_path / "master.yaml").write_text(MASTER)
+        master_vars = parse_master_vars({"default": tmp_path / "master.yaml"})
+        target_files = parse_target_files({path}, "[sync-var]", master_vars)
+        replace(target_files, master_vars)
+
+        plan = build_plan(target_files, tmp_path)
+        assert [(e.line, e.count) for e in plan.files[0].edits] == [(2, 3), (6, 0)]
+
+        apply_plan(plan, create_backup=False)
+        cert = "-----BEGIN CERT-----\nAAAA\n-----END CERT-----\n"
+        assert path.read_text() == (
+            f'# [sync-var] "{{{{ CERT }}}}" lines=3\n{cert}'
+            f'# [sync-var] "{{{{ CERT }}}}" begin\n{cert}# [sync-var] end\n'
+        )
+
+    @pytest.mark.parametrize(
+        "content, message",
+        [
+            ('# [sync-var] "{{ CERT }}" begin\nold\n', "line 1 has no end marker"),
+            ("# [sync-var] end\n", "End marker at line 1 has no range"),
+            ('# [sync-var] "{{ CERT }}" lines=3\na\n', "runs past the end"),
+            (
+                '# [sync-var] "{{ CERT }}" lines=2\na\n# [sync-var] "{{ HOST }}"\n',
+                "Marker at line 3 is inside a range",
+            ),
+        ],
+    )
+    def test_range_errors(self, tmp_path: Path, content: str, message: str) -> None:
+        path = tmp_path / "target.txt"
+        path.write_text(content)
+
+        with pytest.raises(ValueError, match=message):
+            _parse_target_file(path, "[sync-var]")
+
+    def test_fixed_range_line_count(self, tmp_path: Path) -> None:
+        """A range of N lines must render N lines."""
+        path = tmp_path / "target.txt"
+        path.write_text('# [sync-var] "{{ CERT }}" lines=2\na\nb\n')
+
+        with pytest.raises(ValueError, match="renders 3 lines, but its range has 2"):
+            _sync(tmp_path, path)
+
+    def test_blank_first_line(self, tmp_path: Path) -> None:
+        """A blank first governed line gives no indentation to the value."""
+        cert = "-----BEGIN CERT-----\nAAAA\n-----END CERT-----\n"
+        path = tmp_path / "target.txt"
+        path.write_text('# [sync-var] "{{ CERT }}" lines=3\n\n  b\n  c\n')
+
+        _sync(tmp_path, path)
+        assert path.read_text() == f'# [sync-var] "{{{{ CERT }}}}" lines=3\n{cert}'
+
+        path.write_text('# [sync-var] "{{ CERT }}" begin\n\n  old\n# [sync-var] end\n')
+
+        _sync(tmp_path, path)
+        assert path.read_text() == (
+            f'# [sync-var] "{{{{ CERT }}}}" begin\n{cert}# [sync-var] end\n'
+        )
@@ -0,0 +1,111 @@
+import json
+import shlex
+import sys
+from pathlib import Path
+from textwrap import dedent
+
+from sync_var.config import load_config
+from sync_var.markers import load_marker_groups
+from sync_var.parse_target_var import parse_marker_groups
+from sync_var.providers import load_master_vars
+from sync_var.report import UsageReport, build_report
+
+
+def _report(config_file: Path) -> UsageReport:
+    config = load_config(config_file)
+    groups = load_marker_groups(config, load_master_vars(config))
+    target_files = parse_marker_groups(groups, validate=False)
+    return build_report(config, groups, target_files)
+
+
+def test_build_report(tmp_path: Path) -> None:
+    """Unused, missing, unresolved and invalid entries are reported."""
+    (tmp_path / "default.env").write_text("API_KEY=a\nUNUSED=b\n")
+    (tmp_path / "prod.env").write_text("API_KEY=c\n")
+    (tmp_path / "staging.env").write_text("OTHER=d\n")
+    (tmp_path / "target.env").write_text(
+        dedent(
+            """\
+            # [sync-var] "KEY={{ API_KEY }}:{{ prod.MISSING }}"
+            KEY=
+            # [sync-var] no quotes
+            X=
+            """
+        )
+    )
+    config_file = tmp_path / "sync-var.yaml"
+    config_file.write_text(
+        dedent(
+            """\
+            master_files:
+              default: default.env
+              prod: prod.env
+              staging: staging.env
+            target_files:
+              - target.env
+            """
+        )
+    )
+
+    report = _report(config_file)
+
+    assert report.unused == {
+        "default": ["UNUSED"],
+        "prod": ["API_KEY"],
+        "staging": ["OTHER"],
+    }
+    assert report.missing == {
+        "API_KEY": ["staging"],
+        "MISSING": ["default", "prod", "staging"],
+    }
+    assert report.unresolved == [
+        {
+            "file": str(tmp_path / "target.env"),
+            "line": 1,
+            "env": "prod",
+            "key": "MISSING",
+        }
+    ]
+    assert [entry["line"] for entry in report.invalid] == [3]
+    assert report.has_issues
+    assert "markers" not in report.to_dict()
+
+
+def test_markers_and_providers(tmp_path: Path) -> None:
+    """Each marker is checked against its own masters, providers included."""
+    command = shlex.join([sys.executable, "-c", "print('v')", "{key}"])
+    (tmp_path / "default.env").write_text("HOST=h\n")
+    (tmp_path / "secrets.env").write_text("TOKEN=t\nSTALE=s\n")
+    (tmp_path / "target.env").write_text(
+        '# [sync-var] "H={{ HOST }}"\nH=\n# [secrets] "T={{ TOKEN }}:{{ NOPE }}"\nT=\n'
+    )
+    config_file = tmp_path / "sync-var.yaml"
+    config_file.write_text(
+        dedent(
+            f"""\
+            master_files:
+              default: default.env
+              prod:
+                command: {json.dumps(command)}
+            target_files:
+              - target.env
+            markers:
+              "[secrets]":
+                master_files: secrets.env
+                target_files:
+                  - target.env
+            """
+        )
+    )
+
+    report = _report(config_file)
+
+    # Provider environments are reported like master files
+    assert report.unused == {"prod": ["HOST"]}
+    assert report.missing == {}
+    assert report.unresolved == []
+    secrets = report.markers["[secrets]"]
+    assert secrets.unused == {"default": ["STALE"]}
+    assert [entry["key"] for entry in secrets.unresolved] == ["NOPE"]
+    assert report.has_issues
+    assert report.to_dict()["markers"]["[secrets]"]["unused"] == {"default": ["STALE"]}
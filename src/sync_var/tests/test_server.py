@@ -0,0 +1,119 @@
+import threading
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from sync_var.client import request_server
+from sync_var.server import SyncVarServer, WarmState, handle_request
+
+
+@pytest.fixture
+def config_file(tmp_path: Path) -> Path:
+    (tmp_path / "master.env").write_text("API_KEY=key\n")
+    (tmp_path / "target.env").write_text('# [sync-var] "KEY={{ API_KEY }}"\nKEY=\n')
+    config_file = tmp_path / "sync-var.yaml"
+    config_file.write_text(
+        dedent(
+            """\
+            master_files: master.env
+            target_files:
+              - target.env
+            """
+        )
+    )
+    return config_file
+
+
+class TestHandleRequest:
+    """Tests for commands run against warm state."""
+
+    def test_sync_and_cache_invalidation(
+        self, config_file: Path, tmp_path: Path
+    ) -> None:
+        """Cached masters are re-parsed after they change on disk."""
+        state = WarmState()
+        request = {
+            "command": "sync",
+            "config_path": str(config_file),
+            "options": {"no_backup": True},
+        }
+
+        response = handle_request(state, request)
+        assert response["exit_code"] == 0
+        assert "Updated" in response["output"]
+        assert (tmp_path / "target.env").read_text().endswith("KEY=key\n")
+
+        (tmp_path / "master.env").write_text("API_KEY=rotated\n")
+        handle_request(state, request)
+        assert (tmp_path / "target.env").read_text().endswith("KEY=rotated\n")
+
+    def test_sync_skipped_when_unchanged(
+        self, config_file: Path, tmp_path: Path
+    ) -> None:
+        """As locally, a sync with no changed input writes nothing."""
+        state = WarmState()
+        request = {
+            "command": "sync",
+            "config_path": str(config_file),
+            "options": {"no_backup": True},
+        }
+
+        handle_request(state, request)
+        target_mtime = (tmp_path / "target.env").stat().st_mtime_ns
+        response = handle_request(state, request)
+
+        assert response["output"] == "No changes since the last sync.\n"
+        assert (tmp_path / "target.env").stat().st_mtime_ns == target_mtime
+
+    def test_validate_reuses_parsed_files(self, config_file: Path) -> None:
+        """Unchanged files are served from the cache."""
+        state = WarmState()
+        request = {"command": "validate", "config_path": str(config_file)}
+
+        handle_request(state, request)
+        misses = state.parse_cache.misses
+        response = handle_request(state, request)
+
+        assert response == {
+            "exit_code": 0,
+            "output": "Validation completed successfully.\n",
+        }
+        assert state.parse_cache.misses == misses
+        assert state.parse_cache.hits > 0
+
+    def test_errors_are_reported(self, config_file: Path) -> None:
+        """Errors produce a failing exit code and message."""
+        response = handle_request(WarmState(), {"command": "unknown"})
+
+        assert response["exit_code"] == 1
+        assert "Unknown command" in response["output"]
+
+
+def test_request_over_socket(
+    config_file: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """The CLI client talks to a running server over its Unix socket."""
+    monkeypatch.delenv("SYNC_VAR_NO_SERVER", raising=False)
+    socket_path = tmp_path / "sync-var.sock"
+    server = SyncVarServer(socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        assert socket_path.stat().st_mode & 0o777 == 0o600
+        response = request_server("validate", str(config_file), socket_path=socket_path)
+
+        # A socket others can write to may not be ours; the CLI runs locally
+        socket_path.chmod(0o666)
+        assert (
+            request_server("validate", str(config_file), socket_path=socket_path)
+            is None
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert response is not None
+    assert response["exit_code"] == 0
+    assert not socket_path.exists()
+    assert request_server("validate", str(config_file), socket_path=socket_path) is None
@@ -0,0 +1,56 @@
+from pathlib import Path
+
+import pytest
+
+from sync_var.parse_master_var import parse_master_vars
+from sync_var.parse_target_var import parse_target_files
+from sync_var.shard import parse_shard, select_shard, shard_of
+
+
+class TestShard:
+    """Tests for deterministic sharding of target files."""
+
+    def test_parse_shard(self) -> None:
+        """INDEX/COUNT is parsed with a 1-based index."""
+        assert parse_shard("2/4") == (2, 4)
+
+    @pytest.mark.parametrize("value", ["0/4", "5/4", "1/0", "1", "a/b", "1/2/3"])
+    def test_invalid_shard(self, value: str) -> None:
+        """Out-of-range or malformed shards are rejected."""
+        with pytest.raises(ValueError, match="Invalid shard"):
+            parse_shard(value)
+
+    def test_shards_partition_targets(self, tmp_path: Path) -> None:
+        """Every target belongs to exactly one shard."""
+        paths = {tmp_path / f"dir{i % 7}" / f"target{i}.env" for i in range(100)}
+
+        shards = [select_shard(paths, tmp_path, (i, 3)) for i in (1, 2, 3)]
+
+        assert set().union(*shards) == paths
+        assert sum(len(shard) for shard in shards) == len(paths)
+        assert all(shards)
+
+    def test_assignment_is_relative_to_base(self, tmp_path: Path) -> None:
+        """Checkouts in different directories agree on the assignment."""
+        a, b = tmp_path / "a", tmp_path / "b"
+        for i in range(20):
+            name = f"services/s{i}/app.env"
+            assert shard_of(a / name, a, 4) == shard_of(b / name, b, 4)
+
+    def test_parse_order_is_deterministic(self, tmp_path: Path) -> None:
+        """Target files are parsed and reported in path order."""
+        master_file = tmp_path / "master.env"
+        master_file.write_text("API_KEY=key\n")
+        paths = set()
+        for name in ["c.env", "a.env", "b.env"]:
+            path = tmp_path / name
+            path.write_text('# [sync-var] "K={{ MISSING }}"\nK=\n')
+            paths.add(path)
+
+        with pytest.raises(ValueError) as excinfo:
+            parse_target_files(
+                paths, "[sync-var]", parse_master_vars({"default": master_file})
+            )
+
+        message = str(excinfo.value)
+        assert message.index("a.env") < message.index("b.env") < message.index("c.env")
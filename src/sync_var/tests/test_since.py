@@ -0,0 +1,74 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from sync_var.config import load_config
+from sync_var.index import load_index
+from sync_var.parse_master_var import parse_master_vars
+from sync_var.since import select_changed_targets
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git not found")
+
+
+def _git(repo: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    (tmp_path / "master.env").write_text("API_KEY=key\nDB_HOST=db\n")
+    (tmp_path / "api.conf").write_text('# [sync-var] "KEY={{ API_KEY }}"\nKEY=key\n')
+    (tmp_path / "db.conf").write_text('# [sync-var] "HOST={{ DB_HOST }}"\nHOST=db\n')
+    (tmp_path / "plain.conf").write_text("PLAIN=1\n")
+    (tmp_path / "sync-var.yaml").write_text(
+        "master_files: master.env\ntarget_files: ['*.conf']\n"
+    )
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "add", "-A")
+    _git(
+        tmp_path,
+        "-c",
+        "user.name=test",
+        "-c",
+        "user.email=test@example.com",
+        "commit",
+        "-qm",
+        "init",
+    )
+    return tmp_path
+
+
+def _select(repo: Path, ref: str = "HEAD"):
+    config = load_config(repo / "sync-var.yaml")
+    master_vars = parse_master_vars(config.master_files)
+    return select_changed_targets(
+        config, master_vars, ref, load_index(config), config.target_files
+    )
+
+
+class TestSelectChangedTargets:
+    """Tests for git-aware target selection."""
+
+    def test_nothing_changed(self, repo: Path) -> None:
+        """Without changes no target is selected."""
+        assert _select(repo) == set()
+
+    def test_changed_and_untracked_targets(self, repo: Path) -> None:
+        """Modified and untracked targets are selected."""
+        (repo / "plain.conf").write_text("PLAIN=2\n")
+        (repo / "new.conf").write_text("NEW=1\n")
+
+        assert _select(repo) == {repo / "plain.conf", repo / "new.conf"}
+
+    def test_changed_master_key(self, repo: Path) -> None:
+        """Only targets using changed master keys are selected."""
+        (repo / "master.env").write_text("API_KEY=new\nDB_HOST=db\n")
+
+        assert _select(repo) == {repo / "api.conf"}
+
+    def test_unknown_ref(self, repo: Path) -> None:
+        """Unknown revisions are reported clearly."""
+        with pytest.raises(ValueError, match="Unknown git revision: missing"):
+            _select(repo, "missing")
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from sync_var.config import load_config
+from sync_var.parse_target_var import _parse_target_file
+from sync_var.sniff import SNIFF_SIZE, sniff_target_file
+
+
+class TestSniffTargetFile:
+    """Tests for the cheap pre-scan of candidate target files."""
+
+    def test_text_file(self, tmp_path: Path) -> None:
+        """Text files pass the pre-scan."""
+        path = tmp_path / "app.env"
+        path.write_text("KEY=value\n")
+
+        assert sniff_target_file(path, 1024) is None
+
+    def test_binary_file(self, tmp_path: Path) -> None:
+        """A NUL byte in the first block marks the file as binary."""
+        path = tmp_path / "logo.png"
+        path.write_bytes(b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR")
+
+        assert sniff_target_file(path, 1024) == "binary content"
+
+    def test_only_first_block_is_read(self, tmp_path: Path) -> None:
+        """Content after the first block is not inspected."""
+        path = tmp_path / "data.txt"
+        path.write_bytes(b"a" * SNIFF_SIZE + b"\0")
+
+        assert sniff_target_file(path, 2 * SNIFF_SIZE) is None
+
+    def test_oversized_file(self, tmp_path: Path) -> None:
+        """Files above the size limit are rejected."""
+        path = tmp_path / "dump.sql"
+        path.write_text("x" * 100)
+
+        assert sniff_target_file(path, 10) == "larger than 10 bytes"
+
+    def test_file_without_marker(self, tmp_path: Path) -> None:
+        """Files without the marker are not split into lines."""
+        path = tmp_path / "app.env"
+        path.write_text("# plain comment\nKEY=value\n")
+
+        assert _parse_target_file(path, "[sync-var]") == []
+
+    def test_patterns_skip_rejected_files(self, tmp_path: Path) -> None:
+        """Binary and oversized pattern matches are not targets."""
+        (tmp_path / "master.env").touch()
+        (tmp_path / "a.conf").write_text("KEY=value\n")
+        (tmp_path / "b.conf").write_bytes(b"\0\1\2")
+        (tmp_path / "c.conf").write_text("x" * 100)
+        config_file = tmp_path / "sync-var.yaml"
+        config_file.write_text(
+            "master_files: master.env\ntarget_files: ['*.conf']\nmax_file_size: 50\n"
+        )
+
+        config = load_config(config_file)
+
+        assert config.target_files == {tmp_path / "a.conf"}
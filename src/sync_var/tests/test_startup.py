@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+import pytest
+
+# Third-party and stdlib modules that only the commands doing real work need.
+HEAVY_MODULES = ["rich", "halo", "yaml", "dotenv", "multiprocessing"]
+
+# Cumulative import time budget of sync_var.cli, generous enough for slow CI.
+BUDGET_MS = int(os.environ.get("SYNC_VAR_STARTUP_BUDGET_MS", "300"))
+
+
+def _import_times(args: List[str]) -> Dict[str, int]:
+    """Run the CLI under `-X importtime`, returning cumulative us per module."""
+    code = (
+        "from sync_var.cli import root; "
+        f"root({args!r}, prog_name='sync-var', standalone_mode=False)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("args", [[], ["--help"], ["--version"], ["sync", "--help"]])
+def test_fast_start_skips_heavy_imports(args: List[str]) -> None:
+    """Help and version output do not import parser or rendering backends."""
+    times = _import_times(args)
+
+    assert "sync_var.cli" in times
+    assert [m for m in HEAVY_MODULES if m in times] == []
+
+
+def test_cli_import_budget() -> None:
+    """Importing the CLI stays within the cold-start budget."""
+    times = _import_times(["--help"])
+
+    assert times["sync_var.cli"] / 1000 < BUDGET_MS
@@ -0,0 +1,137 @@
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import pytest
+
+from sync_var.comments import DEFAULT_PREFIXES, DEFAULT_PROFILES, CommentProfiles
+from sync_var.parse_master_var import parse_master_vars
+from sync_var.parse_target_var import parse_target_files
+from sync_var.replace import replace
+from sync_var.save import save_changed_target_file
+from sync_var.stream import StreamRenderer
+
+TARGET = (
+    "a\r\n"
+    '# [sync-var] "HOST={{ HOST }}"\r\n'
+    "HOST=old\r\n"
+    "/*\n"
+    ' * [sync-var] "{{ CERT }}" begin\n'
+    " */\n"
+    "  old1\n"
+    "  old2\n"
+    "// [sync-var] end\n"
+    '<!-- [sync-var] "{{ CERT }}" lines=2 -->\n'
+    "x\n"
+    "y\n"
+    "tail"
+)
+
+# Comment blocks are only scanned for files matching a profile
+PROFILES = CommentProfiles({"*.txt": ["#", "//", "<!--"]})
+
+
+@pytest.fixture
+def master_vars(tmp_path: Path):
+    (tmp_path / "master.yaml").write_text(
+        "HOST: example.com\nCERT: |\n  BEGIN\n  END\n"
+    )
+    return parse_master_vars({"default": tmp_path / "master.yaml"})
+
+
+def _render(
+    master_vars, lines: Iterable[str], prefixes: Tuple[str, ...] = DEFAULT_PREFIXES
+) -> str:
+    renderer = StreamRenderer({"[sync-var]": master_vars}, prefixes)
+    return "".join(renderer.render(lines))
+
+
+class TestStreamRenderer:
+    """Tests for rendering a stream of lines."""
+
+    @pytest.mark.parametrize("profiles", [None, PROFILES])
+    def test_same_output_as_sync(
+        self, tmp_path: Path, master_vars, profiles: Optional[CommentProfiles]
+    ) -> None:
+        """Streams render exactly like target files on disk."""
+        path = tmp_path / "target.txt"
+        path.write_bytes(TARGET.encode())
+        target_files = parse_target_files(
+            {path}, "[sync-var]", master_vars, comment_profiles=profiles
+        )
+        replace(target_files, master_vars)
+        save_changed_target_file(target_files[0], create_backup=False)
+
+        prefixes = (profiles or DEFAULT_PROFILES).prefixes_for(path)
+        rendered = _render(master_vars, TARGET.splitlines(keepends=True), prefixes)
+
+        # Files are rewritten with "\n", streams keep their line endings
+        assert rendered.replace("\r\n", "\n") == path.read_text()
+        assert rendered.startswith("a\r\n# [sync-var]")
+
+    def test_output_per_line(self, master_vars) -> None:
+        """Output is produced as lines arrive; governed lines are not held."""
+        renderer = StreamRenderer({"[sync-var]": master_vars}, ("#",))
+
+        assert renderer.feed("a\n") == ["a\n"]
+        assert renderer.feed('# [sync-var] "{{ CERT }}" begin\n') == [
+            '# [sync-var] "{{ CERT }}" begin\n'
+        ]
+        assert renderer.feed("old\n") == ["BEGIN\n", "END\n"]
+        assert renderer.feed("old\n") == []
+        assert renderer.feed("# [sync-var] end\n") == ["# [sync-var] end\n"]
+        renderer.close()
+
+    def test_large_region(self, master_vars) -> None:
+        """The lines of a region are not kept while it is scanned."""
+        renderer = StreamRenderer({"[sync-var]": master_vars}, ("#",))
+        output = renderer.feed('# [sync-var] "{{ CERT }}" begin\n')
+        longest = 0
+        for i in range(20000):
+            output += renderer.feed(f"  line {i}\n")
+            longest = max(longest, len(renderer._scanner.text))
+        output += renderer.feed("# [sync-var] end\n")
+        output += renderer.close()
+
+        assert longest < 20
+        assert output == [
+            '# [sync-var] "{{ CERT }}" begin\n',
+            "  BEGIN\n",
+            "  END\n",
+            "# [sync-var] end\n",
+        ]
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            '<!-- x\n# [sync-var] "HOST={{ HOST }}"\nHOST=old\n',
+            'a\n<!-- [sync-var] "HOST={{ HOST }}"\n',
+        ],
+    )
+    def test_held_lines(self, tmp_path: Path, master_vars, content: str) -> None:
+        """Unclosed blocks and markers on the last line render like files."""
+        path = tmp_path / "target.txt"
+        path.write_text(content)
+        target_files = parse_target_files(
+            {path}, "[sync-var]", master_vars, comment_profiles=PROFILES
+        )
+        replace(target_files, master_vars)
+        save_changed_target_file(target_files[0], create_backup=False)
+
+        lines = content.splitlines(keepends=True)
+        rendered = _render(master_vars, lines, PROFILES.prefixes_for(path))
+
+        assert rendered == path.read_text()
+        assert "HOST=example.com\n" in rendered
+
+    @pytest.mark.parametrize(
+        "lines, message",
+        [
+            (['# [sync-var] "{{ CERT }}" begin\n', "x\n"], "has no end marker"),
+            (['# [sync-var] "{{ CERT }}" lines=2\n', "x\n"], "runs past the end"),
+            (["# [sync-var] end\n"], "has no range"),
+            (['# [sync-var] "{{ NOPE }}"\n'], "'NOPE'"),
+        ],
+    )
+    def test_errors(self, master_vars, lines: List[str], message: str) -> None:
+        with pytest.raises(ValueError, match=message):
+            _render(master_vars, lines)
@@ -0,0 +1,65 @@
+import json
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+from sync_var import replace as replace_module
+from sync_var.parse_master_var import parse_master_vars
+from sync_var.parse_target_var import parse_target_files
+from sync_var.replace import replace
+from sync_var.trace import is_tracing, trace_to
+
+
+def _sync(tmp_path: Path) -> Path:
+    master_file = tmp_path / "master.env"
+    master_file.write_text("API_KEY=secret\n")
+    target = tmp_path / "target.conf"
+    target.write_text(
+        '# [sync-var] "key = {{ API_KEY }}"\nkey = old\n'
+        '# [sync-var] "other = {{ prod.API_KEY }}"\nother = old\n'
+    )
+
+    master_vars = parse_master_vars({"default": master_file})
+    target_files = parse_target_files(
+        {target}, "[sync-var]", master_vars, validate=False
+    )
+    replace(target_files, master_vars)
+    return target
+
+
+class TestTrace:
+    """Tests for structured debug events."""
+
+    def test_no_events_when_disabled(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Without verbose logging or a trace file no event is built."""
+        events: List[Any] = []
+        monkeypatch.setattr(
+            replace_module, "trace_event", lambda *args, **kw: events.append(args)
+        )
+
+        assert not is_tracing()
+        _sync(tmp_path)
+
+        assert events == []
+
+    def test_writes_json_lines(self, tmp_path: Path) -> None:
+        """Events carry the stage, file, line and keys."""
+        trace_file = tmp_path / "trace" / "events.jsonl"
+
+        with trace_to(trace_file):
+            assert is_tracing()
+            target = _sync(tmp_path)
+        assert not is_tracing()
+
+        events = [json.loads(line) for line in trace_file.read_text().splitlines()]
+        assert [(e["stage"], e["event"], e["line"]) for e in events] == [
+            ("parse", "marker", 1),
+            ("parse", "marker", 3),
+            ("replace", "rendered", 1),
+            ("replace", "unresolved", 3),
+        ]
+        assert {e["file"] for e in events} == {str(target)}
+        assert events[3]["keys"] == ["prod.API_KEY"]
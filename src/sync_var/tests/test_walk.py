@@ -0,0 +1,112 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from sync_var.config import load_config
+from sync_var.walk import DirectoryWalker, expand_target_patterns
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> Path:
+    for name in [
+        "services/api/config.yaml",
+        "services/api/.env.dev",
+        "services/web/config.yaml",
+        "services/web/app.env.dev",
+        "services/web/app.env.dev.bak.20240101120000",
+        "services/web/node_modules/pkg/app.env.dev",
+        "services/build/out/app.env.dev",
+        "docs/config.yaml",
+    ]:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".gitignore").write_text("# generated\nbuild/\n")
+    return tmp_path
+
+
+def _names(paths, root: Path):
+    return sorted(path.relative_to(root).as_posix() for path in paths)
+
+
+class TestDirectoryWalker:
+    """Tests for glob expansion of target patterns."""
+
+    def test_single_level_wildcard(self, tree: Path) -> None:
+        """A wildcard matches one directory level."""
+        matches = DirectoryWalker().expand("services/*/config.yaml", tree)
+
+        assert _names(matches, tree) == [
+            "services/api/config.yaml",
+            "services/web/config.yaml",
+        ]
+
+    def test_recursive_wildcard_prunes_ignored(self, tree: Path) -> None:
+        """Ignored directories and backups are skipped by "**"."""
+        matches = DirectoryWalker().expand("**/*.env.*", tree)
+
+        assert _names(matches, tree) == ["services/web/app.env.dev"]
+
+    def test_dotfiles_need_explicit_dot(self, tree: Path) -> None:
+        """Like glob, wildcards only match dotfiles when the dot is written."""
+        matches = DirectoryWalker().expand("**/.env.*", tree)
+
+        assert _names(matches, tree) == ["services/api/.env.dev"]
+
+    def test_listings_are_shared(self, tree: Path, monkeypatch) -> None:
+        """Patterns expanded by one walker list each directory once."""
+        scanned = []
+        scandir = os.scandir
+
+        def counting_scandir(path):
+            scanned.append(path)
+            return scandir(path)
+
+        monkeypatch.setattr(os, "scandir", counting_scandir)
+        matches = expand_target_patterns(
+            ["services/*/config.yaml", "**/config.yaml"], tree
+        )
+
+        assert len(matches) == 3
+        assert len(scanned) == len(set(scanned))
+
+
+class TestConfigPatterns:
+    """Tests for target patterns in the configuration."""
+
+    def test_patterns_and_explicit_paths(self, tree: Path) -> None:
+        """Patterns are expanded next to explicit target files."""
+        (tree / "master.env").touch()
+        config_file = tree / "sync-var.yaml"
+        config_file.write_text(
+            "master_files: master.env\n"
+            "target_files:\n"
+            "  - docs/config.yaml\n"
+            "  - services/*/config.yaml\n"
+        )
+
+        config = load_config(config_file)
+
+        assert _names(config.target_files, tree) == [
+            "docs/config.yaml",
+            "services/api/config.yaml",
+            "services/web/config.yaml",
+        ]
+
+    def test_refresh_picks_up_new_files(self, tree: Path) -> None:
+        """Refreshing re-expands patterns."""
+        (tree / "master.env").touch()
+        config_file = tree / "sync-var.yaml"
+        config_file.write_text(
+            "master_files: master.env\ntarget_files: ['services/*/config.yaml']\n"
+        )
+        config = load_config(config_file)
+        assert len(config.target_files) == 2
+
+        (tree / "services/new").mkdir()
+        (tree / "services/new/config.yaml").touch()
+        config.refresh_target_files()
+
+        assert len(config.target_files) == 3
@@ -0,0 +1,95 @@
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from sync_var.config import load_config
+from sync_var.watch import PollingWatcher, WatchSession
+
+
+@pytest.fixture
+def session(tmp_path: Path) -> WatchSession:
+    (tmp_path / "master.env").write_text("API_KEY=old\nDB_HOST=db\n")
+    (tmp_path / "api.env").write_text('# [sync-var] "KEY={{ API_KEY }}"\nKEY=\n')
+    (tmp_path / "db.env").write_text('# [sync-var] "HOST={{ DB_HOST }}"\nHOST=\n')
+    config_file = tmp_path / "sync-var.yaml"
+    config_file.write_text(
+        dedent(
+            """\
+            master_files: master.env
+            target_files:
+              - api.env
+              - db.env
+            """
+        )
+    )
+    session = WatchSession(load_config(config_file, no_backup=True))
+    session.load()
+    return session
+
+
+class TestWatchSession:
+    """Tests for incremental re-sync."""
+
+    def test_master_change_rewrites_dependent_targets(
+        self, session: WatchSession, tmp_path: Path
+    ) -> None:
+        """Only targets depending on changed keys are written."""
+        db_mtime = (tmp_path / "db.env").stat().st_mtime_ns
+        (tmp_path / "master.env").write_text("API_KEY=new\nDB_HOST=db\n")
+
+        logs = session.handle({tmp_path / "master.env"})
+
+        assert len(logs) == 1
+        assert (tmp_path / "api.env").read_text().endswith("KEY=new\n")
+        assert (tmp_path / "db.env").stat().st_mtime_ns == db_mtime
+
+    def test_target_change_is_resynced(
+        self, session: WatchSession, tmp_path: Path
+    ) -> None:
+        """An edited target is re-parsed and rendered."""
+        (tmp_path / "db.env").write_text('# [sync-var] "DB={{ DB_HOST }}"\nDB=\n')
+
+        session.handle({tmp_path / "db.env"})
+
+        assert (tmp_path / "db.env").read_text().endswith("DB=db\n")
+
+    def test_unchanged_output_is_not_written(
+        self, session: WatchSession, tmp_path: Path
+    ) -> None:
+        """Files whose rendered content is unchanged are left alone."""
+        assert session.handle({tmp_path / "api.env", tmp_path / "db.env"}) == []
+
+
+def test_providers_rejected(tmp_path: Path) -> None:
+    """Provider values cannot be watched, so they are refused up front."""
+    (tmp_path / "master.env").write_text("HOST=db\n")
+    (tmp_path / "app.env").write_text('# [sync-var] "HOST={{ vault.HOST }}"\nHOST=\n')
+    config_file = tmp_path / "sync-var.yaml"
+    config_file.write_text(
+        dedent(
+            """\
+            master_files:
+              default: master.env
+              vault:
+                command: echo {key}
+            target_files:
+              - app.env
+            """
+        )
+    )
+
+    with pytest.raises(ValueError, match="master providers: vault"):
+        WatchSession(load_config(config_file))
+
+
+def test_polling_watcher(tmp_path: Path) -> None:
+    """Polling watcher reports files whose stats changed."""
+    path = tmp_path / "file.env"
+    path.write_text("A=1\n")
+    watcher = PollingWatcher([path], interval=0.01)
+
+    assert watcher.poll(0.02) == set()
+
+    path.write_text("A=22\n")
+    assert watcher.poll(0.5) == {path}
@@ -0,0 +1,53 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional, TextIO
+
+from sync_var.logging import log
+
+_trace_file: Optional[TextIO] = None
+# Patterns are expanded on a background thread
+_lock = threading.Lock()
+
+
+def is_tracing() -> bool:
+    """Return True if events are logged or written.
+
+    Hot loops check this once and skip building event fields altogether
+    when nobody is listening.
+    """
+    return _trace_file is not None or log.isEnabledFor(logging.DEBUG)
+
+
+def trace_event(stage: str, event: str, **fields: Any) -> None:
+    """Log a structured event and append it to the trace file, if any."""
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(
+            "%s %s %s",
+            stage,
+            event,
+            " ".join(f"{name}={value}" for name, value in fields.items()),
+        )
+
+    if _trace_file is not None:
+        record = {"time": time.time(), "stage": stage, "event": event, **fields}
+        line = json.dumps(record, default=str) + "\n"
+        with _lock:
+            _trace_file.write(line)
+
+
+@contextmanager
+def trace_to(path: Path) -> Iterator[None]:
+    """Write events as JSON lines to path for the duration of a run."""
+    global _trace_file
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        previous, _trace_file = _trace_file, f
+        try:
+            yield
+        finally:
+            _trace_file = previous
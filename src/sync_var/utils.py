@@ -1,4 +1,12 @@
+import os
 from pathlib import Path
+from typing import Tuple
+
+# (size, mtime_ns)
+Stat = Tuple[int, int]
+
+# Stat of a file that does not exist or cannot be read
+MISSING_STAT: Stat = (-1, -1)
 
 
 def file_exists(path: str | Path) -> None:
@@ -7,3 +15,12 @@ def file_exists(path: str | Path) -> None:
         return None
 
     raise FileNotFoundError(f"File not found: {path}")
+
+
+def file_stat(path: str | Path) -> Stat:
+    """Return the size and mtime of a file, or MISSING_STAT."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return MISSING_STAT
+    return (st.st_size, st.st_mtime_ns)
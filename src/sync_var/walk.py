@@ -0,0 +1,191 @@
+import os
+import re
+from fnmatch import translate
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Pattern, Set, Tuple
+
+# Directories never descended into while expanding patterns
+IGNORED_DIRS = {".git", ".hg", ".svn", ".sync-var", "node_modules"}
+
+# Backups written by sync: filename.ext.bak.YYYYMMDDHHMMSS
+BACKUP_PATTERN = re.compile(r"\.bak\.\d{14}$")
+
+# name -> is_dir
+Listing = Dict[str, bool]
+
+# (base directory, compiled pattern, anchored)
+IgnoreRule = Tuple[str, Pattern[str], bool]
+
+
+def is_pattern(path: str) -> bool:
+    return any(c in path for c in "*?[")
+
+
+class DirectoryWalker:
+    """Expand glob patterns with os.scandir, pruning ignored directories.
+
+    Directory listings and parsed .gitignore files are cached, so several
+    patterns sharing a prefix only list each directory once. .gitignore
+    entries only prune directories: generated target files are often ignored
+    themselves. Negated entries are not supported.
+    """
+
+    def __init__(self) -> None:
+        self._listings: Dict[str, Listing] = {}
+        self._gitignores: Dict[str, List[IgnoreRule]] = {}
+
+    def expand(self, pattern: str, base_dir: Path) -> Set[Path]:
+        """Return the files matching a pattern relative to base_dir."""
+        path = Path(pattern)
+        parts = path.parts if path.is_absolute() else (base_dir / path).parts
+
+        # Resolve the literal prefix once; only the rest is matched
+        index = next(
+            (i for i, part in enumerate(parts) if is_pattern(part)), len(parts)
+        )
+        root = os.path.normpath(os.path.join(*parts[:index]))
+        if index == len(parts):
+            return {Path(root)} if os.path.isfile(root) else set()
+        segments = [part if part == "**" else _compile(part) for part in parts[index:]]
+
+        matches: Set[Path] = set()
+        if os.path.isdir(root):
+            rules = self._ancestor_rules(root)
+            self._match(root, segments, 0, rules, matches, set())
+        return matches
+
+    def _match(
+        self,
+        directory: str,
+        segments: List,
+        index: int,
+        inherited: List[IgnoreRule],
+        matches: Set[Path],
+        visited: Set[Tuple[str, int]],
+    ) -> None:
+        if (directory, index) in visited:
+            return
+        visited.add((directory, index))
+
+        rules = inherited + self._gitignore(directory)
+        segment = segments[index]
+        last = index == len(segments) - 1
+
+        if segment == "**":
+            if last:
+                # A trailing "**" matches every file below the directory
+                segments = segments + [_compile("*")]
+            self._match(directory, segments, index + 1, inherited, matches, visited)
+            for name, is_dir in self._list(directory).items():
+                path = os.path.join(directory, name)
+                if (
+                    is_dir
+                    and not name.startswith(".")
+                    and not _ignored_dir(path, name, rules)
+                ):
+                    self._match(path, segments, index, rules, matches, visited)
+            return
+
+        for name, is_dir in self._list(directory).items():
+            if not segment.match(name):
+                continue
+            path = os.path.join(directory, name)
+            if last and not is_dir:
+                if not BACKUP_PATTERN.search(name):
+                    matches.add(Path(path))
+            elif not last and is_dir and not _ignored_dir(path, name, rules):
+                self._match(path, segments, index + 1, rules, matches, visited)
+
+    def _list(self, directory: str) -> Listing:
+        listing = self._listings.get(directory)
+        if listing is None:
+            listing = {}
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            listing[entry.name] = entry.is_dir()
+                        except OSError:
+                            continue
+            except OSError:
+                pass
+            self._listings[directory] = listing
+        return listing
+
+    def _gitignore(self, directory: str) -> List[IgnoreRule]:
+        rules = self._gitignores.get(directory)
+        if rules is None:
+            rules = []
+            if ".gitignore" in self._list(directory):
+                rules = _parse_gitignore(directory)
+            self._gitignores[directory] = rules
+        return rules
+
+    def _ancestor_rules(self, directory: str) -> List[IgnoreRule]:
+        # .gitignore files above the walk root, up to the repository root
+        ancestors: List[str] = []
+        current = directory
+        while ".git" not in self._list(current):
+            parent = os.path.dirname(current)
+            if parent == current:
+                # Not inside a repository
+                return []
+            current = parent
+            ancestors.append(current)
+
+        rules: List[IgnoreRule] = []
+        for ancestor in reversed(ancestors):
+            rules.extend(self._gitignore(ancestor))
+        return rules
+
+
+def expand_target_patterns(
+    patterns: Iterable[str],
+    base_dir: Path,
+    walker: Optional[DirectoryWalker] = None,
+) -> Set[Path]:
+    walker = walker or DirectoryWalker()
+    matches: Set[Path] = set()
+    for pattern in sorted(patterns):
+        matches |= walker.expand(pattern, base_dir)
+    return matches
+
+
+def _compile(segment: str) -> Pattern[str]:
+    # Like glob, wildcards do not match a leading "." unless written out
+    regex = translate(segment)
+    if not segment.startswith("."):
+        regex = r"(?!\.)" + regex
+    return re.compile(regex)
+
+
+def _ignored_dir(path: str, name: str, rules: List[IgnoreRule]) -> bool:
+    if name in IGNORED_DIRS:
+        return True
+
+    for base, pattern, anchored in rules:
+        subject = os.path.relpath(path, base).replace(os.sep, "/") if anchored else name
+        if pattern.match(subject):
+            return True
+    return False
+
+
+def _parse_gitignore(directory: str) -> List[IgnoreRule]:
+    rules: List[IgnoreRule] = []
+    try:
+        with open(os.path.join(directory, ".gitignore"), "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except (OSError, UnicodeDecodeError):
+        return rules
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith(("#", "!")):
+            continue
+
+        line = line.rstrip("/")
+        anchored = "/" in line
+        line = line.lstrip("/")
+        if line:
+            rules.append((directory, re.compile(translate(line)), anchored))
+    return rules
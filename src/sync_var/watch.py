@@ -0,0 +1,289 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Protocol, Set, Tuple
+
+from sync_var.config import Config
+from sync_var.logging import log
+from sync_var.parse_master_var import (
+    MasterVar,
+    _parse_master_file,
+    validate_master_vars,
+)
+from sync_var.parse_target_var import (
+    TargetFile,
+    _parse_target_file,
+    validate_target_lines,
+)
+from sync_var.replace import replace_target_lines
+from sync_var.save import save_changed_target_file
+from sync_var.utils import file_stat
+
+# inotify(7) constants
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class Watcher(Protocol):
+    def poll(self, timeout: Optional[float]) -> Set[Path]:
+        """Wait up to timeout seconds (forever if None) for changed files."""
+        ...
+
+    def close(self) -> None: ...
+
+
+class InotifyWatcher:
+    """Watch files through inotify, watching their parent directories.
+
+    Directories are watched instead of files so that editors replacing a
+    file by rename are still noticed.
+    """
+
+    def __init__(self, paths: Iterable[Path]) -> None:
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found.")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available.")
+
+        self._paths = {_normalize(path) for path in paths}
+        self._dirs: Dict[int, Path] = {}
+
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed.")
+
+        for directory in {path.parent for path in self._paths}:
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(directory), _IN_WATCH_MASK
+            )
+            if wd < 0:
+                self.close()
+                raise OSError(ctypes.get_errno(), f"Cannot watch {directory}.")
+            self._dirs[wd] = directory
+
+    def poll(self, timeout: Optional[float]) -> Set[Path]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed: Set[Path] = set()
+        offset = 0
+        while offset < len(data):
+            wd, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+            if path in self._paths:
+                changed.add(path)
+
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """Watch files by comparing their size and mtime at a fixed interval."""
+
+    def __init__(self, paths: Iterable[Path], interval: float = 0.2) -> None:
+        self._interval = interval
+        self._stats = {path: file_stat(path) for path in map(_normalize, paths)}
+
+    def poll(self, timeout: Optional[float]) -> Set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path, previous in self._stats.items():
+                current = file_stat(path)
+                if current != previous:
+                    self._stats[path] = current
+                    changed.add(path)
+            if changed:
+                return changed
+
+            if deadline is None:
+                time.sleep(self._interval)
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return set()
+            time.sleep(min(self._interval, remaining))
+
+    def close(self) -> None:
+        pass
+
+
+def get_watcher(paths: Iterable[Path], polling: bool = False) -> Watcher:
+    """Return an inotify watcher, falling back to polling where unavailable."""
+    paths = list(paths)
+    if not polling:
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError) as e:
+            log.warning("inotify unavailable (%s), falling back to polling.", e)
+    return PollingWatcher(paths)
+
+
+class WatchSession:
+    """Parsed masters and targets kept in memory between changes."""
+
+    def __init__(self, config: Config) -> None:
+        if config.marker_configs:
+            raise ValueError("watch is not supported with several markers.")
+        if config.master_providers:
+            # Only files are watched; provider values change without notice
+            raise ValueError(
+                "watch is not supported with master providers: "
+                f"{', '.join(sorted(config.master_providers))}."
+            )
+        self.config = config
+        self.master_files = {
+            _normalize(path): env for env, path in config.master_files.items()
+        }
+        self.master_vars: Dict[Path, List[MasterVar]] = {}
+        self.target_files: Dict[Path, TargetFile] = {}
+
+    @property
+    def paths(self) -> Set[Path]:
+        return set(self.master_files) | {
+            _normalize(path) for path in self.config.target_files
+        }
+
+    @property
+    def all_master_vars(self) -> List[MasterVar]:
+        return [mv for mvs in self.master_vars.values() for mv in mvs]
+
+    def load(self) -> List[str]:
+        """Parse every file and sync all targets once."""
+        for path, env in self.master_files.items():
+            self.master_vars[path] = _parse_master_file(path, env)
+        validate_master_vars(self.all_master_vars)
+
+        logs: List[str] = []
+        for path in sorted(_normalize(p) for p in self.config.target_files):
+            logs.extend(self._sync_target(path))
+        return logs
+
+    def handle(self, changed: Set[Path]) -> List[str]:
+        """Re-sync after the given files changed."""
+        logs: List[str] = []
+
+        changed_keys: Set[Tuple[str, str]] = set()
+        for path in sorted(changed & set(self.master_files)):
+            changed_keys |= self._reload_master(path)
+
+        if changed_keys:
+            log.debug("Changed master keys: %s", sorted(changed_keys))
+            for target_file in self.target_files.values():
+                if target_file.path in changed:
+                    continue
+                logs.extend(self._rerender(target_file, changed_keys))
+
+        for path in sorted(changed - set(self.master_files)):
+            logs.extend(self._sync_target(path))
+
+        return logs
+
+    def _reload_master(self, path: Path) -> Set[Tuple[str, str]]:
+        old = {(mv.env, mv.key): mv.value for mv in self.master_vars.get(path, [])}
+        new_vars = _parse_master_file(path, self.master_files[path])
+
+        previous = self.master_vars.get(path, [])
+        self.master_vars[path] = new_vars
+        try:
+            validate_master_vars(self.all_master_vars)
+        except ValueError:
+            self.master_vars[path] = previous
+            raise
+
+        new = {(mv.env, mv.key): mv.value for mv in new_vars}
+        return {k for k in old.keys() | new.keys() if old.get(k) != new.get(k)}
+
+    def _sync_target(self, path: Path) -> List[str]:
+        target_lines = _parse_target_file(
+            path,
+            self.config.marker,
+            self.config.comment_profiles.prefixes_for(path),
+        )
+        validate_target_lines(target_lines, self.all_master_vars)
+
+        target_file = TargetFile(path=path, target_lines=target_lines)
+        self.target_files[path] = target_file
+        replace_target_lines(target_file, self.all_master_vars)
+
+        return save_changed_target_file(target_file, self.config.save_options.backup)
+
+    def _rerender(
+        self, target_file: TargetFile, changed_keys: Set[Tuple[str, str]]
+    ) -> List[str]:
+        affected = [
+            tl
+            for tl in target_file.target_lines
+            if any(
+                (env.lower(), key.upper()) in changed_keys
+                for env, key in tl.target_vars
+            )
+        ]
+        if not affected:
+            return []
+
+        validate_target_lines(affected, self.all_master_vars)
+        replace_target_lines(
+            TargetFile(path=target_file.path, target_lines=affected),
+            self.all_master_vars,
+        )
+        return save_changed_target_file(target_file, self.config.save_options.backup)
+
+
+def run_watch(
+    session: WatchSession,
+    watcher: Watcher,
+    debounce: float,
+    on_logs: Callable[[List[str]], None],
+    on_error: Callable[[Exception], None],
+) -> None:
+    """Block forever, re-syncing after each debounced batch of changes."""
+    while True:
+        changed = watcher.poll(None)
+        while changed:
+            more = watcher.poll(debounce)
+            if not more:
+                break
+            changed |= more
+
+        if not changed:
+            continue
+
+        started = time.perf_counter()
+        try:
+            logs = session.handle(changed)
+        except (ValueError, OSError) as e:
+            on_error(e)
+            continue
+        log.debug("Re-synced in %.1f ms", (time.perf_counter() - started) * 1000)
+        on_logs(logs)
+
+
+def _normalize(path: Path) -> Path:
+    return Path(os.path.abspath(path))